@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+
+"""
+UnicodeFix Benchmark Suite
+
+Measures throughput (MB/s) and peak memory of the cleaning engine, the
+command-line file path and the web endpoints on synthetic corpora, and
+compares the results against a stored baseline.
+
+Every corpus is generated from a seed, so runs with the same --size and
+--seed clean exactly the same input.
+
+Run with:     python benchmark.py --output baseline.json
+Compare with: python benchmark.py --baseline baseline.json
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# The result cache would turn repeated web runs into cache hits
+os.environ.setdefault("UNICODEFIX_CACHE_BYTES", "0")
+
+from bin.cleanup_text_module import (CHAR_REPLACEMENTS, INVISIBLE_CHARS, clean_bytes,
+                                     clean_text, get_unicode_info)
+
+RESULTS_VERSION = 1
+MB = 1024 * 1024
+
+WORDS = ("the", "quick", "brown", "fox", "jumps", "over", "lazy", "dog", "unicode",
+         "text", "clean", "quote", "dash", "space", "line", "file", "data", "value",
+         "report", "editor", "paste", "document", "character", "invisible")
+
+# Non-ASCII words left alone by clean_text and folded by transliteration
+INTERNATIONAL_WORDS = ("caf\u00e9", "na\u00efve", "Stra\u00dfe", "\u00e9t\u00e9", "se\u00f1or",
+                       "\u0394\u03ad\u03bb\u03c4\u03b1", "\u041c\u043e\u0441\u043a\u0432\u0430",
+                       "\u5317\u4eac", "\u6771\u4eac", "\u00bd", "\u2192", "\u00b1")
+
+# Characters clean_text replaces or removes, taken from the engine's own tables
+SMART_PUNCTUATION = tuple(CHAR_REPLACEMENTS)
+ZERO_WIDTH = tuple(INVISIBLE_CHARS)
+
+
+def _words(rng: random.Random, low: int = 6, high: int = 14) -> list:
+    return [rng.choice(WORDS) for _ in range(rng.randint(low, high))]
+
+
+def _ascii_line(rng: random.Random) -> str:
+    return " ".join(_words(rng)).capitalize() + ".\n"
+
+
+def _smart_punctuation_line(rng: random.Random) -> str:
+    words = [word + rng.choice(SMART_PUNCTUATION) if rng.random() < 0.5 else word
+             for word in _words(rng)]
+    return " ".join(words) + "\n"
+
+
+def _zero_width_line(rng: random.Random) -> str:
+    chars = []
+    for char in " ".join(_words(rng)):
+        chars.append(char)
+        if rng.random() < 0.3:
+            chars.append(rng.choice(ZERO_WIDTH))
+    return "".join(chars) + "\n"
+
+
+def _line_endings_line(rng: random.Random) -> str:
+    return " ".join(_words(rng)) + rng.choice(("\r\n", "\r\n", "\r\n", "\r", "\n"))
+
+
+def _trailing_whitespace_line(rng: random.Random) -> str:
+    padding = "".join(rng.choice(" \t") for _ in range(rng.randint(10, 200)))
+    return " ".join(_words(rng, 20, 40)) + padding + "\n"
+
+
+def _international_line(rng: random.Random) -> str:
+    words = [rng.choice(INTERNATIONAL_WORDS) if rng.random() < 0.2 else word
+             for word in _words(rng)]
+    return " ".join(words) + "\n"
+
+
+def _mixed_line(rng: random.Random) -> str:
+    return rng.choice(_MIXED_LINES)(rng)
+
+
+# Line generators for each corpus kind, in report order
+CORPORA = {
+    "ascii": _ascii_line,
+    "smart_punctuation": _smart_punctuation_line,
+    "zero_width": _zero_width_line,
+    "line_endings": _line_endings_line,
+    "trailing_whitespace": _trailing_whitespace_line,
+    "international": _international_line,
+    "mixed": _mixed_line,
+}
+_MIXED_LINES = (_ascii_line, _ascii_line, _ascii_line, _smart_punctuation_line,
+                _zero_width_line, _line_endings_line, _trailing_whitespace_line)
+
+
+def generate_corpus(kind: str, size: int, seed: int = 0) -> str:
+    """
+    Generate a reproducible synthetic corpus.
+
+    Args:
+        kind (str): One of CORPORA: "ascii" (plain prose), "smart_punctuation"
+            (quotes, dashes, ellipses and NBSP after every other word),
+            "zero_width" (invisible characters between ~30% of characters),
+            "line_endings" (CRLF and lone CR), "trailing_whitespace" (long lines
+            padded with spaces and tabs), "international" (accented, Greek,
+            Cyrillic and CJK words and symbols among ~20% of the words) or
+            "mixed" (lines of the first five kinds)
+        size (int): Length of the corpus in characters
+        seed (int): Random seed; the same kind, size and seed give the same text
+
+    Returns:
+        str: The generated text
+    """
+    make_line = CORPORA[kind]
+    rng = random.Random(f"{kind}:{seed}")
+    lines = []
+    length = 0
+    while length < size:
+        line = make_line(rng)
+        lines.append(line)
+        length += len(line)
+    return "".join(lines)[:size]
+
+
+def load_cli():
+    """Import bin/cleanup-text.py, whose file name is not a module name."""
+    bin_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bin")
+    if bin_dir not in sys.path:
+        sys.path.insert(0, bin_dir)
+    spec = importlib.util.spec_from_file_location("cleanup_text_cli",
+                                                  os.path.join(bin_dir, "cleanup-text.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def web_client():
+    """Return an in-process test client for the web app, or None without its dependencies."""
+    try:
+        from fastapi.testclient import TestClient
+        from web_app import app
+    except ImportError:
+        return None
+    return TestClient(app)
+
+
+def _checked_file(result: tuple) -> None:
+    if result[0] == "failed":
+        raise RuntimeError(result[1])
+
+
+def _checked_response(response) -> None:
+    response.raise_for_status()
+    if "json" in response.headers.get("content-type", "") and not response.json()["success"]:
+        raise RuntimeError(response.json()["error"])
+
+
+def target_clean_text(text: str, workdir: str, context: dict):
+    return lambda: clean_text(text)
+
+
+def target_clean_text_transliterate(text: str, workdir: str, context: dict):
+    clean_text("\u00e9", transliterate=True)  # build the table outside the measurement
+    return lambda: clean_text(text, transliterate=True)
+
+
+def target_clean_bytes(text: str, workdir: str, context: dict):
+    data = text.encode("utf-8")
+    return lambda: clean_bytes(data)
+
+
+def target_get_unicode_info(text: str, workdir: str, context: dict):
+    return lambda: get_unicode_info(text)
+
+
+def _input_file(text: str, workdir: str) -> str:
+    path = os.path.join(workdir, "input.txt")
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(text)
+    return path
+
+
+def target_cli(text: str, workdir: str, context: dict):
+    cli = context.setdefault("cli", load_cli())
+    path = _input_file(text, workdir)
+    return lambda: _checked_file(cli.clean_file(path))
+
+
+def target_cli_mmap(text: str, workdir: str, context: dict):
+    cli = context.setdefault("cli", load_cli())
+    path = _input_file(text, workdir)
+    return lambda: _checked_file(cli.clean_file(path, use_mmap=True))
+
+
+def target_web_clean_text(text: str, workdir: str, context: dict):
+    client = context["client"]
+    return lambda: _checked_response(client.post("/api/clean-text", json={"text": text}))
+
+
+def target_web_clean_file(text: str, workdir: str, context: dict):
+    client = context["client"]
+    data = text.encode("utf-8")
+    return lambda: _checked_response(
+        client.post("/api/clean-file", files={"file": ("input.txt", data)}))
+
+
+def target_web_clean_file_stream(text: str, workdir: str, context: dict):
+    client = context["client"]
+    data = text.encode("utf-8")
+    return lambda: _checked_response(
+        client.post("/api/clean-file/stream", files={"file": ("input.txt", data)}))
+
+
+# Benchmarked code paths: name -> (setup returning a zero-argument callable, needs web)
+TARGETS = {
+    "clean_text": (target_clean_text, False),
+    "clean_text_transliterate": (target_clean_text_transliterate, False),
+    "clean_bytes": (target_clean_bytes, False),
+    "get_unicode_info": (target_get_unicode_info, False),
+    "cli": (target_cli, False),
+    "cli_mmap": (target_cli_mmap, False),
+    "web_clean_text": (target_web_clean_text, True),
+    "web_clean_file": (target_web_clean_file, True),
+    "web_clean_file_stream": (target_web_clean_file_stream, True),
+}
+
+# Opt-in code paths that must be no slower than the default path: name -> default
+FASTER_THAN = {
+    "cli_mmap": "cli",
+}
+
+
+def measure(run, input_bytes: int, repeat: int) -> dict:
+    """
+    Time a benchmark and measure its peak memory.
+
+    Timing takes the best of repeat runs; peak memory is traced in one more
+    run, since tracing slows the code down.
+
+    Args:
+        run: Zero-argument callable doing the work
+        input_bytes (int): UTF-8 size of the input, for MB/s
+        repeat (int): Number of timed runs
+
+    Returns:
+        dict: input_bytes, seconds, mb_per_s and peak_memory_bytes
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "input_bytes": input_bytes,
+        "seconds": round(best, 6),
+        "mb_per_s": round(input_bytes / MB / best, 2) if best > 0 else None,
+        "peak_memory_bytes": peak,
+    }
+
+
+def run_benchmarks(corpora: list, targets: list, size: int, seed: int, repeat: int) -> dict:
+    """
+    Run every target on every corpus.
+
+    Returns:
+        dict: Results keyed by "target/corpus", in run order
+    """
+    context = {}
+    if any(TARGETS[name][1] for name in targets):
+        context["client"] = web_client()
+        if context["client"] is None:
+            print("[!] Web dependencies not installed, skipping web targets")
+            targets = [name for name in targets if not TARGETS[name][1]]
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="unicodefix-bench-") as workdir:
+        for kind in corpora:
+            text = generate_corpus(kind, size, seed)
+            input_bytes = len(text.encode("utf-8"))
+            for name in targets:
+                setup, _ = TARGETS[name]
+                key = f"{name}/{kind}"
+                results[key] = measure(setup(text, workdir, context), input_bytes, repeat)
+                print(format_result(key, results[key]))
+    return results
+
+
+def format_result(key: str, result: dict, baseline: dict = None) -> str:
+    """Format one result as a report line, with the change from baseline if given."""
+    line = (f"{key:<42} {result['mb_per_s']:>9.1f} MB/s "
+            f"{result['peak_memory_bytes'] / MB:>9.1f} MB peak")
+    if baseline:
+        line += (f"  {result['mb_per_s'] / baseline['mb_per_s'] - 1:>+7.1%} speed"
+                 f"  {result['peak_memory_bytes'] - baseline['peak_memory_bytes']:>+12,} B")
+    return line
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Compare results with a baseline run.
+
+    Args:
+        results (dict): Results of this run
+        baseline (dict): Results of the baseline run
+        tolerance (float): Allowed relative loss of speed or growth of peak memory
+
+    Returns:
+        list: Keys of the results that regressed beyond the tolerance
+    """
+    regressions = []
+    for key, result in results.items():
+        old = baseline.get(key)
+        if not old:
+            continue
+        slower = result["mb_per_s"] < old["mb_per_s"] * (1 - tolerance)
+        bigger = result["peak_memory_bytes"] > old["peak_memory_bytes"] * (1 + tolerance) + 64 * 1024
+        if slower or bigger:
+            regressions.append(key)
+    return regressions
+
+
+def compare_paths(results: dict, tolerance: float) -> list:
+    """
+    Check that opt-in code paths in FASTER_THAN keep up with their default path.
+
+    Args:
+        results (dict): Results of this run
+        tolerance (float): Allowed relative loss of speed against the default path
+
+    Returns:
+        list: Keys of the results slower than their default path beyond the tolerance
+    """
+    slower = []
+    for key, result in results.items():
+        name, kind = key.split("/", 1)
+        default = results.get(f"{FASTER_THAN.get(name)}/{kind}")
+        if default and result["mb_per_s"] < default["mb_per_s"] * (1 - tolerance):
+            slower.append(key)
+    return slower
+
+
+def main():
+    """Parse arguments, run the benchmarks and report or store the results."""
+    parser = argparse.ArgumentParser(description="Benchmark UnicodeFix cleaning throughput.")
+    parser.add_argument("--size", type=float, default=4.0, metavar="MB",
+                        help="Size of each corpus in MB of characters (default: 4)")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus random seed (default: 0)")
+    parser.add_argument("--repeat", type=int, default=3, metavar="N",
+                        help="Timed runs per benchmark; the best is kept (default: 3)")
+    parser.add_argument("--corpus", action="append", choices=list(CORPORA), metavar="KIND",
+                        help=f"Corpus to run, may be repeated (default: all of {', '.join(CORPORA)})")
+    parser.add_argument("--target", action="append", choices=list(TARGETS), metavar="NAME",
+                        help=f"Code path to run, may be repeated (default: all of {', '.join(TARGETS)})")
+    parser.add_argument("--output", metavar="FILE", help="Write the results as JSON to FILE")
+    parser.add_argument("--baseline", metavar="FILE",
+                        help="Compare with the JSON results in FILE; exit with status 1 "
+                             "on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="Allowed slowdown or memory growth against the baseline "
+                             "(default: 0.10)")
+    args = parser.parse_args()
+
+    size = int(args.size * MB)
+    corpora = args.corpus or list(CORPORA)
+    targets = args.target or list(TARGETS)
+    if args.repeat < 1 or size < 1:
+        parser.error("--size and --repeat must be positive")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            stored = json.load(f)
+        if stored.get("version") != RESULTS_VERSION:
+            parser.error(f"unsupported baseline version in {args.baseline}")
+        if (stored["size"], stored["seed"]) != (size, args.seed):
+            print(f"[!] Baseline used --size {stored['size'] / MB:g} --seed {stored['seed']}; "
+                  "results are not directly comparable")
+        baseline = stored["results"]
+
+    print(f"[i] {len(corpora)} corpora x {len(targets)} targets, "
+          f"{size / MB:g} MB each, seed {args.seed}, best of {args.repeat}")
+    results = run_benchmarks(corpora, targets, size, args.seed, args.repeat)
+
+    if args.output:
+        data = {
+            "version": RESULTS_VERSION,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "size": size,
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1)
+        print(f"[i] Results written to {args.output}")
+
+    if baseline is not None:
+        print(f"\n[i] Compared with {args.baseline}:")
+        for key, result in results.items():
+            print(format_result(key, result, baseline.get(key)))
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"[✗] {len(regressions)} regression(s) beyond {args.tolerance:.0%}: "
+                  + ", ".join(regressions))
+            sys.exit(1)
+        print(f"[✓] No regressions beyond {args.tolerance:.0%}")
+
+    slower = compare_paths(results, args.tolerance)
+    if slower:
+        print(f"[✗] {len(slower)} opt-in path(s) slower than the default beyond "
+              f"{args.tolerance:.0%}: " + ", ".join(slower))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -17,59 +17,76 @@ Example:
     [✓] Cleaned: file2.txt → file2.clean.txt
 """
 
-import argparse
 import os
-import os.path
-import re
+import sys
 
-from unidecode import unidecode
+# Thin-client fast path: if a cleanup daemon is running, hand it this whole
+# invocation before importing anything else (see cleanup_daemon.py). The
+# daemon sends runs reading STDIN back; --line-buffered ones are never sent.
+LOCAL_OPTIONS = {"--daemon", "--no-daemon", "--line-buffered"}
+if __name__ == "__main__" and not LOCAL_OPTIONS & set(sys.argv[1:]):
+    from cleanup_daemon import forward
+    status = forward(sys.argv[1:])
+    if status is not None:
+        sys.exit(status)
 
+import argparse  # noqa: E402
+import codecs  # noqa: E402
+import collections  # noqa: E402
+import contextlib  # noqa: E402
+import fnmatch  # noqa: E402
+import functools  # noqa: E402
+import hashlib  # noqa: E402
+import io  # noqa: E402
+import itertools  # noqa: E402
+import json  # noqa: E402
+import mmap  # noqa: E402
+import os.path  # noqa: E402
+import shutil  # noqa: E402
+import time  # noqa: E402
+import unicodedata  # noqa: E402
 
-def clean_text(text: str) -> str:
-    """
-    Normalize problematic or invisible Unicode characters to safe ASCII equivalents.
+from cleanup_text_module import (DEFAULT_CHUNK_SIZE, ENCODING_SAMPLE_SIZE,  # noqa: E402
+                                 EditLog, clean_byte_stream, clean_mapped, clean_stream,
+                                 clean_stream_with_edits, clean_text_with_edits,
+                                 detect_encoding, find_issues, needs_cleaning)
+from cleanup_archive import (BINARY, archive_output_path, archive_suffix,  # noqa: E402
+                             clean_archive, is_archive, read_text_members)
 
-    This function performs multiple operations:
-    1. Converts typographic characters (quotes, dashes) to their ASCII equivalents
-    2. Removes zero-width and invisible Unicode characters
-    3. Normalizes line endings for cross-platform compatibility
-    4. Removes trailing whitespace
+# Per-file outcomes reported by clean_file() and check_file()
+CLEANED = "cleaned"
+ALREADY_CLEAN = "already clean"
+WOULD_CHANGE = "would change"
+FAILED = "failed"
 
-    Args:
-        text (str): The input text containing Unicode characters
+# --check reads files at least this big through mmap instead of into memory
+CHECK_MMAP_BYTES = 16 * 1024 * 1024
 
-    Returns:
-        str: The cleaned text with normalized ASCII characters
-
-    Example:
-        >>> clean_text('"Hello" — World')
-        '"Hello" - World'
-    """
-    replacements = {
-        '\u2018': "'", '\u2019': "'",  # Smart single quotes
-        '\u201C': '"', '\u201D': '"',  # Smart double quotes
-        '\u2013': '-', '\u2014': '-',  # En and em dashes
-        '\u2026': '...',  # Ellipsis
-        '\u00A0': ' ',    # Non-breaking space
-    }
-    for orig, repl in replacements.items():
-        text = text.replace(orig, repl)
+# How --check names line endings
+LINE_ENDING_NAMES = {"\r\n": "CRLF", "\r": "CR", "\n": "LF"}
 
-    # Remove zero-width characters and other invisible characters
-    text = re.sub(r'[\u200B\u200C\u200D\uFEFF\u00AD]', '', text)
+# Formats of --report-format: "file:line:col" lines, or a JSON record of the edits per file
+REPORT_FORMATS = ("text", "jsonl")
 
-    # Normalize line endings (convert all to \n, then to platform-specific)
-    text = text.replace('\r\n', '\n').replace('\r', '\n')
-    
-    # Remove trailing whitespace on every line
-    text = re.sub(r'[ \t]+\n', '\n', text)
-    
-    # Convert back to platform-specific line endings if needed
-    import os
-    if os.name == 'nt':  # Windows
-        text = text.replace('\n', '\r\n')
+# What to do with files that cleaning would not change (--no-op)
+NOOP_ACTIONS = ("copy", "link", "skip")
+
+# Small files are grouped so that each --jobs task carries at least this many
+# input bytes (or BATCH_MAX_FILES files); otherwise the per-task process
+# round trip costs more than cleaning the file itself.
+BATCH_TARGET_BYTES = 4 * 1024 * 1024
+BATCH_MAX_FILES = 64
+# ...but never fewer bytes than this, so that inputs smaller than it stay in
+# one batch and run serially instead of paying for a process pool start-up
+MIN_BATCH_BYTES = 1024 * 1024
 
-    return text
+# Incremental state kept at the top of every --recursive directory
+MANIFEST_NAME = ".unicodefix-manifest.json"
+MANIFEST_VERSION = 1
+
+# Never descend into or clean these, on top of any --exclude patterns
+DEFAULT_EXCLUDES = ("*.clean.txt", "*.clean.zip", "*.clean.tar*", "*.clean.tgz", "*.clean.tbz2",
+                    "*.clean.txz", MANIFEST_NAME, ".git", ".hg", ".svn", "__pycache__")
 
 
 def is_safe_path(path: str) -> bool:
@@ -104,6 +121,684 @@ def is_safe_path(path: str) -> bool:
     return True
 
 
+def positive_int(value: str) -> int:
+    """
+    Argument type for options that take a positive integer.
+
+    Args:
+        value (str): Raw command-line value
+
+    Returns:
+        int: The parsed value
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is not a positive integer
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid integer: {value!r}")
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be positive: {value!r}")
+    return number
+
+
+def encoding_name(value: str) -> str:
+    """
+    Argument type for --encoding: a codec name, normalized.
+
+    Args:
+        value (str): Raw command-line value
+
+    Returns:
+        str: Python's canonical name for the codec
+
+    Raises:
+        argparse.ArgumentTypeError: If Python has no such text codec
+    """
+    try:
+        info = codecs.lookup(value)
+    except LookupError:
+        raise argparse.ArgumentTypeError(f"unknown encoding: {value!r}")
+    if not getattr(info, "_is_text_encoding", True):
+        raise argparse.ArgumentTypeError(f"not a text encoding: {value!r}")
+    return info.name
+
+
+def is_ascii_compatible(encoding: str) -> bool:
+    """Whether ASCII text has the same bytes in encoding, so byte-level scans apply."""
+    ascii_bytes = bytes(range(128))
+    return ascii_bytes.decode("ascii").encode(encoding) == ascii_bytes
+
+
+def output_path(infile: str) -> str:
+    """Return the ".clean.txt" path written for an input file (".clean.zip" etc. for archives)."""
+    if is_archive(infile):
+        return archive_output_path(infile)
+    base, _ = os.path.splitext(infile)
+    return base + ".clean.txt"
+
+
+def file_sha256(path: str) -> str:
+    """Return the hex SHA-256 digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def is_already_clean(infile: str, block_size: int = 1024 * 1024,
+                     encoding: str = None) -> bool:
+    """
+    Scan a file's raw bytes to see whether cleaning would leave it unchanged.
+
+    Stops at the first block that needs cleaning, so files with work to do
+    cost little more than one block read.
+
+    Args:
+        infile (str): Path of the file to scan
+        block_size (int): Bytes read per block
+        encoding (str): Encoding of the file (default: detected)
+
+    Returns:
+        bool: True if the cleaned output would be identical to the file
+    """
+    if encoding and not is_ascii_compatible(encoding):
+        return False
+    last = b""
+    with open(infile, "rb") as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                return True
+            # UTF-16/32 text is re-encoded as UTF-8 even when it is plain ASCII
+            if not last and not encoding and detect_encoding(block) != "utf-8":
+                return False
+            # Whitespace at the end of one block followed by a newline
+            if last in (b" ", b"\t") and block.startswith(b"\n"):
+                return False
+            if needs_cleaning(block):
+                return False
+            last = block[-1:]
+
+
+def copy_unchanged(infile: str, outfile: str, action: str) -> str:
+    """
+    Produce the output of an already clean file without re-writing its text.
+
+    Args:
+        infile (str): Input file path
+        outfile (str): Output file path
+        action (str): One of NOOP_ACTIONS
+
+    Returns:
+        str: What was done, for the report line
+    """
+    if action == "skip":
+        return "no output written"
+    if action == "link":
+        try:
+            if os.path.lexists(outfile):
+                os.remove(outfile)
+            os.link(infile, outfile)
+            return "linked"
+        except OSError:
+            pass  # e.g. different filesystem: fall back to a copy
+    shutil.copyfile(infile, outfile)
+    return "copied"
+
+
+def clean_file(infile: str, chunk_size: int = DEFAULT_CHUNK_SIZE, track: bool = False,
+               noop: str = "copy", use_mmap: bool = False, transliterate: bool = False,
+               encoding: str = None, edits: bool = False) -> tuple:
+    """
+    Clean a single file into a ".clean.txt" file next to it, encoded as UTF-8.
+
+    Files that cleaning would not change are detected from their raw bytes
+    first and handled according to noop instead of being decoded and
+    re-written. Other files are decoded in one pass from their detected
+    encoding, which the report line names unless it is UTF-8.
+
+    Args:
+        infile (str): Path of the file to clean
+        chunk_size (int): Characters (bytes with use_mmap) cleaned per chunk
+        track (bool): Also return a manifest record for --recursive mode
+        noop (str): Action for already clean files, one of NOOP_ACTIONS
+        use_mmap (bool): Memory-map the file and clean it with clean_mapped
+            instead of a text stream, keeping invalid UTF-8 as is (not with
+            transliterate)
+        transliterate (bool): Fold all remaining non-ASCII text to ASCII
+        encoding (str): Encoding of the file (default: detect_encoding())
+        edits (bool): For --report-format jsonl, make the message of a cleaned file
+            a JSON record of every edit (use_mmap is then ignored)
+
+    Returns:
+        tuple: (status, message to print, number of input bytes, manifest
+        record or None), where status is CLEANED, ALREADY_CLEAN or FAILED
+    """
+    try:
+        # Stat before reading so an edit made during cleaning is seen next run
+        stat = os.stat(infile)
+        outfile = output_path(infile)
+
+        # An output hard-linked by --no-op link must not be written through
+        if os.path.exists(outfile) and os.path.samefile(infile, outfile):
+            os.remove(outfile)
+
+        if is_already_clean(infile, encoding=encoding):
+            done = copy_unchanged(infile, outfile, noop)
+            status = ALREADY_CLEAN
+            message = f"[=] Already clean: {infile} → {outfile} ({done})"
+            if noop == "skip":
+                message = f"[=] Already clean: {infile} ({done})"
+        else:
+            with open(infile, "rb") as src:
+                detected = encoding or detect_encoding(src.read(ENCODING_SAMPLE_SIZE))
+                src.seek(0)
+                log = EditLog() if edits else None
+                if use_mmap and not transliterate and detected == "utf-8" and not edits:
+                    with open(outfile, "wb") as dst, \
+                            mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                        clean_mapped(mapped, dst, chunk_size)
+                else:
+                    # newline="": line endings are clean_text's job, not the file layer's
+                    with io.TextIOWrapper(src, detected, errors="replace", newline="") as text, \
+                            open(outfile, "w", encoding="utf-8", newline="") as dst:
+                        if edits:
+                            for _ in clean_stream_with_edits(text, dst, chunk_size,
+                                                             transliterate, log):
+                                pass
+                        else:
+                            clean_stream(text, dst, chunk_size, transliterate)
+            status = CLEANED
+            message = f"[✓] Cleaned: {infile} → {outfile}"
+            if detected != "utf-8":
+                message += f" (from {detected})"
+            if edits:
+                message = edit_record(infile, detected, log, outfile)
+
+        record = manifest_record(infile, outfile, stat) if track else None
+        return status, message, stat.st_size, record
+    except Exception as e:
+        return FAILED, f"[✗] Failed to process {infile}: {e}", 0, None
+
+
+def manifest_record(infile: str, outfile: str, stat: os.stat_result) -> dict:
+    """Build the manifest record of a cleaned file from its stat() taken before cleaning."""
+    record = {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": file_sha256(infile),
+        "output_size": None,
+        "output_mtime_ns": None,
+        "output_sha256": None,
+    }
+    if os.path.exists(outfile):
+        out_stat = os.stat(outfile)
+        record["output_size"] = out_stat.st_size
+        record["output_mtime_ns"] = out_stat.st_mtime_ns
+        record["output_sha256"] = file_sha256(outfile)
+    return record
+
+
+def describe_member(result: dict) -> str:
+    """Format one clean_archive() result as an indented report line."""
+    name = result["name"]
+    if result["status"] == BINARY:
+        return f"    [→] {name} (binary, copied)"
+    if result["status"] == ALREADY_CLEAN:
+        return f"    [=] {name}"
+    counts = ", ".join(f"{rule} {count}" for rule, count in result["changes"].items() if count)
+    line = f"    [✓] {name}: {counts or 'no changes'}"
+    if result["encoding"] != "utf-8":
+        line += f" (from {result['encoding']})"
+    return line
+
+
+def clean_archive_file(infile: str, chunk_size: int = DEFAULT_CHUNK_SIZE, track: bool = False,
+                       noop: str = "copy", transliterate: bool = False, encoding: str = None,
+                       jobs: int = 1) -> tuple:
+    """
+    Clean the text members of a zip or tar archive into a ".clean" archive next to it.
+
+    Members are streamed from one archive to the other without being
+    extracted; binary members are copied unchanged. The message lists every
+    member with its changes.
+
+    Args:
+        infile (str): Path of the archive to clean
+        chunk_size (int): Bytes cleaned per chunk of a member
+        track (bool): Also return a manifest record for --recursive mode
+        noop (str): Action if no member needs cleaning, one of NOOP_ACTIONS
+        transliterate (bool): Fold all remaining non-ASCII text to ASCII
+        encoding (str): Encoding of the text members (default: detected per member)
+        jobs (int): Worker processes cleaning members in parallel
+
+    Returns:
+        tuple: As from clean_file()
+    """
+    outfile = output_path(infile)
+    try:
+        stat = os.stat(infile)
+        if os.path.exists(outfile) and os.path.samefile(infile, outfile):
+            os.remove(outfile)
+
+        with open(infile, "rb") as src, open(outfile, "wb") as dst:
+            try:
+                members = clean_archive(src, dst, archive_suffix(infile), jobs, chunk_size,
+                                        transliterate, encoding)
+            except BaseException:
+                dst.close()
+                os.remove(outfile)  # a partial archive is of no use
+                raise
+        counts = collections.Counter(member["status"] for member in members)
+        summary = (f"{counts[CLEANED]} cleaned, {counts[ALREADY_CLEAN]} already clean, "
+                   f"{counts[BINARY]} binary")
+        if counts[CLEANED]:
+            status = CLEANED
+            message = f"[✓] Cleaned: {infile} → {outfile} ({summary})"
+        else:
+            # Keep the original's bytes rather than a re-compressed copy
+            os.remove(outfile)
+            done = copy_unchanged(infile, outfile, noop)
+            status = ALREADY_CLEAN
+            message = f"[=] Already clean: {infile} → {outfile} ({summary}; {done})"
+            if noop == "skip":
+                message = f"[=] Already clean: {infile} ({summary}; {done})"
+        message = "\n".join([message] + [describe_member(member) for member in members])
+
+        record = manifest_record(infile, outfile, stat) if track else None
+        return status, message, stat.st_size, record
+    except Exception as e:
+        return FAILED, f"[✗] Failed to process {infile}: {e}", 0, None
+
+
+def edit_record(path: str, encoding: str, edits: EditLog, outfile: str = None) -> str:
+    """Format the edits cleaning makes to a file as a --report-format jsonl line."""
+    record = {"file": path}
+    if outfile is not None:
+        record["output"] = outfile
+    record["encoding"] = encoding
+    record["edits"] = edits.to_dict()
+    return json.dumps(record)
+
+
+def describe_issue(path: str, line: int, column: int, rule: str, original: str) -> str:
+    """Format one find_issues() result as a "file:line:col: ..." report line."""
+    if rule == "line_endings":
+        what = LINE_ENDING_NAMES.get(original, repr(original))
+    elif rule == "trailing_whitespace":
+        what = f"{len(original)} trailing blank(s)"
+    elif len(original) == 1:
+        what = f"U+{ord(original):04X} {unicodedata.name(original, '')}".rstrip()
+    else:
+        what = repr(original)
+    return f"{path}:{line}:{column}: {rule}: {what}"
+
+
+def issue_lines(path: str, data, report=False, transliterate: bool = False,
+                encoding: str = None) -> list:
+    """
+    List what cleaning would change in encoded text, as report lines.
+
+    Args:
+        path (str): Name printed in front of each location
+        data: File contents as bytes or an mmap
+        report: False to stop at the first issue, True or "text" to list
+            every issue, "jsonl" for one edit_record() of every edit instead
+        transliterate (bool): Also report characters --transliterate would fold
+        encoding (str): Encoding of the data (default: detect_encoding())
+
+    Returns:
+        list: "file:line:col: rule: what" lines (or the JSON record), empty
+        if the data is clean
+    """
+    encoding = encoding or detect_encoding(data)
+    if report == "jsonl":
+        _, _, edits = clean_text_with_edits(bytes(data).decode(encoding, "replace"),
+                                            transliterate)
+        return [edit_record(path, encoding, edits)] if edits else []
+    if encoding != "utf-8":
+        # find_issues() scans UTF-8; columns count characters either way
+        data = bytes(data).decode(encoding, "replace").encode("utf-8")
+    issues = find_issues(data, transliterate)
+    if not report:
+        issues = itertools.islice(issues, 1)
+    return [describe_issue(path, *issue) for issue in issues]
+
+
+def check_file(infile: str, report=False, transliterate: bool = False,
+               encoding: str = None) -> tuple:
+    """
+    Check whether cleaning would change a file, without writing anything.
+
+    Args:
+        infile (str): Path of the file to check; for a zip or tar archive,
+            each text member is checked and reported as "archive:member"
+        report: How to report issues, as for issue_lines()
+        transliterate (bool): Also report characters --transliterate would fold
+        encoding (str): Encoding of the file (default: detect_encoding())
+
+    Returns:
+        tuple: (status, message to print or None, number of input bytes, None),
+        where status is WOULD_CHANGE, ALREADY_CLEAN or FAILED
+    """
+    try:
+        with open(infile, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if is_archive(infile):
+                lines = []
+                for name, data, detected in read_text_members(f, archive_suffix(infile),
+                                                              encoding):
+                    lines += issue_lines(f"{infile}:{name}", data, report, transliterate,
+                                         detected)
+            elif size < CHECK_MMAP_BYTES:
+                lines = issue_lines(infile, f.read(), report, transliterate, encoding)
+            else:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    lines = issue_lines(infile, mapped, report, transliterate, encoding)
+    except Exception as e:
+        return FAILED, f"[✗] Failed to check {infile}: {e}", 0, None
+    if not lines:
+        return ALREADY_CLEAN, None, size, None
+    return WOULD_CHANGE, "\n".join(lines), size, None
+
+
+def check_index_files(paths: list, report=False, transliterate: bool = False,
+                      encoding: str = None):
+    """
+    Like check_file() on each path, reading the staged contents from git in bulk.
+
+    Args:
+        paths (list): Paths relative to the current directory whose index
+            contents are what should be checked
+        report: How to report issues, as for issue_lines()
+        transliterate (bool): Also report characters --transliterate would fold
+        encoding (str): Encoding of the files (default: detect_encoding())
+
+    Yields:
+        tuple: check_file() results, in input order
+    """
+    if not paths:
+        return  # without starting git
+    from cleanup_git import BlobReader
+
+    with BlobReader() as reader:
+        for path, data in zip(paths, reader.read(":./" + path for path in paths)):
+            if data is None:
+                yield FAILED, f"[✗] Failed to check {path}: not in the git index", 0, None
+                continue
+            lines = issue_lines(path, data, report, transliterate, encoding)
+            if lines:
+                yield WOULD_CHANGE, "\n".join(lines), len(data), None
+            else:
+                yield ALREADY_CLEAN, None, len(data), None
+
+
+def clean_batch(infiles: list, worker=clean_file, **options) -> list:
+    """Clean (or check) a batch of files in one worker task, returning worker() results."""
+    return [worker(infile, **options) for infile in infiles]
+
+
+def make_batches(infiles: list, jobs: int) -> list:
+    """
+    Group files into worker tasks of roughly BATCH_TARGET_BYTES each.
+
+    The target shrinks for small inputs so every worker still gets a share,
+    down to MIN_BATCH_BYTES.
+
+    Args:
+        infiles (list): Paths of the files to clean
+        jobs (int): Number of worker processes
+
+    Returns:
+        list: Lists of paths, in input order
+    """
+    sizes = []
+    for infile in infiles:
+        try:
+            sizes.append(os.path.getsize(infile))
+        except OSError:
+            sizes.append(0)  # clean_file() reports the error
+
+    target = min(BATCH_TARGET_BYTES, max(sum(sizes) // (jobs * 4), MIN_BATCH_BYTES))
+    batches, batch, batch_bytes = [], [], 0
+    for infile, size in zip(infiles, sizes):
+        batch.append(infile)
+        batch_bytes += size
+        if batch_bytes >= target or len(batch) >= BATCH_MAX_FILES:
+            batches.append(batch)
+            batch, batch_bytes = [], 0
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def clean_files(infiles: list, jobs: int = 1, worker=clean_file, **options):
+    """
+    Clean files, spreading them across a process pool when jobs > 1.
+
+    Args:
+        infiles (list): Paths of the files to clean
+        jobs (int): Maximum number of worker processes
+        worker: Function run on each file, clean_file() or check_file()
+        **options: Keyword arguments passed on to worker()
+
+    Yields:
+        tuple: worker() results, in input order
+    """
+    batches = make_batches(infiles, jobs) if jobs > 1 else [infiles]
+    if len(batches) <= 1:
+        for infile in infiles:
+            yield worker(infile, **options)
+        return
+
+    # Imported here: it is slow to import and single-file runs never need it
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=min(jobs, len(batches))) as executor:
+        for results in executor.map(functools.partial(clean_batch, worker=worker, **options),
+                                    batches):
+            yield from results
+
+
+def _matches_any(relpath: str, patterns) -> bool:
+    """Check a relative path or its base name against glob patterns."""
+    name = os.path.basename(relpath)
+    return any(fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(relpath, pattern)
+               for pattern in patterns)
+
+
+def find_files(root: str, includes: list, excludes: list) -> list:
+    """
+    Walk a directory tree and list the files to clean.
+
+    Args:
+        root (str): Directory to walk
+        includes (list): Glob patterns a file must match (name or relative path)
+        excludes (list): Glob patterns for files and directories to skip
+
+    Returns:
+        list: Paths of the matching files, in sorted walk order
+    """
+    excludes = list(DEFAULT_EXCLUDES) + list(excludes)
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        reldir = os.path.relpath(dirpath, root)
+        dirnames[:] = sorted(name for name in dirnames
+                             if not _matches_any(os.path.normpath(os.path.join(reldir, name)),
+                                                 excludes))
+        for name in sorted(filenames):
+            relpath = os.path.normpath(os.path.join(reldir, name))
+            if _matches_any(relpath, includes) and not _matches_any(relpath, excludes):
+                found.append(os.path.join(dirpath, name))
+    return found
+
+
+def load_manifest(path: str, options: list) -> dict:
+    """
+    Load the per-file records of a manifest.
+
+    A missing, unreadable or outdated manifest, or one written with other
+    cleaning options, simply yields no records, so every file is cleaned again.
+
+    Args:
+        path (str): Manifest file path
+        options (list): Names of the output-changing options of this run
+
+    Returns:
+        dict: Records keyed by path relative to the manifest's directory
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+        return {}
+    if data.get("options", []) != options:
+        return {}
+    files = data.get("files")
+    return files if isinstance(files, dict) else {}
+
+
+def save_manifest(path: str, files: dict, options: list) -> None:
+    """Atomically write manifest records and the options they were cleaned with to path."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": MANIFEST_VERSION, "options": options, "files": files}, f,
+                  indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def is_unchanged(infile: str, record: dict) -> bool:
+    """
+    Check whether a file and its output still match their manifest record.
+
+    Only stat() calls are needed when nothing was touched. If just the input
+    mtime moved, the content hash decides, and the record is refreshed.
+
+    Args:
+        infile (str): Input file path
+        record (dict): Manifest record from a previous run, or None
+
+    Returns:
+        bool: True if the existing output is still up to date
+    """
+    if not record:
+        return False
+    try:
+        stat = os.stat(infile)
+        if record["output_size"] is not None:
+            out_stat = os.stat(output_path(infile))
+    except OSError:
+        return False
+
+    if record["output_size"] is not None and (
+            (out_stat.st_size, out_stat.st_mtime_ns) != (record["output_size"],
+                                                          record["output_mtime_ns"])):
+        return False
+    if (stat.st_size, stat.st_mtime_ns) == (record["size"], record["mtime_ns"]):
+        return True
+    if stat.st_size == record["size"] and file_sha256(infile) == record["sha256"]:
+        record["mtime_ns"] = stat.st_mtime_ns
+        return True
+    return False
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line parser."""
+    parser = argparse.ArgumentParser(description="Clean Unicode quirks from text.")
+    parser.add_argument("infile", nargs="*",
+                        help="Input file(s); zip and tar archives are cleaned member by member")
+    parser.add_argument("--chunk-size", type=positive_int, default=DEFAULT_CHUNK_SIZE,
+                        metavar="N",
+                        help="Characters read per chunk while streaming "
+                             f"(default: {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument("-j", "--jobs", type=positive_int, default=os.cpu_count() or 1,
+                        metavar="N",
+                        help="Number of files cleaned in parallel (default: CPU count)")
+    parser.add_argument("-r", "--recursive", action="append", default=[], metavar="DIR",
+                        help="Clean every matching file under DIR, skipping files that "
+                             f"are unchanged since the last run (tracked in DIR/{MANIFEST_NAME})")
+    parser.add_argument("--include", action="append", default=[], metavar="GLOB",
+                        help="With --recursive, only clean files matching GLOB "
+                             "(default: all files)")
+    parser.add_argument("--exclude", action="append", default=[], metavar="GLOB",
+                        help="With --recursive, skip files and directories matching GLOB")
+    parser.add_argument("--no-op", choices=NOOP_ACTIONS, default="copy", dest="noop",
+                        help="What to do with files that need no cleaning: copy them "
+                             "to the output, hard-link them, or skip writing any output "
+                             "(default: copy)")
+    parser.add_argument("--mmap", action="store_true", dest="use_mmap",
+                        help="Memory-map input files instead of streaming them through a text "
+                             "decoder (invalid UTF-8 is kept as is instead of replaced; ignored "
+                             "with --transliterate)")
+    parser.add_argument("--transliterate", action="store_true",
+                        help="Also fold every other non-ASCII character to ASCII "
+                             "(accents, CJK, symbols; e.g. Café → Cafe), using Unidecode")
+    parser.add_argument("--encoding", type=encoding_name, metavar="ENC",
+                        help="Encoding of the input (default: detected from a byte order "
+                             "mark and the first 64 KiB: UTF-8, UTF-16/32, else cp1252); "
+                             "output is always UTF-8")
+    parser.add_argument("--check", action="store_true",
+                        help="Write nothing; print file:line:col of the first change cleaning "
+                             "would make in each file and exit with status 1 if there is any "
+                             "(2 if a file could not be read)")
+    parser.add_argument("--report", action="store_true",
+                        help="With --check, list every change instead of only the first per "
+                             "file")
+    parser.add_argument("--report-format", choices=REPORT_FORMATS,
+                        help="Format of --report: text lines (default), or jsonl for one "
+                             "JSON record per file of every edit (offset, line, column, rule, "
+                             "original, replacement), also when cleaning, with all other "
+                             "messages sent to stderr")
+    parser.add_argument("--git-changed", nargs="?", const="HEAD", metavar="REF",
+                        help="Also clean (or check) the text files that differ between REF "
+                             "(default: HEAD) and the working tree, and untracked files")
+    parser.add_argument("--staged", action="store_true",
+                        help="Also clean (or check) the text files staged for commit; with "
+                             "--check, their staged contents are checked")
+    parser.add_argument("--line-buffered", action="store_true",
+                        help="In filter mode, clean and flush input as it arrives instead "
+                             "of in full chunks (for live pipes such as tail -f)")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Stay resident and serve later invocations, which then skip "
+                             "Python startup and imports (stop with Ctrl+C)")
+    parser.add_argument("--no-daemon", action="store_true",
+                        help="Clean in this process even if a daemon is running")
+    return parser
+
+
+def reads_stdin(args) -> bool:
+    """Whether parsed arguments make a run read STDIN (filter mode, or --check without files)."""
+    return not (args.infile or args.recursive or args.staged or args.git_changed is not None)
+
+
+def served_by_daemon(argv: list) -> bool:
+    """
+    Whether a cleanup daemon should run the invocation with these arguments.
+
+    Runs reading STDIN stay in the client, as do --line-buffered ones:
+    passing input through the daemon a block at a time only slows them
+    down. So do invocations that do not parse, which then report their
+    usage error themselves.
+
+    Args:
+        argv (list): Command-line arguments, without the program name
+
+    Returns:
+        bool: True if the daemon should run it, False to run it in the client
+    """
+    try:
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            args = build_parser().parse_args(argv)
+    except SystemExit:
+        return False
+    return not (args.line_buffered or reads_stdin(args))
+
+
 def main():
     """
     Main function that handles command-line interface and file processing.
@@ -115,46 +810,173 @@ def main():
     Returns:
         None
     """
-    parser = argparse.ArgumentParser(description="Clean Unicode quirks from text.")
-    parser.add_argument("infile", nargs="*", help="Input file(s)")
+    parser = build_parser()
     args = parser.parse_args()
+    if args.report_format and not args.report:
+        parser.error("--report-format needs --report")
+    jsonl = args.report_format == "jsonl"
+    # What issue_lines() lists: the first issue, all of them, or edit records
+    report = "jsonl" if jsonl else args.report
+    # Where messages go: with --report-format jsonl, stdout carries only the records
+    log = sys.stderr if jsonl else sys.stdout
+
+    if args.daemon:
+        from cleanup_daemon import serve
+        serve(main, served_by_daemon)
+        return
 
-    if not args.infile:
-        # No files provided: filter mode (STDIN to STDOUT)
-        import sys
-        raw = sys.stdin.read()
-        cleaned = clean_text(raw)
-        sys.stdout.write(cleaned)
+    from_git = args.staged or args.git_changed is not None
+    if args.check and reads_stdin(args):
+        # No files provided: check STDIN
+        lines = issue_lines("<stdin>", sys.stdin.buffer.read(), report, args.transliterate,
+                            args.encoding)
+        for line in lines:
+            print(line)
+        sys.exit(1 if lines else 0)
+
+    if reads_stdin(args):
+        if jsonl:
+            parser.error("--report-format jsonl needs input files, or --check to read STDIN")
+        # No files provided: filter mode (STDIN to STDOUT), as raw bytes so
+        # that line endings reach the cleaner untranslated; output is UTF-8
+        clean_byte_stream(sys.stdin.buffer, sys.stdout.buffer, args.chunk_size, args.encoding,
+                          args.transliterate, args.line_buffered)
+        sys.stdout.flush()
         return
 
+    start = time.perf_counter()
+    candidates = list(args.infile)
+
+    # Options that change the output; manifests written with others are not reused
+    options = ["transliterate"] if args.transliterate else []
+    if args.encoding:
+        options.append(f"encoding={args.encoding}")
+    if args.noop != "copy":
+        # e.g. outputs skipped by --no-op skip are missing when the next run would copy them
+        options.append(f"no-op={args.noop}")
+
+    # Files whose contents --check reads from the git index instead of the disk
+    index_paths = set()
+    if from_git:
+        from cleanup_git import GitError, changed_files
+        try:
+            git_paths, index_paths = changed_files(args.git_changed, args.staged)
+        except GitError as e:
+            print(f"[✗] {e}", file=log)
+            sys.exit(2)
+        candidates.extend(git_paths)
+
+    # Files found by --recursive map to (new manifest records, record key)
+    tracked = {}
+    manifests = []
+    old_records = {}
+    for root in args.recursive:
+        if not is_safe_path(root):
+            print(f"[✗] Unsafe directory rejected: {root}", file=log)
+            continue
+        if not os.path.isdir(root):
+            print(f"[✗] Not a directory: {root}", file=log)
+            continue
+        manifest_file = os.path.join(root, MANIFEST_NAME)
+        if args.check:
+            # Checks look at every file: unchanged inputs may still need cleaning
+            records = {}
+        else:
+            records = load_manifest(manifest_file, options)
+            manifests.append((manifest_file, records))
+        found = set()
+        for infile in find_files(root, args.include or ["*"], args.exclude):
+            key = os.path.relpath(infile, root).replace(os.sep, "/")
+            found.add(key)
+            tracked[infile] = (records, key)
+            old_records[infile] = records.pop(key, None)
+            candidates.append(infile)
+
+        # Keep records of files outside this run's filters unless they are gone
+        for key in [key for key in records if key not in found]:
+            if not os.path.isfile(os.path.join(root, key)):
+                del records[key]
+
     seen = set()
-    for infile in args.infile:
+    infiles = []
+    unchanged = 0
+    for infile in candidates:
         # Skip empty arguments (from batch file padding)
         if not infile:
             continue
             
         if infile in seen:
-            print(f"[!] Skipping duplicate: {infile}")
+            print(f"[!] Skipping duplicate: {infile}", file=log)
             continue
         seen.add(infile)
 
         # Security: Validate file path
         if not is_safe_path(infile):
-            print(f"[✗] Unsafe file path rejected: {infile}")
+            print(f"[✗] Unsafe file path rejected: {infile}", file=log)
             continue
 
+        # Incremental: keep the output of files unchanged since the last run
+        if infile in tracked and is_unchanged(infile, old_records[infile]):
+            records, key = tracked[infile]
+            records[key] = old_records[infile]
+            unchanged += 1
+            continue
+
+        infiles.append(infile)
+
+    counts = {CLEANED: 0, ALREADY_CLEAN: 0, WOULD_CHANGE: 0, FAILED: 0}
+    total_bytes = 0
+    if args.check:
+        staged = [infile for infile in infiles if infile in index_paths]
+        infiles = staged + [infile for infile in infiles if infile not in index_paths]
+        results = itertools.chain(
+            check_index_files(staged, report, args.transliterate, args.encoding),
+            clean_files(infiles[len(staged):], args.jobs, check_file, report=report,
+                        transliterate=args.transliterate, encoding=args.encoding))
+    else:
+        # Archives are cleaned in this process, one at a time, with their
+        # members spread across the --jobs workers instead
+        archives = [infile for infile in infiles if is_archive(infile)]
+        infiles = [infile for infile in infiles if not is_archive(infile)] + archives
+        results = itertools.chain(
+            clean_files(infiles[:len(infiles) - len(archives)], args.jobs,
+                        chunk_size=args.chunk_size, track=bool(tracked), noop=args.noop,
+                        use_mmap=args.use_mmap, transliterate=args.transliterate,
+                        encoding=args.encoding, edits=jsonl),
+            (clean_archive_file(infile, args.chunk_size, bool(tracked), args.noop,
+                                args.transliterate, args.encoding, args.jobs) if not jsonl else
+             (FAILED, f"[✗] Failed to process {infile}: --report-format jsonl does not support "
+                      "cleaning archives (--check does)", 0, None)
+             for infile in archives))
+    for infile, (status, message, size, record) in zip(infiles, results):
+        if message:
+            print(message, file=sys.stdout if status in (CLEANED, WOULD_CHANGE) else log)
+        counts[status] += 1
+        total_bytes += size
+        if status != FAILED and infile in tracked and not args.check:
+            records, key = tracked[infile]
+            records[key] = record
+
+    for manifest_file, records in manifests:
         try:
-            with open(infile, "r", encoding="utf-8", errors="replace") as f:
-                raw = f.read()
-            cleaned = clean_text(raw)
-
-            base, _ = os.path.splitext(infile)
-            outfile = base + ".clean.txt"
-            with open(outfile, "w", encoding="utf-8") as f:
-                f.write(cleaned)
-            print(f"[✓] Cleaned: {infile} → {outfile}")
-        except Exception as e:
-            print(f"[✗] Failed to process {infile}: {e}")
+            save_manifest(manifest_file, records, options)
+        except OSError as e:
+            print(f"[!] Could not write manifest {manifest_file}: {e}", file=log)
+
+    elapsed = time.perf_counter() - start
+    rate = total_bytes / (1024 * 1024) / elapsed if elapsed > 0 else 0.0
+    if args.check:
+        print(f"[i] {counts[WOULD_CHANGE]} would change, {counts[ALREADY_CLEAN]} already clean, "
+              f"{counts[FAILED]} failed, {total_bytes} bytes in {elapsed:.2f}s ({rate:.1f} MB/s)",
+              file=log)
+        if counts[FAILED]:
+            sys.exit(2)
+        sys.exit(1 if counts[WOULD_CHANGE] else 0)
+
+    skipped = f"{unchanged} unchanged, " if args.recursive else ""
+    print(f"[i] {counts[CLEANED]} cleaned, {counts[ALREADY_CLEAN]} already clean, "
+          f"{skipped}{counts[FAILED]} failed, {total_bytes} bytes "
+          f"in {elapsed:.2f}s ({rate:.1f} MB/s)", file=log)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+
+"""
+Archive support for cleanup-text.py and the web API
+
+Zip and tar archives (plain, or compressed with gzip, bzip2 or xz) are
+cleaned member by member without extracting anything to disk: each member
+is read from the input archive, streamed through the cleaner and written
+straight into an output archive of the same format. Members that look
+binary (a NUL near the start, as git decides it, unless the text is
+UTF-16/32) are copied byte-for-byte, as are directories, links and other
+entries without contents. Member names are never used as file system
+paths, so archives with absolute or "../" names are safe to clean.
+
+With jobs > 1, small members are cleaned on a process pool while the
+archive is read and written in order in the calling process.
+"""
+
+import collections
+import copy
+import io
+import lzma
+import shutil
+import tarfile
+import tempfile
+import zipfile
+import zlib
+
+try:
+    from .cleanup_text_module import (DEFAULT_CHUNK_SIZE, ENCODING_SAMPLE_SIZE,
+                                      clean_byte_stream, detect_encoding)
+except ImportError:  # imported from bin/ by cleanup-text.py
+    from cleanup_text_module import (DEFAULT_CHUNK_SIZE, ENCODING_SAMPLE_SIZE,
+                                     clean_byte_stream, detect_encoding)
+
+# Tar suffixes and the tarfile mode that writes each; ".zip" is the other format
+TAR_WRITE_MODES = {
+    ".tar": "w", ".tar.gz": "w:gz", ".tgz": "w:gz", ".tar.bz2": "w:bz2",
+    ".tbz2": "w:bz2", ".tar.xz": "w:xz", ".txz": "w:xz",
+}
+ARCHIVE_SUFFIXES = (".zip",) + tuple(TAR_WRITE_MODES)
+
+# Bytes inspected for a NUL to decide that a member is binary, as git does
+BINARY_SNIFF_BYTES = 8000
+
+# With jobs > 1, members up to this size are cleaned in worker processes;
+# bigger ones are streamed in this process so memory use stays bounded
+PARALLEL_MEMBER_BYTES = 4 * 1024 * 1024
+
+# Cleaned tar members are held in memory up to this size (tar headers need
+# the size up front), then spill to a temporary file
+SPOOL_BYTES = 8 * 1024 * 1024
+
+# Per-member outcomes
+CLEANED = "cleaned"
+ALREADY_CLEAN = "already clean"
+BINARY = "binary"
+
+# What reading a damaged or unsupported archive raises; caught around reads only,
+# so that errors writing the output (a full disk) are not reported as damage
+READ_ERRORS = (zipfile.BadZipFile, tarfile.TarError, EOFError, zlib.error, lzma.LZMAError,
+               NotImplementedError, RuntimeError, OSError)
+
+
+class ArchiveError(Exception):
+    """Raised when an archive cannot be read."""
+
+
+class ArchiveTooLarge(ArchiveError):
+    """Raised when the members of an archive exceed the allowed uncompressed size."""
+
+
+def archive_suffix(path: str):
+    """Return the archive suffix of a file name (e.g. ".tar.gz"), or None."""
+    name = path.lower()
+    for suffix in sorted(ARCHIVE_SUFFIXES, key=len, reverse=True):
+        if name.endswith(suffix):
+            return suffix
+    return None
+
+
+def is_archive(path: str) -> bool:
+    """Whether a file name is that of a zip or tar archive."""
+    return archive_suffix(path) is not None
+
+
+def archive_output_path(path: str) -> str:
+    """Return the output path for an archive: "a.tar.gz" becomes "a.clean.tar.gz"."""
+    size = len(archive_suffix(path))
+    return path[:-size] + ".clean" + path[-size:]
+
+
+def member_encoding(sample: bytes, encoding: str = None):
+    """
+    Decide how to decode a member from its first bytes.
+
+    Args:
+        sample (bytes): Start of the member's contents
+        encoding (str): Encoding to use for text members (default: detected)
+
+    Returns:
+        str: The encoding to clean the member with, or None if it is binary
+    """
+    detected = detect_encoding(sample)
+    if not detected.startswith(("utf-16", "utf-32")) and b"\0" in sample[:BINARY_SNIFF_BYTES]:
+        return None
+    return encoding or detected
+
+
+class _Prefixed:
+    """A binary reader returning prefix, then the rest of another reader."""
+
+    def __init__(self, prefix: bytes, raw):
+        self._prefix = prefix
+        self._raw = raw
+
+    def read(self, size: int = -1) -> bytes:
+        if not self._prefix:
+            return self._raw.read(size)
+        if size is None or size < 0:
+            data, self._prefix = self._prefix + self._raw.read(), b""
+        else:
+            data, self._prefix = self._prefix[:size], self._prefix[size:]
+        return data
+
+
+def clean_member(src, dst, chunk_size: int = DEFAULT_CHUNK_SIZE, transliterate: bool = False,
+                 encoding: str = None) -> dict:
+    """
+    Clean one member's contents from a binary reader into a binary writer.
+
+    Args:
+        src: Readable binary file object with the member's contents
+        dst: Writable binary file object for the cleaned contents
+        chunk_size (int): Bytes read per chunk
+        transliterate (bool): Fold all remaining non-ASCII text to ASCII
+        encoding (str): Encoding of text members (default: detected per member)
+
+    Returns:
+        dict: status (CLEANED, ALREADY_CLEAN or BINARY), encoding (None if
+        binary) and changes (per-rule change counts, None if binary)
+    """
+    sample = src.read(ENCODING_SAMPLE_SIZE)
+    detected = member_encoding(sample, encoding)
+    if detected is None:
+        dst.write(sample)
+        shutil.copyfileobj(src, dst, chunk_size)
+        return {"status": BINARY, "encoding": None, "changes": None}
+    changes = clean_byte_stream(_Prefixed(sample, src), dst, chunk_size, detected, transliterate)
+    changed = any(changes.values()) or detected != "utf-8"
+    return {"status": CLEANED if changed else ALREADY_CLEAN, "encoding": detected,
+            "changes": changes}
+
+
+def clean_member_bytes(data: bytes, transliterate: bool = False, encoding: str = None) -> tuple:
+    """Like clean_member() on in-memory contents, for worker processes: (result, output)."""
+    output = io.BytesIO()
+    result = clean_member(io.BytesIO(data), output, DEFAULT_CHUNK_SIZE, transliterate, encoding)
+    return result, output.getvalue()
+
+
+def _read_zip(src):
+    """Yield (name, size, info, reader or None) for every entry of a zip archive."""
+    with zipfile.ZipFile(src) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                yield info.filename, 0, info, None
+                continue
+            with archive.open(info) as member:
+                yield info.filename, info.file_size, info, member
+
+
+def _read_tar(src):
+    """Yield (name, size, info, reader or None) for every entry of a tar archive, in one pass."""
+    with tarfile.open(fileobj=src, mode="r|*") as archive:
+        for info in archive:
+            if info.isfile():
+                yield info.name, info.size, info, archive.extractfile(info)
+            else:
+                yield info.name, 0, info, None
+
+
+def _unreadable(suffix: str, error: Exception) -> ArchiveError:
+    """The error reported for a damaged archive, raised from error."""
+    return ArchiveError(f"Not a readable {suffix} archive: {error}")
+
+
+class _Checked:
+    """A member reader raising ArchiveError for what reading a damaged archive raises."""
+
+    def __init__(self, raw, suffix: str):
+        self._raw = raw
+        self._suffix = suffix
+
+    def read(self, size: int = -1) -> bytes:
+        try:
+            return self._raw.read(size)
+        except READ_ERRORS as e:
+            raise _unreadable(self._suffix, e) from e
+
+
+def _entries(src, suffix: str):
+    """
+    Yield (name, size, info, reader or None) for every entry of an archive.
+
+    Only reading the archive is guarded: errors from it become ArchiveError,
+    while errors from whatever the caller does with the entries (such as
+    writing the cleaned archive) pass through as they are.
+    """
+    entries = _read_zip(src) if suffix == ".zip" else _read_tar(src)
+    try:
+        while True:
+            try:
+                name, size, info, member = next(entries)
+            except StopIteration:
+                return
+            except READ_ERRORS as e:
+                raise _unreadable(suffix, e) from e
+            yield name, size, info, None if member is None else _Checked(member, suffix)
+    finally:
+        entries.close()
+
+
+class _ZipWriter:
+    """Writes members into a zip archive, keeping each entry's metadata and compression."""
+
+    def __init__(self, dst):
+        self._archive = zipfile.ZipFile(dst, "w")
+
+    def add(self, info, fill=None) -> int:
+        """Add an entry like info, with contents written by fill(writer); return their size."""
+        entry = zipfile.ZipInfo(info.filename, info.date_time)
+        entry.compress_type = info.compress_type
+        entry.external_attr = info.external_attr
+        entry.create_system = info.create_system
+        entry.comment = info.comment
+        if fill is None:
+            self._archive.writestr(entry, b"")
+            return 0
+        # Transliteration can grow text, so leave room past the original size
+        force_zip64 = info.file_size * 2 >= zipfile.ZIP64_LIMIT
+        with self._archive.open(entry, "w", force_zip64=force_zip64) as dst:
+            fill(dst)
+        return entry.file_size
+
+    def close(self) -> None:
+        self._archive.close()
+
+
+class _TarWriter:
+    """Writes members into a tar archive, keeping each entry's metadata."""
+
+    def __init__(self, dst, mode: str):
+        self._archive = tarfile.open(fileobj=dst, mode=mode)
+
+    def add(self, info, fill=None) -> int:
+        """Add an entry like info, with contents written by fill(writer); return their size."""
+        if fill is None:
+            self._archive.addfile(info)
+            return 0
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES) as contents:
+            fill(contents)
+            entry = copy.copy(info)
+            entry.size = contents.tell()
+            # A size recorded in the pax header would override the new one
+            entry.pax_headers = {key: value for key, value in info.pax_headers.items()
+                                 if key != "size"}
+            contents.seek(0)
+            self._archive.addfile(entry, contents)
+        return entry.size
+
+    def close(self) -> None:
+        self._archive.close()
+
+
+def clean_archive(src, dst, suffix: str, jobs: int = 1, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                  transliterate: bool = False, encoding: str = None,
+                  max_bytes: int = None) -> list:
+    """
+    Clean the text members of an archive into a new archive of the same format.
+
+    Entries keep their order, names and metadata; only the contents of
+    text members change.
+
+    Args:
+        src: Readable binary file object of the input archive (seekable for zip)
+        dst: Writable binary file object for the cleaned archive
+        suffix (str): Archive format, as from archive_suffix()
+        jobs (int): Worker processes cleaning small members in parallel
+        chunk_size (int): Bytes read per chunk while streaming a member
+        transliterate (bool): Fold all remaining non-ASCII text to ASCII
+        encoding (str): Encoding of text members (default: detected per member)
+        max_bytes (int): Limit on the members' total uncompressed size
+
+    Returns:
+        list: One dict per file member, in archive order: name, status
+        (CLEANED, ALREADY_CLEAN or BINARY), encoding, size, cleaned_size and
+        changes, as from clean_member()
+
+    Raises:
+        ArchiveError: If the input is not a readable archive of that format
+        ArchiveTooLarge: If the members add up to more than max_bytes
+    """
+    if suffix == ".zip":
+        entries, writer = _entries(src, suffix), _ZipWriter(dst)
+    else:
+        entries, writer = _entries(src, suffix), _TarWriter(dst, TAR_WRITE_MODES[suffix])
+
+    results = []
+    # Members on the worker pool: (name, size, info, future), written in order
+    pending = collections.deque()
+    executor = None
+
+    def write_pending(keep: int = 0) -> None:
+        while len(pending) > keep:
+            name, size, info, future = pending.popleft()
+            result, output = future.result()
+            cleaned_size = writer.add(info, lambda out: out.write(output))
+            results.append({"name": name, **result, "size": size, "cleaned_size": cleaned_size})
+
+    total = 0
+    try:
+        for name, size, info, member in entries:
+            total += size
+            if max_bytes is not None and total > max_bytes:
+                raise ArchiveTooLarge(f"Archive contents exceed {max_bytes} bytes")
+            if member is None:
+                write_pending()
+                writer.add(info)
+            elif jobs > 1 and size <= PARALLEL_MEMBER_BYTES:
+                if executor is None:
+                    # Imported here: it is slow to import and most runs never need it
+                    from concurrent.futures import ProcessPoolExecutor
+                    executor = ProcessPoolExecutor(max_workers=jobs)
+                pending.append((name, size, info, executor.submit(
+                    clean_member_bytes, member.read(), transliterate, encoding)))
+                write_pending(keep=jobs * 2)
+            else:
+                write_pending()
+                result = {}
+                cleaned_size = writer.add(info, lambda out: result.update(clean_member(
+                    member, out, chunk_size, transliterate, encoding)))
+                results.append({"name": name, **result, "size": size,
+                                "cleaned_size": cleaned_size})
+        write_pending()
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        # Also after an error, or garbage collection would write to dst later
+        writer.close()
+    return results
+
+
+def read_text_members(src, suffix: str, encoding: str = None):
+    """
+    Yield the contents of the text members of an archive, for checking.
+
+    Args:
+        src: Readable binary file object of the archive (seekable for zip)
+        suffix (str): Archive format, as from archive_suffix()
+        encoding (str): Encoding of text members (default: detected per member)
+
+    Yields:
+        tuple: (member name, contents as bytes, encoding)
+
+    Raises:
+        ArchiveError: If the input is not a readable archive of that format
+    """
+    for name, _, _, member in _entries(src, suffix):
+        if member is None:
+            continue
+        data = member.read()
+        detected = member_encoding(data[:ENCODING_SAMPLE_SIZE], encoding)
+        if detected is not None:
+            yield name, data, detected
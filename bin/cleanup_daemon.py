@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+
+"""
+Resident daemon and thin client for cleanup-text.py
+
+Starting Python and importing the cleaner costs far more than cleaning a
+typical file, which dominates when scripts, the Windows context menu or the
+macOS Shortcut run cleanup-text.py once per file. `cleanup-text.py --daemon`
+keeps one process with everything imported listening on a per-user Unix
+socket (a named pipe on Windows). Later invocations find it, forward their
+arguments, working directory and standard input, and print what the daemon
+sends back; when no daemon is running, or the daemon sends the invocation
+back (runs that read standard input), they simply clean in-process. On Unix
+every invocation runs in a child forked from the daemon, so several run at
+once.
+
+This module is imported on every cleanup-text.py run, before anything else,
+so it only imports modules the interpreter has already loaded up front.
+
+Messages are frames of a one-byte kind and a payload:
+
+    client -> daemon   A  working directory and arguments, NUL-separated
+                       I  a block of standard input (empty at end of input)
+    daemon -> client   O  bytes for standard output
+                       E  bytes for standard error
+                       R  request for up to <payload> bytes of standard input
+                       X  exit status, after which the connection closes
+                       L  run the invocation in the client instead; the
+                          connection closes
+"""
+
+import io
+import os
+import sys
+
+# Frame kinds, see the module docstring
+ARGS, INPUT, STDOUT, STDERR, READ, EXIT, LOCAL = b"A", b"I", b"O", b"E", b"R", b"X", b"L"
+
+
+def _runtime_dir() -> str:
+    """Return the per-user directory holding the socket (or the pipe's key)."""
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        return os.path.join(base, "UnicodeFix")
+    base = os.environ.get("XDG_RUNTIME_DIR")
+    if base:
+        return os.path.join(base, "unicodefix")
+    return os.path.join("/tmp", f"unicodefix-{os.getuid()}")
+
+
+def daemon_address() -> str:
+    """
+    Return the daemon's address: a Unix socket path, or a named pipe on Windows.
+
+    UNICODEFIX_DAEMON_ADDRESS overrides the default.
+    """
+    address = os.environ.get("UNICODEFIX_DAEMON_ADDRESS")
+    if address:
+        return address
+    if os.name == "nt":
+        user = os.environ.get("USERNAME", "user")
+        return rf"\\.\pipe\unicodefix-{user}"
+    return os.path.join(_runtime_dir(), "daemon.sock")
+
+
+def _key_path() -> str:
+    """Return the file holding the named pipe's authentication key (Windows)."""
+    return os.path.join(_runtime_dir(), "daemon.key")
+
+
+class SocketChannel:
+    """Frames over a connected Unix socket: kind, 4-byte length, payload."""
+
+    def __init__(self, sock):
+        import struct
+        self._sock = sock
+        self._header = struct.Struct("!cI")
+
+    def send(self, kind: bytes, payload: bytes = b"") -> None:
+        self._sock.sendall(self._header.pack(kind, len(payload)) + payload)
+
+    def _recv_exactly(self, size: int) -> bytes:
+        data = bytearray()
+        while len(data) < size:
+            block = self._sock.recv(min(size - len(data), 1024 * 1024))
+            if not block:
+                raise EOFError("daemon connection closed")
+            data += block
+        return bytes(data)
+
+    def recv(self) -> tuple:
+        kind, size = self._header.unpack(self._recv_exactly(self._header.size))
+        return kind, self._recv_exactly(size)
+
+    def close(self) -> None:
+        self._sock.close()
+
+
+class PipeChannel:
+    """Frames over a multiprocessing.connection named pipe (Windows)."""
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def send(self, kind: bytes, payload: bytes = b"") -> None:
+        self._connection.send_bytes(kind + payload)
+
+    def recv(self) -> tuple:
+        data = self._connection.recv_bytes()
+        return data[:1], data[1:]
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+def _connect():
+    """Connect to a running daemon, or return None if there is none."""
+    address = daemon_address()
+    if os.name == "nt":
+        try:
+            with open(_key_path(), "rb") as f:
+                authkey = f.read()
+            from multiprocessing.connection import Client
+            return PipeChannel(Client(address, "AF_PIPE", authkey=authkey))
+        except (OSError, EOFError):
+            return None
+
+    if not os.path.exists(address):
+        return None
+    import socket
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(address)
+    except OSError:  # stale socket left by a daemon that died
+        sock.close()
+        return None
+    return SocketChannel(sock)
+
+
+def forward(argv: list):
+    """
+    Run a cleanup-text.py invocation on the daemon, if one is running.
+
+    Args:
+        argv (list): Command-line arguments, without the program name
+
+    Returns:
+        int: The invocation's exit status, or None when no daemon answered
+        or it sent the invocation back, and the caller should clean in-process
+    """
+    channel = _connect()
+    if channel is None:
+        return None
+
+    stdin, stdout, stderr = sys.stdin.buffer, sys.stdout.buffer, sys.stderr.buffer
+    try:
+        request = "\0".join([os.getcwd()] + list(argv))
+        channel.send(ARGS, request.encode("utf-8", "surrogateescape"))
+        while True:
+            kind, payload = channel.recv()
+            if kind == STDOUT:
+                stdout.write(payload)
+                stdout.flush()
+            elif kind == STDERR:
+                stderr.write(payload)
+                stderr.flush()
+            elif kind == READ:
+                # read1: pass on what is available rather than wait for a full block
+                channel.send(INPUT, stdin.read1(int(payload)))
+            elif kind == EXIT:
+                return int(payload)
+            elif kind == LOCAL:
+                return None
+    except (OSError, EOFError, ValueError) as e:
+        stderr.write(f"[✗] Lost connection to the cleanup daemon: {e}\n".encode("utf-8"))
+        return 1
+    finally:
+        channel.close()
+
+
+class _RemoteInput(io.RawIOBase):
+    """Standard input served by the client, one READ frame per read."""
+
+    def __init__(self, channel):
+        super().__init__()
+        self._channel = channel
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        self._channel.send(READ, str(len(buffer)).encode("ascii"))
+        kind, payload = self._channel.recv()
+        if kind != INPUT:
+            raise EOFError("unexpected message from client")
+        buffer[:len(payload)] = payload
+        return len(payload)
+
+
+class _RemoteOutput(io.RawIOBase):
+    """An output stream of the client, written as frames of one kind."""
+
+    def __init__(self, channel, kind: bytes):
+        super().__init__()
+        self._channel = channel
+        self._kind = kind
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        if data:
+            self._channel.send(self._kind, bytes(data))
+        return len(data)
+
+
+def _run_request(channel, main, accepts=None):
+    """
+    Run one forwarded invocation of main() with the client's cwd and stdio.
+
+    Returns its exit status, or None if accepts(argv) turned it down, after
+    telling the client to run it itself.
+    """
+    import traceback
+
+    kind, payload = channel.recv()
+    if kind != ARGS:
+        return 2
+    cwd, *argv = payload.decode("utf-8", "surrogateescape").split("\0")
+    if accepts is not None and not accepts(argv):
+        channel.send(LOCAL)
+        return None
+
+    saved = (os.getcwd(), sys.argv, sys.stdin, sys.stdout, sys.stderr)
+    sys.stdin = io.TextIOWrapper(io.BufferedReader(_RemoteInput(channel)), encoding="utf-8")
+    sys.stdout = io.TextIOWrapper(io.BufferedWriter(_RemoteOutput(channel, STDOUT)),
+                                  encoding="utf-8", line_buffering=True)
+    sys.stderr = io.TextIOWrapper(io.BufferedWriter(_RemoteOutput(channel, STDERR)),
+                                  encoding="utf-8", line_buffering=True)
+    sys.argv = saved[1][:1] + argv
+    status = 0
+    try:
+        os.chdir(cwd)
+        main()
+    except SystemExit as e:
+        if isinstance(e.code, str):
+            print(e.code, file=sys.stderr)
+            status = 1
+        else:
+            status = e.code or 0
+    except Exception:
+        traceback.print_exc()
+        status = 1
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os.chdir(saved[0])
+            sys.argv, sys.stdin, sys.stdout, sys.stderr = saved[1:]
+    return status
+
+
+def _listen_unix(address: str):
+    """Bind the daemon's Unix socket, replacing a stale one."""
+    import socket
+
+    runtime_dir = os.path.dirname(address)
+    os.makedirs(runtime_dir, mode=0o700, exist_ok=True)
+    info = os.stat(runtime_dir)
+    if address == os.path.join(_runtime_dir(), "daemon.sock") and (
+            info.st_uid != os.getuid() or info.st_mode & 0o077):
+        raise OSError(f"{runtime_dir} must be owned by you and private (mode 700)")
+    if os.path.exists(address):
+        channel = _connect()
+        if channel is not None:
+            channel.close()
+            raise OSError(f"a cleanup daemon is already listening on {address}")
+        os.remove(address)
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    umask = os.umask(0o177)  # socket file readable and writable by its owner only
+    try:
+        sock.bind(address)
+    finally:
+        os.umask(umask)
+    sock.listen(16)
+    return sock
+
+
+def _serve_connection(channel, main, accepts) -> None:
+    """Run the invocation sent over channel, then close it."""
+    try:
+        status = _run_request(channel, main, accepts)
+        if status is not None:
+            channel.send(EXIT, str(status).encode("ascii"))
+    except (OSError, EOFError):
+        pass  # the client went away mid-request
+    finally:
+        channel.close()
+
+
+def _serve_forked(listener, main, accepts, children: set) -> None:
+    """
+    Serve each connection in a child forked for it, until SIGTERM or Ctrl+C.
+
+    A stop signal only sets a flag and wakes the loop. The children still
+    running when it returns are left in children, for the caller to wait for.
+    """
+    import select
+    import signal
+
+    wake_r, wake_w = os.pipe()
+    os.set_blocking(wake_r, False)
+    os.set_blocking(wake_w, False)
+    stopping = False
+
+    def wake(signum, frame) -> None:
+        try:
+            os.write(wake_w, b"\0")
+        except OSError:  # the pipe is full, so the loop is awake anyway
+            pass
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        wake(signum, frame)
+
+    def reap() -> None:
+        for pid in list(children):
+            try:
+                if os.waitpid(pid, os.WNOHANG)[0]:
+                    children.discard(pid)
+            except ChildProcessError:
+                children.discard(pid)
+
+    handlers = {signum: signal.signal(signum, handler) for signum, handler in (
+        (signal.SIGTERM, stop), (signal.SIGINT, stop), (signal.SIGCHLD, wake))}
+    try:
+        while not stopping:
+            ready = select.select([listener, wake_r], [], [])[0]
+            if wake_r in ready:
+                os.read(wake_r, 4096)
+                reap()
+            if stopping or listener not in ready:
+                continue
+            try:
+                sock = listener.accept()[0]
+            except OSError:
+                continue
+            pid = os.fork()
+            if pid == 0:
+                status = 0
+                try:
+                    for signum, handler in handlers.items():
+                        signal.signal(signum, handler)
+                    listener.close()
+                    os.close(wake_r)
+                    os.close(wake_w)
+                    _serve_connection(SocketChannel(sock), main, accepts)
+                except BaseException:
+                    status = 1
+                finally:
+                    sys.stdout.flush()
+                    sys.stderr.flush()
+                    # Skip the daemon's atexit handlers and finalizers inherited with fork()
+                    os._exit(status)
+            sock.close()
+            children.add(pid)
+    finally:
+        for signum, handler in handlers.items():
+            signal.signal(signum, handler)
+        os.close(wake_r)
+        os.close(wake_w)
+
+
+def serve(main, accepts=None) -> None:
+    """
+    Serve forwarded cleanup-text.py invocations until interrupted.
+
+    On Unix each invocation runs in a child process forked for it, so that
+    several run at once and each can change to its client's working
+    directory; on Windows they run one at a time. The socket (or the named
+    pipe's key file) is removed again on Ctrl+C or SIGTERM, which lets the
+    invocations in progress finish; a second Ctrl+C interrupts them.
+
+    Args:
+        main: The CLI entry point, called once per invocation with sys.argv,
+            the working directory and stdio set up for the client
+        accepts: Called with an invocation's arguments; when it returns
+            False the client runs that invocation itself (default: serve all)
+    """
+    address = daemon_address()
+    if os.name == "nt":
+        from multiprocessing.connection import Listener
+        authkey = os.urandom(32)
+        os.makedirs(_runtime_dir(), exist_ok=True)
+        with open(_key_path(), "wb") as f:
+            f.write(authkey)
+        listener = Listener(address, "AF_PIPE", authkey=authkey)
+        cleanup_paths = [_key_path()]
+    else:
+        listener = _listen_unix(address)
+        cleanup_paths = [address]
+
+    print(f"[i] Cleanup daemon listening on {address} (Ctrl+C to stop)", flush=True)
+    children = set()
+    try:
+        if os.name != "nt":
+            _serve_forked(listener, main, accepts, children)
+        else:
+            while True:
+                try:
+                    channel = PipeChannel(listener.accept())
+                except Exception:  # failed handshake or a client that gave up
+                    continue
+                _serve_connection(channel, main, accepts)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.close()
+        for path in cleanup_paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    try:
+        for pid in children:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+    except KeyboardInterrupt:
+        pass
+    print("[i] Cleanup daemon stopped")
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+
+"""
+Git integration for cleanup-text.py
+
+`--staged` and `--git-changed [REF]` limit cleanup-text.py to the text files
+git reports as changed, so a pre-commit hook or CI job only looks at what a
+commit touches instead of the whole tree. Binary files are left out using
+git's own detection.
+
+For --check, the contents of files whose working tree copy matches the
+index are read from git's object store through one long-lived
+`git cat-file --batch` process rather than by opening each file; that is
+also what makes --staged check exactly what is about to be committed.
+"""
+
+import os
+import subprocess
+import threading
+
+# Bytes git inspects for a NUL to decide that a file is binary
+BINARY_SNIFF_BYTES = 8000
+
+
+class GitError(Exception):
+    """Raised when a git command fails, e.g. outside of a repository."""
+
+
+def _git(*args) -> bytes:
+    """Run a git command and return its standard output."""
+    try:
+        result = subprocess.run(["git", *args], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError as e:
+        raise GitError(f"Could not run git: {e}")
+    if result.returncode != 0:
+        message = result.stderr.decode("utf-8", "replace").strip().splitlines()
+        raise GitError(message[0] if message else f"git {args[0]} failed")
+    return result.stdout
+
+
+def _split_paths(output: bytes) -> list:
+    """Split NUL-terminated path output into str paths."""
+    return [os.fsdecode(path) for path in output.split(b"\0") if path]
+
+
+def _text_paths(numstat: bytes) -> list:
+    """Paths from `git diff --numstat -z --no-renames`, leaving out binary files ("-\\t-")."""
+    paths = []
+    for record in numstat.split(b"\0"):
+        if not record:
+            continue
+        added, _, rest = record.partition(b"\t")
+        _, _, path = rest.partition(b"\t")
+        if added != b"-":
+            paths.append(os.fsdecode(path))
+    return paths
+
+
+def _looks_binary(path: str) -> bool:
+    """Apply git's binary heuristic (a NUL near the start) to a file on disk."""
+    try:
+        with open(path, "rb") as f:
+            return b"\0" in f.read(BINARY_SNIFF_BYTES)
+    except OSError:
+        return False  # reported when the file is cleaned or checked
+
+
+def changed_files(ref: str = None, staged: bool = False) -> tuple:
+    """
+    List the text files git reports as changed, relative to the current directory.
+
+    Args:
+        ref (str): With staged False, list files that differ between this
+            commit (default HEAD) and the working tree, plus untracked files
+        staged (bool): List files whose staged contents differ from HEAD
+
+    Returns:
+        tuple: (paths, index_paths), where index_paths is the set of paths
+        whose contents in the index equal the file to check
+
+    Raises:
+        GitError: If git fails, e.g. outside of a repository
+    """
+    # Outside a work tree `git diff` would silently act like `diff --no-index`
+    _git("rev-parse", "--is-inside-work-tree")
+
+    diff = ("diff", "--numstat", "-z", "--no-renames", "--diff-filter=d", "--relative",
+            "--no-ext-diff", "--no-textconv")
+    if staged:
+        paths = _text_paths(_git(*diff, "--cached"))
+        index_paths = set(paths)
+    else:
+        paths = _text_paths(_git(*diff, ref or "HEAD", "--"))
+        # Files with unstaged edits have to be read from the working tree
+        dirty = set(_split_paths(_git("diff", "--name-only", "-z", "--no-renames",
+                                      "--relative", "--no-ext-diff")))
+        index_paths = {path for path in paths if path not in dirty}
+        untracked = _split_paths(_git("ls-files", "-z", "--others", "--exclude-standard"))
+        paths += [path for path in untracked if not _looks_binary(path)]
+
+    # `git cat-file --batch` reads one object name per line
+    index_paths = {path for path in index_paths if "\n" not in path}
+    return paths, index_paths
+
+
+class BlobReader:
+    """
+    Reads file contents out of git through one `git cat-file --batch` process.
+
+    Object names are written to the process by a background thread while the
+    contents are read back, so requests stream without a round trip each.
+
+    Example:
+        with BlobReader() as reader:
+            for path, data in zip(paths, reader.read(":./" + path for path in paths)):
+                ...
+    """
+
+    def __init__(self):
+        try:
+            self._process = subprocess.Popen(["git", "cat-file", "--batch"],
+                                             stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        except OSError as e:
+            raise GitError(f"Could not run git: {e}")
+
+    def _write_names(self, names) -> None:
+        try:
+            for name in names:
+                self._process.stdin.write(os.fsencode(name) + b"\n")
+            self._process.stdin.flush()
+        except (OSError, ValueError):
+            pass  # the reader reports the missing output
+
+    def read(self, names):
+        """
+        Yield the contents of each named object in order, or None if it does not exist.
+
+        Args:
+            names: Object names such as "HEAD:path" or ":./path" (the index)
+        """
+        names = list(names)
+        writer = threading.Thread(target=self._write_names, args=(names,), daemon=True)
+        writer.start()
+        stdout = self._process.stdout
+        complete = False
+        try:
+            for _ in names:
+                header = stdout.readline()
+                if not header:
+                    raise GitError("git cat-file exited unexpectedly")
+                # "<oid> <type> <size>", or "<name> missing" (names may contain spaces)
+                fields = header.rsplit(b" ", 2)
+                if len(fields) != 3 or not fields[2].strip().isdigit():
+                    yield None
+                    continue
+                data = stdout.read(int(fields[2]))
+                stdout.read(1)  # the newline after the contents
+                yield data
+            complete = True
+        finally:
+            if not complete:
+                self._process.kill()  # or the writer may block on a pipe nobody drains
+            writer.join()
+
+    def close(self) -> None:
+        """Stop the git process."""
+        # Closing our end of its output first makes a git still writing
+        # unread contents exit, which also unblocks a writer thread
+        self._process.stdout.close()
+        try:
+            self._process.stdin.close()
+        except OSError:
+            pass
+        self._process.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -3,26 +3,235 @@
 """
 Unicode Text Cleaner Module
 
-This module provides the core Unicode cleaning functionality for the UnicodeFix web interface.
-It's extracted from the command-line cleanup-text.py script for easier importing.
+This module provides the core Unicode cleaning functionality for the UnicodeFix web interface
+and the cleanup-text.py command-line script.
+
+The cleaning tables are compiled once at import time. Every pass in clean_text is a
+C-level scan that only allocates a new string when it actually has something to change,
+so clean text and pure ASCII text go through with almost no copying.
 """
 
+import bisect
+import codecs
+import heapq
+import itertools
 import os
 import re
+import unicodedata
+from array import array
+from collections import Counter
+from typing import Optional
+
+
+# Typographic characters and their ASCII equivalents
+CHAR_REPLACEMENTS = {
+    '\u2018': "'", '\u2019': "'",  # Smart single quotes
+    '\u201C': '"', '\u201D': '"',  # Smart double quotes
+    '\u2013': '-', '\u2014': '-',  # En and em dashes
+    '\u2026': '...',  # Ellipsis
+    '\u00A0': ' ',    # Non-breaking space
+}
+
+# Zero-width and other invisible characters that are removed outright
+INVISIBLE_CHARS = '\u200B\u200C\u200D\uFEFF\u00AD'
+
+# Platform-specific line ending written by clean_text
+NEWLINE = '\r\n' if os.name == 'nt' else '\n'
+
+# Default number of characters read per chunk when streaming
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+# Number of evenly spaced windows analyzed by get_unicode_info(sample_size=...)
+SAMPLE_WINDOWS = 16
+
+# Bytes at the start of the input that detect_encoding() looks at
+ENCODING_SAMPLE_SIZE = 64 * 1024
+
+# Byte order marks detect_encoding() recognizes, UTF-32 first since the
+# UTF-32-LE mark starts with the UTF-16-LE one. A UTF-8 BOM is left to the
+# cleaner, which removes it as an invisible character
+_BOMS = ((codecs.BOM_UTF32_LE, 'utf-32'), (codecs.BOM_UTF32_BE, 'utf-32'),
+         (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16'))
+
+# Runs of ASCII characters, dropped to isolate the non-ASCII ones
+_ASCII_RUN_RE = re.compile('[\x00-\x7f]+')
+_NON_ASCII_RE = re.compile('[^\x00-\x7f]')
+_NON_ASCII_RUN_RE = re.compile('[^\x00-\x7f]+')
+
+# Distinct characters get_unicode_info finds by search before switching to a Counter
+_MAX_SEARCHED_CHARS = 32
+
+# Rules reported by clean_text_with_stats, in report order
+CHANGE_RULES = ('quotes', 'dashes', 'ellipsis', 'nbsp', 'invisible', 'transliterated',
+                'line_endings', 'trailing_whitespace')
+
+# Rule each replaced character is counted under (invisible characters: 'invisible')
+_CHAR_RULES = {
+    '\u2018': 'quotes', '\u2019': 'quotes', '\u201C': 'quotes', '\u201D': 'quotes',
+    '\u2013': 'dashes', '\u2014': 'dashes',
+    '\u2026': 'ellipsis',
+    '\u00A0': 'nbsp',
+}
+
+# Every (original, replacement, rule) applied to non-ASCII text, compiled once
+_CHAR_TABLE = (tuple((orig, repl, _CHAR_RULES[orig]) for orig, repl in CHAR_REPLACEMENTS.items())
+               + tuple((char, '', 'invisible') for char in INVISIBLE_CHARS))
+
+
+def _strip_trailing_whitespace(text, newline='\n', blanks=' \t'):
+    """Remove spaces and tabs before every '\\n' (but not at end of text)."""
+    lines = text.split(newline)
+    last = lines.pop()
+    lines = [line.rstrip(blanks) for line in lines]
+    lines.append(last)
+    return newline.join(lines)
+
 
+# What clean_text would change, as patterns over UTF-8 bytes for find_issues.
+# They are separate scans because one alternation that can start at a blank
+# or a line ending is several times slower over prose than each on its own.
+_ISSUE_RULES = {orig.encode('utf-8'): rule for orig, _, rule in _CHAR_TABLE}
+_CHAR_ISSUE = b'(?P<char>' + b'|'.join(re.escape(seq) for seq in _ISSUE_RULES) + b')'
+_CHAR_ISSUE_RE = re.compile(_CHAR_ISSUE)
+_TRANSLITERATE_ISSUE_RE = re.compile(_CHAR_ISSUE + rb'|(?P<transliterated>[\x80-\xff][\x80-\xbf]*)')
+_LINE_ENDING_ISSUE_RE = re.compile(rb'\r\n?' if NEWLINE == '\n' else rb'\r(?!\n)|(?<!\r)\n')
+# Matches the line ending, so the scan stops at line endings rather than at every blank
+_TRAILING_ISSUE_RE = re.compile(rb'[\r\n](?<=[ \t][\r\n])')
+_TRAILING_PAIRS = (b' \n', b'\t\n', b' \r', b'\t\r')
 
-def clean_text(text: str) -> str:
+# Characters _CHAR_TABLE changes, for clean_text_with_edits. The patterns
+# capture single characters, so re.split() separates them from the text between
+_CHAR_EDITS = {orig: (repl, rule) for orig, repl, rule in _CHAR_TABLE}
+_CHAR_SPLIT_RE = re.compile('([' + ''.join(_CHAR_EDITS) + '])')
+_NON_ASCII_SPLIT_RE = re.compile('([^\x00-\x7f])')
+# What _normalize_lines changes: line endings other than NEWLINE, and blanks
+# before a line ending (matched at the line ending, as for find_issues)
+_LINE_ENDING_EDIT_RE = re.compile(r'\r\n?' if NEWLINE == '\n' else r'\r(?!\n)|(?<!\r)\n')
+_TRAILING_EDIT_RE = re.compile(r'[\r\n](?<=[ \t][\r\n])')
+
+
+def _replace_chars(text: str, stats: Optional[dict] = None) -> str:
+    """Apply character replacements and remove invisible characters."""
+    if text.isascii():
+        return text
+    if stats is None:
+        for orig, repl, _ in _CHAR_TABLE:
+            text = text.replace(orig, repl)
+        return text
+
+    # Counting doubles as the presence check, so replace() only runs on hits
+    for orig, repl, rule in _CHAR_TABLE:
+        count = text.count(orig)
+        if count:
+            stats[rule] += count
+            text = text.replace(orig, repl)
+    return text
+
+
+_transliteration_table = None
+
+
+def _load_transliteration_table() -> list:
+    """
+    Build the codepoint to ASCII table for the Basic Multilingual Plane on first use.
+
+    Entry i is unidecode's ASCII spelling of chr(i), so str.translate can fold
+    a run of characters with one C-level lookup each instead of a call into
+    unidecode per character. Building it takes a fraction of a second, which
+    only transliterating runs pay (once per process, or once per daemon).
+
+    Raises:
+        ImportError: If the Unidecode package is not installed
+    """
+    global _transliteration_table
+    if _transliteration_table is None:
+        try:
+            from unidecode import unidecode
+        except ImportError:
+            raise ImportError("Transliteration requires the Unidecode package "
+                              "(pip install Unidecode)") from None
+        table = [chr(codepoint) for codepoint in range(0x80)]
+        for codepoint in range(0x80, 0x10000):
+            if 0xD800 <= codepoint < 0xE000:
+                table.append('')  # lone surrogates, which unidecode drops too
+            else:
+                table.append(unidecode(chr(codepoint)))
+        _transliteration_table = table
+    return _transliteration_table
+
+
+def _transliterate(text: str, stats: Optional[dict] = None) -> str:
+    """ASCII-fold every non-ASCII character, leaving the ASCII runs in between as they are."""
+    if text.isascii():
+        return text
+    table = _load_transliteration_table()
+    folded = 0
+
+    def fold(match):
+        nonlocal folded
+        run = match.group()
+        folded += len(run)
+        # Characters beyond the table (outside the BMP) are left by translate()
+        run = run.translate(table)
+        if not run.isascii():
+            from unidecode import unidecode
+            run = unidecode(run)
+        return run
+
+    text = _NON_ASCII_RUN_RE.sub(fold, text)
+    if stats is not None:
+        stats['transliterated'] += folded
+    return text
+
+
+def _normalize_lines(text: str, stats: Optional[dict] = None) -> str:
+    """Normalize line endings and remove trailing whitespace on every line."""
+    if stats is not None:
+        carriage_returns = text.count('\r')
+        if NEWLINE == '\n':
+            stats['line_endings'] += carriage_returns
+        else:
+            crlf = text.count('\r\n')
+            stats['line_endings'] += carriage_returns + text.count('\n') - 2 * crlf
+
+    # Normalize line endings (convert all to \n, then to platform-specific)
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+
+    # Remove trailing whitespace on every line
+    if ' \n' in text or '\t\n' in text:
+        length = len(text)
+        text = _strip_trailing_whitespace(text)
+        if stats is not None:
+            stats['trailing_whitespace'] += length - len(text)
+
+    # Convert back to platform-specific line endings if needed
+    if NEWLINE != '\n':
+        text = text.replace('\n', NEWLINE)
+
+    return text
+
+
+def clean_text(text: str, transliterate: bool = False) -> str:
     """
     Normalize problematic or invisible Unicode characters to safe ASCII equivalents.
 
     This function performs multiple operations:
     1. Converts typographic characters (quotes, dashes) to their ASCII equivalents
     2. Removes zero-width and invisible Unicode characters
-    3. Normalizes line endings for cross-platform compatibility
-    4. Removes trailing whitespace
+    3. With transliterate, ASCII-folds every other non-ASCII character
+       (accented letters, CJK, symbols) using Unidecode's spellings
+    4. Normalizes line endings for cross-platform compatibility
+    5. Removes trailing whitespace
+
+    Steps that cannot apply are skipped: pure ASCII text never goes through
+    the character table, and the line-ending and trailing-whitespace passes
+    only run when a carriage return or whitespace before a newline is present.
 
     Args:
         text (str): The input text containing Unicode characters
+        transliterate (bool): Fold all remaining non-ASCII text to ASCII
+            (requires the Unidecode package)
 
     Returns:
         str: The cleaned text with normalized ASCII characters
@@ -30,48 +239,784 @@ def clean_text(text: str) -> str:
     Example:
         >>> clean_text('"Hello" — World')
         '"Hello" - World'
+        >>> clean_text('Café — naïve', transliterate=True)
+        'Cafe - naive'
     """
     if not isinstance(text, str):
         raise TypeError("Input must be a string")
     
     if not text:
         return text
-    
-    replacements = {
-        '\u2018': "'", '\u2019': "'",  # Smart single quotes
-        '\u201C': '"', '\u201D': '"',  # Smart double quotes
-        '\u2013': '-', '\u2014': '-',  # En and em dashes
-        '\u2026': '...',  # Ellipsis
-        '\u00A0': ' ',    # Non-breaking space
-    }
-    
-    # Apply character replacements
-    for orig, repl in replacements.items():
-        text = text.replace(orig, repl)
 
-    # Remove zero-width characters and other invisible characters
-    text = re.sub(r'[\u200B\u200C\u200D\uFEFF\u00AD]', '', text)
+    text = _replace_chars(text)
+    if transliterate:
+        text = _transliterate(text)
+    return _normalize_lines(text)
 
-    # Normalize line endings (convert all to \n, then to platform-specific)
-    text = text.replace('\r\n', '\n').replace('\r', '\n')
-    
-    # Remove trailing whitespace on every line
-    text = re.sub(r'[ \t]+\n', '\n', text)
-    
-    # Convert back to platform-specific line endings if needed
-    if os.name == 'nt':  # Windows
-        text = text.replace('\n', '\r\n')
 
-    return text
+def clean_text_with_stats(text: str, transliterate: bool = False) -> tuple:
+    """
+    Clean text like clean_text() and report how often each rule fired.
+
+    The counts are collected by the cleaning pass itself, so they are exact
+    and cost no extra comparison of the original and cleaned text.
+
+    Args:
+        text (str): The input text containing Unicode characters
+        transliterate (bool): Fold all remaining non-ASCII text to ASCII,
+            as in clean_text()
 
+    Returns:
+        tuple: (cleaned text, {rule: count}) with a count for every rule in
+        CHANGE_RULES. 'trailing_whitespace' counts removed characters; the
+        other rules count replaced or removed characters and normalized line
+        endings.
 
-def get_unicode_info(text: str) -> dict:
+    Example:
+        >>> cleaned, stats = clean_text_with_stats('\u201CHi\u201D \u2014 there')
+        >>> cleaned, stats['quotes'], stats['dashes']
+        ('"Hi" - there', 2, 1)
+    """
+    if not isinstance(text, str):
+        raise TypeError("Input must be a string")
+
+    stats = dict.fromkeys(CHANGE_RULES, 0)
+    if text:
+        text = _replace_chars(text, stats)
+        if transliterate:
+            text = _transliterate(text, stats)
+        text = _normalize_lines(text, stats)
+    return text, stats
+
+
+class EditLog:
+    """
+    The edits cleaning made to a text, stored column by column.
+
+    Each edit replaces the original text at offset (in characters, counted
+    from the start of the input) with its replacement; together they turn
+    the input into the cleaned text, and none of them overlap. Line and
+    column count from 1, lines being separated by '\\n' as in find_issues().
+
+    to_dict() gives the compact JSON form used by reports: the distinct
+    (rule, original, replacement) kinds are listed once and referred to by
+    index with run-length encoding, and offsets and lines are stored as
+    differences from the previous edit, which keeps reports of inputs with
+    millions of edits small.
+
+    Example:
+        >>> _, _, edits = clean_text_with_edits('\\u201CHi\\u201D\\r\\n')
+        >>> list(edits)[:2]
+        [(0, 1, 1, 'quotes', '\\u201c', '"'), (3, 1, 4, 'quotes', '\\u201d', '"')]
+    """
+
+    def __init__(self):
+        self.offsets = array('q')
+        self.lines = array('q')
+        self.columns = array('q')
+        self.kinds = array('l')
+        self._kind_index = {}  # (rule, original, replacement) -> kind index
+
+    @property
+    def kind_table(self) -> list:
+        """The distinct (rule, original, replacement) kinds, by kind index."""
+        return list(self._kind_index)
+
+    def append(self, offset: int, line: int, column: int, rule: str, original: str,
+               replacement: str) -> None:
+        """Add the next edit; edits are added in offset order."""
+        self.extend(((offset, line, column, rule, original, replacement),))
+
+    def extend(self, edits) -> None:
+        """Add (offset, line, column, rule, original, replacement) edits, in offset order."""
+        columns = tuple(zip(*edits))
+        if columns:
+            self._extend_columns(*columns)
+
+    def _extend_columns(self, offsets, lines, columns, rules, originals, replacements) -> None:
+        """Add edits given column by column."""
+        kind_index = self._kind_index
+        self.offsets.extend(offsets)
+        self.lines.extend(lines)
+        self.columns.extend(columns)
+        self.kinds.extend([kind_index.setdefault(kind, len(kind_index))
+                           for kind in zip(rules, originals, replacements)])
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __iter__(self):
+        """Yield (offset, line, column, rule, original, replacement) for each edit."""
+        table = self.kind_table
+        for offset, line, column, kind in zip(self.offsets, self.lines, self.columns,
+                                              self.kinds):
+            yield (offset, line, column) + table[kind]
+
+    def to_dict(self) -> dict:
+        """Return the compact, JSON-serializable form of the edits."""
+        runs = []
+        for kind, group in itertools.groupby(self.kinds):
+            runs += (kind, sum(1 for _ in group))
+        return {
+            'count': len(self),
+            'kinds': [list(kind) for kind in self.kind_table],
+            'kind': runs,
+            'offset': _deltas(self.offsets),
+            'line': _deltas(self.lines),
+            'column': list(self.columns),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'EditLog':
+        """Rebuild an EditLog from the to_dict() form."""
+        edits = cls()
+        kinds = [tuple(kind) for kind in data['kinds']]
+        runs = data['kind']
+        indexes = itertools.chain.from_iterable(
+            itertools.repeat(runs[i], runs[i + 1]) for i in range(0, len(runs), 2))
+        edits.extend((offset, line, column) + kinds[kind]
+                     for offset, line, column, kind in zip(itertools.accumulate(data['offset']),
+                                                           itertools.accumulate(data['line']),
+                                                           data['column'], indexes))
+        return edits
+
+
+def _deltas(values) -> list:
+    """Differences between consecutive values, the first from 0."""
+    return [value - previous for previous, value in zip(itertools.chain((0,), values), values)]
+
+
+def _fold_char(char: str) -> str:
+    """Transliterate one non-ASCII character as _transliterate() does."""
+    codepoint = ord(char)
+    if codepoint < 0x10000:
+        return _load_transliteration_table()[codepoint]
+    from unidecode import unidecode
+    return unidecode(char)
+
+
+def clean_text_with_edits(text: str, transliterate: bool = False, edits: EditLog = None,
+                          offset: int = 0, line: int = 1) -> tuple:
+    """
+    Clean text like clean_text_with_stats() and record every edit made.
+
+    The output is identical to clean_text(). The edits are found by the
+    cleaning itself: character replacements are applied match by match and
+    line endings and trailing blanks are fixed in a second scan, whose
+    edits are mapped back onto the input. Where both touch the same spot
+    (a non-breaking space at the end of a line) the input character gets
+    one edit with the net result. This is slower than clean_text(), so
+    use it only when the edits are wanted.
+
+    Args:
+        text (str): The input text
+        transliterate (bool): Fold all remaining non-ASCII text to ASCII,
+            as in clean_text()
+        edits (EditLog): Log to add the edits to (default: a new one)
+        offset (int): Offset of text within a larger input, for the edits
+        line (int): Line number of text within a larger input; text must
+            then start at the beginning of a line
+
+    Returns:
+        tuple: (cleaned text, {rule: count} as from clean_text_with_stats(),
+        EditLog)
+    """
+    if not isinstance(text, str):
+        raise TypeError("Input must be a string")
+    if edits is None:
+        edits = EditLog()
+    stats = dict.fromkeys(CHANGE_RULES, 0)
+
+    # First pass: characters, each replaced on its own
+    if text.isascii() or not transliterate and not any(char in text for char in _CHAR_EDITS):
+        parts = [text]
+    else:
+        parts = (_NON_ASCII_SPLIT_RE if transliterate else _CHAR_SPLIT_RE).split(text)
+    chars = parts[1::2]
+    found = [_CHAR_EDITS.get(char) or (_fold_char(char), 'transliterated') for char in chars]
+    replacements = [replacement for replacement, _ in found]
+    rules = [rule for _, rule in found]
+    for rule, count in Counter(rules).items():
+        stats[rule] += count
+    # Where each character is in the input, and its replacement in the intermediate text
+    unchanged = list(itertools.accumulate(len(part) for part in parts[0:-1:2]))
+    lengths = [len(replacement) for replacement in replacements]
+    sources = [kept + index for index, kept in enumerate(unchanged)]
+    starts = [kept + before
+              for kept, before in zip(unchanged, itertools.accumulate(lengths, initial=0))]
+    parts[1::2] = replacements
+    replaced = ''.join(parts)
+
+    # Second pass over the intermediate text: line endings and trailing blanks
+    scans = []
+    if '\r' in replaced or NEWLINE != '\n':
+        scans.append(_line_ending_edits(replaced))
+    if any(pair in replaced for pair in (' \n', '\t\n', ' \r', '\t\r')):
+        scans.append(_trailing_edits(replaced))
+    line_edits = []
+    pieces = []
+    position = 0
+    for start, end, replacement, rule in heapq.merge(*scans):
+        stats[rule] += end - start
+        line_edits.append((start, end, replacement, rule))
+        pieces += (replaced[position:start], replacement)
+        position = end
+    pieces.append(replaced[position:])
+    cleaned = ''.join(pieces)
+
+    # Map the second pass onto the input. Characters of the intermediate text
+    # outside first-pass replacements are input characters, offset by the
+    # length differences of the replacements before them
+    ends = [start + length for start, length in zip(starts, lengths)]
+    shifts = list(itertools.accumulate((length - 1 for length in lengths), initial=0))
+    kept = []
+    for start, end, replacement, rule in line_edits:
+        position = start
+        while position < end:
+            index = bisect.bisect_right(ends, position)  # next replacement not yet passed
+            if index < len(starts) and starts[index] <= position:
+                # Inside a first-pass replacement (e.g. a transliterated
+                # "1/2 " before a newline): that replacement changes instead
+                stop = min(end, ends[index])
+                changed = replacements[index]
+                replacements[index] = (changed[:position - starts[index]] + replacement
+                                       + changed[stop - starts[index]:])
+            else:
+                stop = min(end, starts[index]) if index < len(starts) else end
+                source = position - shifts[index]
+                kept.append((source, text[source:source + stop - position], replacement, rule))
+            position = stop
+
+    # Both lists are in input order
+    originals = chars
+    if kept:
+        merged = list(heapq.merge(zip(sources, chars, replacements, rules), kept))
+        sources, originals, replacements, rules = zip(*merged)
+    if sources:
+        lines, columns = _locate(text, sources, line)
+        if offset:
+            sources = [offset + source for source in sources]
+        edits._extend_columns(sources, lines, columns, rules, originals, replacements)
+    return cleaned, stats, edits
+
+
+def _line_ending_edits(text: str):
+    """Yield (start, end, replacement, 'line_endings') for each line ending to change."""
+    for match in _LINE_ENDING_EDIT_RE.finditer(text):
+        start = match.start()
+        # Only the '\r' of a '\r\n' is removed
+        yield start, start + 1, '' if match.group() == '\r\n' else NEWLINE, 'line_endings'
+
+
+def _trailing_edits(text: str):
+    """Yield (start, end, '', 'trailing_whitespace') for each run of blanks before a line ending."""
+    for match in _TRAILING_EDIT_RE.finditer(text):
+        end = start = match.start()
+        while start > 0 and text[start - 1] in ' \t':
+            start -= 1
+        yield start, end, '', 'trailing_whitespace'
+
+
+def _locate(text: str, offsets, line: int) -> tuple:
+    """Return the lines and columns of ascending offsets into text, which starts at line."""
+    previous = (0,) + tuple(offsets[:-1])
+    lines = list(itertools.accumulate((text.count('\n', start, end)
+                                       for start, end in zip(previous, offsets)), initial=line))
+    # The last '\n' before each offset, carried forward over edits on the same line
+    newlines = itertools.accumulate((text.rfind('\n', start, end)
+                                     for start, end in zip(previous, offsets)), max)
+    columns = [offset - newline for offset, newline in zip(offsets, newlines)]
+    return lines[1:], columns
+
+
+def clean_bytes(data) -> bytes:
+    """
+    Clean UTF-8 encoded text, passing invalid bytes through unchanged.
+
+    The bytes are decoded with surrogateescape, cleaned by clean_text and
+    encoded back, so for valid UTF-8 the result is byte-identical to
+    clean_text(data.decode('utf-8')).encode('utf-8'). This is faster than
+    matching the replaced characters in the bytes themselves: Python has no
+    multi-byte translate for bytes, and one bytes.replace() pass per
+    character (or a regex calling back on every match) costs more than the
+    decode and encode, which are memcpy-speed for mostly-ASCII text.
+
+    Args:
+        data: UTF-8 encoded bytes, bytearray, memoryview or mmap
+
+    Returns:
+        bytes: The cleaned UTF-8 text
+
+    Example:
+        >>> clean_bytes('\u201CHi\u201D \u2014 there \\r\\n'.encode('utf-8'))
+        b'"Hi" - there\\n'
+    """
+    if not isinstance(data, bytes):
+        data = bytes(data)
+    return clean_text(data.decode('utf-8', 'surrogateescape')).encode('utf-8', 'surrogateescape')
+
+
+def clean_mapped(buffer, outfile, chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+    """
+    Clean a UTF-8 buffer such as an mmap'd file into a binary file object.
+
+    The buffer is cleaned with clean_bytes() in pieces of about chunk_size
+    bytes, each ending just after a newline, so no character, line ending
+    or line is split between pieces and only one piece is copied out of the
+    buffer at a time. The output is the same as clean_bytes(buffer).
+
+    Args:
+        buffer: bytes, bytearray or mmap holding UTF-8 text
+        outfile: Binary file object to write the cleaned bytes to
+        chunk_size (int): Approximate number of bytes cleaned per piece
+    """
+    size = len(buffer)
+    start = 0
+    while start < size:
+        newline = buffer.find(b'\n', start + chunk_size - 1)
+        end = size if newline < 0 else newline + 1
+        outfile.write(clean_bytes(buffer[start:end]))
+        start = end
+
+
+def needs_cleaning(data) -> bool:
+    """
+    Cheaply check whether clean_text could change a text at all.
+
+    Works on str or on UTF-8 bytes, without decoding. The check is
+    conservative: any non-ASCII content counts as needing cleaning, so
+    False means the cleaned output is guaranteed to equal the input.
+
+    Args:
+        data (str or bytes): Text or UTF-8 encoded text to check
+
+    Returns:
+        bool: False if cleaning is a no-op for this input
+    """
+    if isinstance(data, str):
+        cr, space_nl, tab_nl, nl = '\r', ' \n', '\t\n', '\n'
+    else:
+        cr, space_nl, tab_nl, nl = b'\r', b' \n', b'\t\n', b'\n'
+
+    if not data.isascii() or cr in data:
+        return True
+    if space_nl in data or tab_nl in data:
+        return True
+    return NEWLINE != '\n' and nl in data
+
+
+def find_issues(data, transliterate: bool = False):
+    """
+    Find where cleaning would change UTF-8 text, without cleaning it.
+
+    A generator, so taking only the first issue stops the scan there. It
+    finds something exactly when clean_text() would change the decoded text.
+    Trailing whitespace that only appears once an invisible character or NBSP
+    is removed is not reported separately, since that character already is.
+
+    Args:
+        data: UTF-8 encoded bytes, bytearray or mmap
+        transliterate (bool): Also report the non-ASCII characters that
+            clean_text(transliterate=True) would fold
+
+    Yields:
+        tuple: (line, column, rule, original text), where line and column
+        count from 1, columns in characters, and rule is one of CHANGE_RULES
+
+    Example:
+        >>> list(find_issues('ok\\n\u201Chi\u201D \\r\\n'.encode('utf-8')))[:2]
+        [(2, 1, 'quotes', '\u201c'), (2, 4, 'quotes', '\u201d')]
+    """
+    if isinstance(data, (bytes, bytearray)) and not needs_cleaning(data):
+        return
+
+    # Each scan yields (start, end, rule) in order; the C-level find()s skip
+    # the line scans for files that have nothing for them to find
+    scans = [_char_issues(data, transliterate)]
+    if data.find(b'\r') >= 0 or NEWLINE != '\n':
+        scans.append((match.start(), match.end(), 'line_endings')
+                     for match in _LINE_ENDING_ISSUE_RE.finditer(data))
+    if any(data.find(pair) >= 0 for pair in _TRAILING_PAIRS):
+        scans.append(_trailing_issues(data))
+
+    line, counted = 1, 0
+    for start, end, rule in heapq.merge(*scans):
+        # Slicing works on mmaps, which have no count()
+        line += data[counted:start].count(b'\n')
+        counted = start
+        line_start = data.rfind(b'\n', 0, start) + 1
+        column = len(data[line_start:start].decode('utf-8', 'replace')) + 1
+        yield line, column, rule, data[start:end].decode('utf-8', 'replace')
+
+
+def _char_issues(data, transliterate: bool):
+    """Yield (start, end, rule) of every character find_issues reports."""
+    pattern = _TRANSLITERATE_ISSUE_RE if transliterate else _CHAR_ISSUE_RE
+    for match in pattern.finditer(data):
+        if match.lastgroup == 'char':
+            yield match.start(), match.end(), _ISSUE_RULES[match.group()]
+        else:
+            yield match.start(), match.end(), 'transliterated'
+
+
+def _trailing_issues(data):
+    """Yield (start, end, 'trailing_whitespace') of every run of blanks before a line ending."""
+    for match in _TRAILING_ISSUE_RE.finditer(data):
+        end = start = match.start()
+        while start > 0 and data[start - 1] in b' \t':
+            start -= 1
+        yield start, end, 'trailing_whitespace'
+
+
+def clean_texts_with_stats(texts, transliterate: bool = False) -> list:
+    """
+    Clean many short texts in one call, like clean_text_with_stats() on each.
+
+    Meant for batches of small documents, where per-call overhead outweighs
+    the cleaning itself. Texts that need no cleaning are returned as they are
+    after the needs_cleaning() pre-scan.
+
+    Args:
+        texts: An iterable of strings
+        transliterate (bool): Fold all remaining non-ASCII text to ASCII
+
+    Returns:
+        list: A (cleaned text, {rule: count}) tuple for each input, in order
+    """
+    results = []
+    for text in texts:
+        if isinstance(text, str) and not needs_cleaning(text):
+            results.append((text, dict.fromkeys(CHANGE_RULES, 0)))
+        else:
+            results.append(clean_text_with_stats(text, transliterate))
+    return results
+
+
+class StreamCleaner:
+    """
+    Incremental version of clean_text for input that arrives in chunks.
+
+    Feeding the chunks of a text one after another and then calling flush()
+    produces exactly the same output as clean_text() on the whole text.
+    Only the trailing spaces/tabs and a final '\\r' of each chunk are held
+    back, because the next chunk decides whether they end a line, so memory
+    use does not depend on the size of the input.
+
+    If a stats dict is given (see clean_text_with_stats), the per-rule
+    counts are accumulated into it as the chunks are cleaned. Transliteration
+    works character by character, so it streams like the other rules.
+
+    Example:
+        >>> cleaner = StreamCleaner()
+        >>> cleaner.feed('Hello \\r') + cleaner.feed('\\nWorld') + cleaner.flush()
+        'Hello\\nWorld'
+    """
+
+    def __init__(self, stats: Optional[dict] = None, transliterate: bool = False):
+        self._pending = ''
+        self.stats = stats
+        self.transliterate = transliterate
+
+    def feed(self, chunk: str) -> str:
+        """Clean the next chunk and return the output that is now final."""
+        chunk = _replace_chars(chunk, self.stats)
+        if self.transliterate:
+            chunk = _transliterate(chunk, self.stats)
+        text = self._pending + chunk
+
+        # Hold back trailing whitespace and a final '\r' for the next chunk
+        if text.endswith('\r'):
+            split = len(text[:-1].rstrip(' \t'))
+        else:
+            split = len(text.rstrip(' \t'))
+        self._pending = text[split:]
+
+        return _normalize_lines(text[:split], self.stats)
+
+    def flush(self) -> str:
+        """Return the remaining output once the input is exhausted."""
+        text, self._pending = self._pending, ''
+        return _normalize_lines(text, self.stats)
+
+
+def clean_stream(infile, outfile, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 transliterate: bool = False) -> None:
+    """
+    Clean a text stream into another stream with bounded memory use.
+
+    Args:
+        infile: Readable text file object (e.g. an open file or sys.stdin)
+        outfile: Writable text file object
+        chunk_size (int): Number of characters read per chunk
+        transliterate (bool): Fold all remaining non-ASCII text to ASCII
+    """
+    cleaner = StreamCleaner(transliterate=transliterate)
+    read, write = infile.read, outfile.write
+    while True:
+        chunk = read(chunk_size)
+        if not chunk:
+            break
+        write(cleaner.feed(chunk))
+    write(cleaner.flush())
+
+
+def clean_stream_with_edits(infile, outfile, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                            transliterate: bool = False, edits: EditLog = None):
+    """
+    Clean a text stream like clean_stream(), yielding the edits as it goes.
+
+    The input is cleaned in pieces that end just after a '\\n', which
+    clean_text_with_edits() cleans independently of each other, so memory
+    use stays bounded unless a single line is enormous.
+
+    Args:
+        infile: Readable text file object
+        outfile: Writable text file object
+        chunk_size (int): Number of characters read per chunk
+        transliterate (bool): Fold all remaining non-ASCII text to ASCII
+        edits (EditLog): Log to collect the edits of every piece in
+            (default: a new log per piece)
+
+    Yields:
+        tuple: ({rule: count}, EditLog) for each piece written, with offsets
+        and lines counted from the start of the stream
+    """
+    pending = []
+    offset, line = 0, 1
+    while True:
+        chunk = infile.read(chunk_size)
+        cut = chunk.rfind('\n') + 1
+        if chunk and not cut:
+            pending.append(chunk)
+            continue
+        pending.append(chunk[:cut])
+        text = ''.join(pending)
+        pending = [chunk[cut:]]
+        if text:
+            cleaned, stats, piece_edits = clean_text_with_edits(text, transliterate, edits,
+                                                                offset, line)
+            outfile.write(cleaned)
+            yield stats, piece_edits
+            offset += len(text)
+            line += text.count('\n')
+        if not chunk:
+            return
+
+
+def _detect_wide_encoding(sample: bytes) -> Optional[str]:
+    """
+    Recognize UTF-32 or UTF-16 without a BOM by where the NUL bytes fall.
+
+    Text that is mostly ASCII-range characters has the high bytes of nearly
+    every code unit zero, while the low bytes are rarely zero.
+    """
+    size = len(sample) // 4 * 4
+    if not size:
+        return None
+
+    def zero_share(start: int, step: int) -> float:
+        column = sample[start:size:step]
+        return column.count(0) / len(column)
+
+    if zero_share(2, 4) > 0.9 and zero_share(3, 4) > 0.9 and zero_share(0, 4) < 0.1:
+        return 'utf-32-le'
+    if zero_share(0, 4) > 0.9 and zero_share(1, 4) > 0.9 and zero_share(3, 4) < 0.1:
+        return 'utf-32-be'
+    if zero_share(1, 2) > 0.3 and zero_share(0, 2) < 0.05:
+        return 'utf-16-le'
+    if zero_share(0, 2) > 0.3 and zero_share(1, 2) < 0.05:
+        return 'utf-16-be'
+    return None
+
+
+def detect_encoding(data) -> str:
+    """
+    Guess the encoding of text from its first ENCODING_SAMPLE_SIZE bytes.
+
+    A UTF-16 or UTF-32 byte order mark decides outright. Otherwise NUL bytes
+    in a UTF-16/32 pattern select that encoding, a sample that is valid
+    UTF-8 selects UTF-8 (so pure ASCII does too), and anything else is taken
+    as cp1252, or latin-1 if it uses the bytes cp1252 leaves undefined.
+
+    Args:
+        data: The input, or at least its beginning, as bytes or an mmap
+
+    Returns:
+        str: A codec name for codecs.getincrementaldecoder()
+    """
+    sample = bytes(data[:ENCODING_SAMPLE_SIZE])
+    if sample.isascii() and b'\0' not in sample:
+        return 'utf-8'
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+    if b'\0' in sample:
+        encoding = _detect_wide_encoding(sample)
+        if encoding:
+            return encoding
+    try:
+        # Not final: the sample may end in the middle of a character
+        codecs.getincrementaldecoder('utf-8')().decode(sample)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    try:
+        sample.decode('cp1252')
+        return 'cp1252'
+    except UnicodeDecodeError:
+        return 'latin-1'
+
+
+def clean_byte_stream(infile, outfile, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                      encoding: Optional[str] = None, transliterate: bool = False,
+                      line_buffered: bool = False) -> dict:
+    """
+    Clean a binary stream of encoded text into a binary UTF-8 stream.
+
+    The input is decoded incrementally in one pass (undecodable bytes become
+    U+FFFD), so memory use stays bounded whatever the size of the stream.
+    Without an encoding, it is detected from the first block read.
+
+    With line_buffered, each block is cleaned as soon as it arrives (read1()
+    instead of waiting for a full chunk) and the output is flushed after it,
+    so live input such as `tail -f` comes out with little delay. Bulk input
+    still arrives in large blocks. Only trailing blanks and a final '\r' are
+    held back until the next block shows whether a '\n' follows.
+
+    Args:
+        infile: Readable binary file object
+        outfile: Writable binary file object
+        chunk_size (int): Number of bytes read per chunk
+        encoding (str): Encoding of the input, or None to detect_encoding()
+        transliterate (bool): Fold all remaining non-ASCII text to ASCII
+        line_buffered (bool): Clean and flush whatever input is available
+            instead of waiting for chunk_size bytes
+
+    Returns:
+        dict: Per-rule change counts, as from clean_text_with_stats()
+    """
+    stats = dict.fromkeys(CHANGE_RULES, 0)
+    cleaner = StreamCleaner(stats, transliterate)
+    decoder = None
+    if encoding is not None:
+        decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    read, write = infile.read, outfile.write
+    if line_buffered:
+        read = getattr(infile, 'read1', read)
+    while True:
+        block = read(chunk_size)
+        if not block:
+            break
+        if decoder is None:
+            decoder = codecs.getincrementaldecoder(detect_encoding(block))(errors='replace')
+        write(cleaner.feed(decoder.decode(block)).encode('utf-8'))
+        if line_buffered:
+            outfile.flush()
+    tail = cleaner.feed(decoder.decode(b'', final=True)) if decoder else ''
+    tail += cleaner.flush()
+    write(tail.encode('utf-8'))
+    return stats
+
+
+_numpy = None
+
+
+def _load_numpy():
+    """
+    Import NumPy on first use, or return None if it is not installed.
+
+    NumPy is optional and only speeds up get_unicode_info, but importing it
+    takes longer than most cleaning runs, so it is not imported up front.
+    """
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+        _numpy = numpy
+    return _numpy or None
+
+
+def preload() -> None:
+    """
+    Build the tables that are otherwise built on first use, where available.
+
+    For servers that fork workers: built once before forking, the tables
+    are shared copy-on-write instead of being built again in every worker.
+    """
+    try:
+        _load_transliteration_table()
+    except ImportError:
+        pass  # transliterating reports the missing package when asked to
+    _load_numpy()
+
+
+def _count_non_ascii(text: str) -> tuple:
+    """
+    Count every non-ASCII codepoint with vectorized scans.
+
+    Uses NumPy over the UTF-32 buffer when it is installed. Otherwise each
+    distinct character is found in order of first appearance by a regex
+    search that skips the characters already seen, and counted with the
+    C-level str.count; texts with many distinct characters fall back to a
+    Counter over the non-ASCII characters. None of these loop over the text
+    in Python.
+
+    Returns:
+        tuple: ({codepoint: count}, {codepoint: first offset})
+    """
+    np = _load_numpy()
+    if np is not None:
+        codepoints = np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype='<u4')
+        positions = np.flatnonzero(codepoints >= 0x80)
+        unique, first, counts = np.unique(codepoints[positions], return_index=True,
+                                          return_counts=True)
+        unique, offsets, counts = unique.tolist(), positions[first].tolist(), counts.tolist()
+        return dict(zip(unique, counts)), dict(zip(unique, offsets))
+
+    counts, offsets = {}, {}
+    seen = ''
+    pattern = _NON_ASCII_RE
+    match = pattern.search(text)
+    while match and len(seen) < _MAX_SEARCHED_CHARS:
+        char, offset = match.group(), match.start()
+        counts[ord(char)] = text.count(char, offset)
+        offsets[ord(char)] = offset
+        seen += char
+        pattern = re.compile('[^\\x00-\\x7f' + re.escape(seen) + ']')
+        match = pattern.search(text, offset + 1)
+    if not match:
+        return counts, offsets
+
+    non_ascii = _ASCII_RUN_RE.sub('', text)
+    counts = {ord(char): count for char, count in Counter(non_ascii).items()}
+
+    # Distinct characters in order of first appearance, so each find() resumes
+    # where the previous one stopped and the whole scan stays O(n)
+    offsets = {}
+    offset = -1
+    for char in dict.fromkeys(non_ascii):
+        offset = text.find(char, offset + 1)
+        offsets[ord(char)] = offset
+    return counts, offsets
+
+
+def get_unicode_info(text: str, sample_size: Optional[int] = None) -> dict:
     """
     Get information about Unicode characters in the text.
-    
+
+    All statistics come from a single counting pass over the text. Besides
+    the summary counts, a histogram lists every non-ASCII codepoint with its
+    Unicode name, category, count and first offset (most frequent first).
+
     Args:
         text (str): Input text to analyze
-        
+        sample_size (int, optional): For texts longer than this many
+            characters, only analyze SAMPLE_WINDOWS evenly spaced windows
+            totalling sample_size characters and scale the counts up. The
+            result then has 'sampled' set and its counts are estimates.
+
     Returns:
         dict: Dictionary with Unicode character statistics
     """
@@ -81,32 +1026,63 @@ def get_unicode_info(text: str) -> dict:
             'ascii_chars': 0,
             'unicode_chars': 0,
             'problematic_chars': 0,
-            'invisible_chars': 0
+            'invisible_chars': 0,
+            'histogram': [],
+            'sampled': False
         }
-    
+
     total_chars = len(text)
-    ascii_chars = sum(1 for c in text if ord(c) < 128)
-    unicode_chars = total_chars - ascii_chars
-    
+    sampled = sample_size is not None and total_chars > sample_size
+
+    if text.isascii():
+        counts, offsets = {}, {}
+    elif not sampled:
+        counts, offsets = _count_non_ascii(text)
+    else:
+        counts, offsets = {}, {}
+        step = max(total_chars // SAMPLE_WINDOWS, 1)
+        window = min(max(sample_size // SAMPLE_WINDOWS, 1), step)
+        analyzed = 0
+        # Exactly SAMPLE_WINDOWS full windows: a short extra window at the end
+        # would be scaled up as if it were a whole one
+        for start in range(0, step * SAMPLE_WINDOWS, step):
+            piece = text[start:start + window]
+            analyzed += len(piece)
+            piece_counts, piece_offsets = _count_non_ascii(piece)
+            for codepoint, count in piece_counts.items():
+                counts[codepoint] = counts.get(codepoint, 0) + count
+                offsets.setdefault(codepoint, start + piece_offsets[codepoint])
+
+        # Scale the sample counts up to estimates for the whole text
+        scale = total_chars / analyzed
+        counts = {codepoint: round(count * scale) for codepoint, count in counts.items()}
+
+    unicode_chars = sum(counts.values())
+
     # Count problematic characters that would be replaced
-    problematic_patterns = [
-        '\u2018', '\u2019',  # Smart single quotes
-        '\u201C', '\u201D',  # Smart double quotes
-        '\u2013', '\u2014',  # En and em dashes
-        '\u2026',           # Ellipsis
-        '\u00A0',           # Non-breaking space
-    ]
-    
-    problematic_chars = sum(text.count(char) for char in problematic_patterns)
-    
+    problematic_chars = sum(counts.get(ord(char), 0) for char in CHAR_REPLACEMENTS)
+
     # Count invisible characters
-    invisible_pattern = r'[\u200B\u200C\u200D\uFEFF\u00AD]'
-    invisible_chars = len(re.findall(invisible_pattern, text))
-    
+    invisible_chars = sum(counts.get(ord(char), 0) for char in INVISIBLE_CHARS)
+
+    histogram = [
+        {
+            'codepoint': f'U+{codepoint:04X}',
+            'char': chr(codepoint),
+            'name': unicodedata.name(chr(codepoint), ''),
+            'category': unicodedata.category(chr(codepoint)),
+            'count': count,
+            'first_offset': offsets[codepoint]
+        }
+        for codepoint, count in sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    ]
+
     return {
         'total_chars': total_chars,
-        'ascii_chars': ascii_chars,
+        'ascii_chars': total_chars - unicode_chars,
         'unicode_chars': unicode_chars,
         'problematic_chars': problematic_chars,
-        'invisible_chars': invisible_chars
-    } 
\ No newline at end of file
+        'invisible_chars': invisible_chars,
+        'histogram': histogram,
+        'sampled': sampled
+    }
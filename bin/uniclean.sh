@@ -1,10 +1,17 @@
 #!/usr/bin/env bash
 
-# Uniclean is a wrappet fro cleanup-text.py which ensures the proper virtual environment
-# is activated and the script is run from the root of the project.
+# Uniclean is a wrapper for cleanup-text.py which ensures the proper virtual environment
+# is used and the script is run from the root of the project.
 
-# Activate the virtual environment
+# Use the project's virtual environment directly when there is one: sourcing
+# ~/.bashrc costs more than cleaning a typical file
+ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+if [ -x "${ROOT}/venv/bin/python" ]; then
+    exec "${ROOT}/venv/bin/python" "${ROOT}/bin/cleanup-text.py" "$@"
+fi
+
+# Otherwise activate the virtual environment set up in ~/.bashrc
 source "${HOME}/.bashrc"
 
 # Run the cleanup-text.py script
-cleanup-text.py "$@"
\ No newline at end of file
+cleanup-text.py "$@"
@@ -5,54 +5,55 @@ UnicodeFix Web Application Launcher
 
 Simple launcher script that starts the FastAPI web server.
 This script can be run directly or used with the batch/PowerShell launchers.
+It takes the options of web_server.py (--host, --port, --workers, ...) but
+runs a single worker by default and opens a browser unless --no-browser.
 """
 
+import importlib.util
 import sys
 import webbrowser
 from pathlib import Path
 import time
 import threading
 
-def open_browser():
+def open_browser(port=8000):
     """Open the web browser after a short delay."""
     time.sleep(2)  # Give the server time to start
-    webbrowser.open('http://localhost:8000')
+    webbrowser.open(f'http://localhost:{port}')
 
 def main():
     """Main function to start the web application."""
     print("🚀 UnicodeFix Web Interface")
     print("=" * 40)
     
-    # Check if we can import the required modules
-    try:
-        import uvicorn
-        from fastapi import FastAPI
-    except ImportError as e:
-        print(f"❌ Missing required dependencies: {e}")
+    # Check that the required modules are installed
+    missing = [name for name in ("fastapi", "uvicorn") if importlib.util.find_spec(name) is None]
+    if missing:
+        print(f"❌ Missing required dependencies: {', '.join(missing)}")
         print("\n💡 Please install dependencies:")
         print("   pip install -r requirements.txt")
         sys.exit(1)
     
+    from web_server import build_parser, serve
+    parser = build_parser(workers=1)
+    parser.add_argument("--no-browser", action="store_true",
+                        help="Do not open the web interface in a browser")
+    args = parser.parse_args()
+
     # Start browser in background thread
-    browser_thread = threading.Thread(target=open_browser, daemon=True)
-    browser_thread.start()
+    if not args.no_browser:
+        browser_thread = threading.Thread(target=open_browser, args=(args.port,), daemon=True)
+        browser_thread.start()
     
     print("\n📱 Starting web server...")
-    print("🌐 Access URL: http://localhost:8000")
-    print("📚 API Docs: http://localhost:8000/docs")
+    print(f"🌐 Access URL: http://localhost:{args.port}")
+    print(f"📚 API Docs: http://localhost:{args.port}/docs")
     print("\n⏹️  Press Ctrl+C to stop the server")
     print("-" * 40)
     
     try:
-        # Import and run the web app
-        from web_app import app
-        uvicorn.run(
-            app,
-            host="0.0.0.0",
-            port=8000,
-            log_level="info",
-            access_log=False  # Reduce log verbosity
-        )
+        serve(args.host, args.port, args.workers, args.backlog, args.keep_alive,
+              args.graceful_timeout, args.loop, args.http, args.access_log, args.reload)
     except KeyboardInterrupt:
         print("\n\n👋 Shutting down UnicodeFix Web Interface")
         print("Thank you for using UnicodeFix!")
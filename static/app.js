@@ -7,6 +7,8 @@
 class UnicodeFix {
     constructor() {
         this.currentMode = 'text';
+        this.live = null;
+        this.liveTimer = null;
         this.init();
     }
 
@@ -33,6 +35,13 @@ class UnicodeFix {
         // Clean button
         document.getElementById('cleanBtn').addEventListener('click', this.processText.bind(this));
 
+        // Live cleaning over a WebSocket while typing
+        document.getElementById('liveToggle').addEventListener('change', this.toggleLive.bind(this));
+        document.getElementById('textInput').addEventListener('input', this.scheduleLiveEdit.bind(this));
+        document.getElementById('transliterateToggle').addEventListener('change', () => {
+            if (this.live) this.openLive();
+        });
+
         // Results actions
         document.getElementById('copyBtn').addEventListener('click', this.copyResult.bind(this));
         document.getElementById('downloadBtn').addEventListener('click', this.downloadResult.bind(this));
@@ -137,6 +146,117 @@ class UnicodeFix {
         }
     }
 
+    transliterate() {
+        return document.getElementById('transliterateToggle').checked;
+    }
+
+    toggleLive() {
+        if (document.getElementById('liveToggle').checked) {
+            this.openLive();
+        } else {
+            this.closeLive();
+        }
+    }
+
+    openLive() {
+        this.closeLive();
+        const protocol = location.protocol === 'https:' ? 'wss:' : 'ws:';
+        const socket = new WebSocket(`${protocol}//${location.host}/ws/clean`);
+        let opened = false;
+        this.live = socket;
+
+        socket.addEventListener('open', () => {
+            opened = true;
+            // The server starts from the whole document; edits follow as line ranges
+            this.liveText = document.getElementById('textInput').value;
+            this.liveLines = [];
+            socket.send(JSON.stringify({
+                op: 'open',
+                text: this.liveText,
+                transliterate: this.transliterate()
+            }));
+        });
+        socket.addEventListener('message', (event) => this.applyLivePatch(JSON.parse(event.data)));
+        socket.addEventListener('close', () => {
+            if (this.live !== socket) return;  // closed on purpose
+            this.live = null;
+            if (!opened) {
+                document.getElementById('liveToggle').checked = false;
+                this.showError('Live cleaning is not available on this server.');
+                return;
+            }
+            // Dropped (e.g. server busy): reconnect and resend the whole document
+            setTimeout(() => {
+                if (!this.live && document.getElementById('liveToggle').checked) this.openLive();
+            }, 1000);
+        });
+    }
+
+    closeLive() {
+        const socket = this.live;
+        this.live = null;
+        clearTimeout(this.liveTimer);
+        this.liveTimer = null;
+        if (socket) socket.close();
+    }
+
+    scheduleLiveEdit() {
+        // Coalesce bursts of keystrokes into one edit
+        if (!this.live || this.liveTimer) return;
+        this.liveTimer = setTimeout(() => {
+            this.liveTimer = null;
+            this.sendLiveEdit();
+        }, 50);
+    }
+
+    sendLiveEdit() {
+        if (!this.live || this.live.readyState !== WebSocket.OPEN) return;
+        const oldText = this.liveText;
+        const newText = document.getElementById('textInput').value;
+        if (oldText === newText) return;
+
+        // Changed span: common prefix and suffix, widened to whole lines
+        const shorter = Math.min(oldText.length, newText.length);
+        let prefix = 0;
+        while (prefix < shorter && oldText[prefix] === newText[prefix]) prefix++;
+        let suffix = 0;
+        while (suffix < shorter - prefix &&
+               oldText[oldText.length - 1 - suffix] === newText[newText.length - 1 - suffix]) {
+            suffix++;
+        }
+        // (lastIndexOf treats a negative position as 0, so check prefix first)
+        const start = prefix && oldText.lastIndexOf('\n', prefix - 1) + 1;
+        const lineEnd = oldText.indexOf('\n', oldText.length - suffix);
+        const oldEnd = lineEnd === -1 ? oldText.length : lineEnd + 1;
+
+        const countLines = (text) => {
+            let count = 0;
+            for (let i = text.indexOf('\n'); i !== -1; i = text.indexOf('\n', i + 1)) count++;
+            return count + (text && !text.endsWith('\n') ? 1 : 0);
+        };
+        const fromLine = countLines(oldText.slice(0, start));
+        this.live.send(JSON.stringify({
+            op: 'edit',
+            from_line: fromLine,
+            to_line: fromLine + countLines(oldText.slice(start, oldEnd)),
+            text: newText.slice(start, newText.length - (oldText.length - oldEnd))
+        }));
+        this.liveText = newText;
+    }
+
+    applyLivePatch(patch) {
+        // concat rather than splice(...lines), which fails for very large patches
+        this.liveLines = this.liveLines.slice(0, patch.from_line).concat(
+            patch.lines, this.liveLines.slice(patch.to_line));
+        this.showResults({
+            cleaned_text: this.liveLines.join(''),
+            original_size: patch.original_size,
+            cleaned_size: patch.cleaned_size,
+            changes_made: patch.changes_made,
+            changes: patch.changes
+        }, null, false);
+    }
+
     async processFile(file) {
         this.setLoading(true);
         this.hideError();
@@ -144,6 +264,7 @@ class UnicodeFix {
         try {
             const formData = new FormData();
             formData.append('file', file);
+            formData.append('transliterate', this.transliterate());
 
             const response = await fetch('/api/clean-file', {
                 method: 'POST',
@@ -172,13 +293,11 @@ class UnicodeFix {
         try {
             const response = await fetch('/api/clean-text', {
                 method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
+                ...(await this.requestBody(JSON.stringify({
                     text: text,
-                    preserve_formatting: true
-                })
+                    preserve_formatting: true,
+                    transliterate: this.transliterate()
+                })))
             });
 
             const result = await response.json();
@@ -196,7 +315,18 @@ class UnicodeFix {
         }
     }
 
-    showResults(result, filename = null) {
+    async requestBody(json) {
+        // Large pastes are sent gzip-compressed where the browser can do it
+        const headers = { 'Content-Type': 'application/json' };
+        if (json.length < 64 * 1024 || typeof CompressionStream === 'undefined') {
+            return { headers, body: json };
+        }
+        const stream = new Blob([json]).stream().pipeThrough(new CompressionStream('gzip'));
+        const body = await new Response(stream).blob();
+        return { headers: { ...headers, 'Content-Encoding': 'gzip' }, body };
+    }
+
+    showResults(result, filename = null, scroll = true) {
         const resultsDiv = document.getElementById('results');
         const resultText = document.getElementById('resultText');
         const changesCount = document.getElementById('changesCount');
@@ -204,7 +334,18 @@ class UnicodeFix {
 
         resultText.value = result.cleaned_text;
         changesCount.textContent = result.changes_made;
+        // Per-rule breakdown on hover, e.g. "quotes: 2, dashes: 1"
+        changesCount.title = result.changes
+            ? Object.entries(result.changes)
+                .filter(([, count]) => count > 0)
+                .map(([rule, count]) => `${rule.replace('_', ' ')}: ${count}`)
+                .join(', ')
+            : '';
         sizeInfo.textContent = `${result.original_size} → ${result.cleaned_size} chars`;
+        // Uploads report the encoding they were decoded from
+        if (result.encoding && result.encoding !== 'utf-8') {
+            sizeInfo.textContent += ` (from ${result.encoding})`;
+        }
 
         // Store result for download
         this.lastResult = {
@@ -213,7 +354,9 @@ class UnicodeFix {
         };
 
         resultsDiv.classList.remove('hidden');
-        resultsDiv.scrollIntoView({ behavior: 'smooth', block: 'start' });
+        if (scroll) {
+            resultsDiv.scrollIntoView({ behavior: 'smooth', block: 'start' });
+        }
     }
 
     hideResults() {
@@ -274,7 +417,7 @@ class UnicodeFix {
         const a = document.createElement('a');
         a.href = url;
         a.download = this.lastResult.filename 
-            ? this.lastResult.filename.replace(/\.[^/.]+$/, '.clean.txt')
+            ? this.lastResult.filename.replace(/\.gz$/i, '').replace(/\.[^/.]+$/, '.clean.txt')
             : 'cleaned-text.txt';
         
         document.body.appendChild(a);
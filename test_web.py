@@ -23,6 +23,588 @@ def test_cleanup_module():
         print(f"❌ Error testing cleanup module: {e}")
         return False
 
+def test_clean_text_rules():
+    """Test every cleaning rule against a known expected output."""
+    print("\nTesting clean_text rules...")
+
+    try:
+        from bin.cleanup_text_module import NEWLINE, clean_text
+
+        test_text = '\u2018a\u2019 \u201Cb\u201D\u2013c\u2014d\u2026\u00A0e\u200B\u200C\u200D\uFEFF\u00AD \t\r\nf \rg\t\n  '
+        expected = "'a' \"b\"-c-d... e" + NEWLINE + 'f' + NEWLINE + 'g' + NEWLINE + '  '
+        cleaned = clean_text(test_text)
+
+        if cleaned != expected:
+            print(f"❌ Unexpected output: {cleaned!r}")
+            return False
+        if clean_text('plain ascii\n') != 'plain ascii' + NEWLINE:
+            print("❌ Pure ASCII text was altered")
+            return False
+        print("✅ clean_text rules work correctly!")
+        return True
+    except Exception as e:
+        print(f"❌ Error testing clean_text rules: {e}")
+        return False
+
+def test_stream_cleaner():
+    """Test that chunked cleaning matches whole-text cleaning."""
+    print("\nTesting StreamCleaner...")
+
+    try:
+        from bin.cleanup_text_module import StreamCleaner, clean_text
+
+        test_text = 'a \u2014 b \r\n\u00A0\t\rc\u200B \n' * 50
+        for size in (1, 2, 3, 7, 64):
+            cleaner = StreamCleaner()
+            chunks = [test_text[i:i + size] for i in range(0, len(test_text), size)]
+            streamed = ''.join(cleaner.feed(chunk) for chunk in chunks) + cleaner.flush()
+            if streamed != clean_text(test_text):
+                print(f"❌ Streamed output differs with chunk size {size}")
+                return False
+        print("✅ StreamCleaner matches clean_text!")
+        return True
+    except Exception as e:
+        print(f"❌ Error testing StreamCleaner: {e}")
+        return False
+
+def test_needs_cleaning():
+    """Test the no-op pre-scan on str and bytes input."""
+    print("\nTesting needs_cleaning...")
+
+    try:
+        from bin.cleanup_text_module import NEWLINE, clean_text, needs_cleaning
+
+        for text in ('plain text', 'ends with space ', 'a\nb' if NEWLINE == '\n' else 'ab'):
+            if needs_cleaning(text) or needs_cleaning(text.encode('utf-8')):
+                print(f"❌ Clean text flagged: {text!r}")
+                return False
+            if clean_text(text) != text:
+                print(f"❌ Pre-scan missed a change: {text!r}")
+                return False
+        for text in ('trailing \n', 'cr\r', 'caf\u00E9', 'tab\t\n'):
+            if not (needs_cleaning(text) and needs_cleaning(text.encode('utf-8'))):
+                print(f"❌ Text needing cleaning not flagged: {text!r}")
+                return False
+        print("✅ needs_cleaning works correctly!")
+        return True
+    except Exception as e:
+        print(f"❌ Error testing needs_cleaning: {e}")
+        return False
+
+def test_unicode_info():
+    """Test the single-pass statistics and codepoint histogram."""
+    print("\nTesting get_unicode_info...")
+
+    try:
+        from bin.cleanup_text_module import get_unicode_info
+
+        info = get_unicode_info('a\u2019b\u200B\u2019 \u00E9')
+        expected = {'total_chars': 7, 'ascii_chars': 3, 'unicode_chars': 4,
+                    'problematic_chars': 2, 'invisible_chars': 1}
+        if any(info[key] != value for key, value in expected.items()):
+            print(f"❌ Unexpected counts: {info}")
+            return False
+        top = info['histogram'][0]
+        if (top['codepoint'], top['count'], top['first_offset'], top['category']) != ('U+2019', 2, 1, 'Pf'):
+            print(f"❌ Unexpected histogram entry: {top}")
+            return False
+
+        # Sampled: non-ASCII only in a tail shorter than a window must not be blown up
+        info = get_unicode_info('a' * 1_000_000 + '\u00E9' * 10, sample_size=16_000)
+        if not info['sampled'] or info['unicode_chars'] > 10:
+            print(f"❌ Sampled tail over-estimated: {info['unicode_chars']}")
+            return False
+        info = get_unicode_info('a\u00E9' * 500_000, sample_size=16_000)
+        if info['unicode_chars'] != 500_000:
+            print(f"❌ Sampled even text mis-estimated: {info['unicode_chars']}")
+            return False
+        print("✅ get_unicode_info works correctly!")
+        return True
+    except Exception as e:
+        print(f"❌ Error testing get_unicode_info: {e}")
+        return False
+
+def test_clean_text_with_stats():
+    """Test that per-rule statistics match the cleaning."""
+    print("\nTesting clean_text_with_stats...")
+
+    try:
+        from bin.cleanup_text_module import clean_text, clean_text_with_stats
+
+        test_text = '\u201Cq\u201D \u2013\u2026\u00A0\u200B \r\nx\ry'
+        cleaned, stats = clean_text_with_stats(test_text)
+        expected = {'quotes': 2, 'dashes': 1, 'ellipsis': 1, 'nbsp': 1, 'invisible': 1,
+                    'transliterated': 0, 'line_endings': 2, 'trailing_whitespace': 2}
+        if cleaned != clean_text(test_text) or stats != expected:
+            print(f"❌ Unexpected result: {cleaned!r} {stats}")
+            return False
+        print("✅ clean_text_with_stats works correctly!")
+        return True
+    except Exception as e:
+        print(f"❌ Error testing clean_text_with_stats: {e}")
+        return False
+
+def test_transliterate():
+    """Test that transliteration folds all non-ASCII text like unidecode."""
+    print("\nTesting transliteration...")
+
+    try:
+        from bin.cleanup_text_module import StreamCleaner, clean_text_with_stats
+
+        test_text = 'Caf\u00e9 \u2014 na\u00efve \u00bd \u2192 \u0394 \U0001d400 x\u00b2\r\n\u5317\u4eac\nend'
+        cleaned, stats = clean_text_with_stats(test_text, transliterate=True)
+        expected = 'Cafe - naive  1/2 - D A x2\nBei Jing\nend'
+        if cleaned != expected or stats['transliterated'] != 9:
+            print(f"❌ Unexpected result: {cleaned!r} {stats}")
+            return False
+
+        cleaner = StreamCleaner(transliterate=True)
+        streamed = ''.join(cleaner.feed(test_text[i:i + 3]) for i in range(0, len(test_text), 3))
+        if streamed + cleaner.flush() != cleaned:
+            print("❌ Streamed transliteration differs")
+            return False
+        print("✅ Transliteration works correctly!")
+        return True
+    except Exception as e:
+        print(f"❌ Error testing transliteration: {e}")
+        return False
+
+def test_find_issues():
+    """Test that find_issues locates exactly what clean_text would change."""
+    print("\nTesting find_issues...")
+
+    try:
+        import random
+        from bin.cleanup_text_module import clean_text, find_issues
+
+        issues = list(find_issues('ok\n\u201Chi\u201D \r\nx\u200B\t\n'.encode('utf-8')))
+        expected = [(2, 1, 'quotes', '\u201C'), (2, 4, 'quotes', '\u201D'),
+                    (2, 5, 'trailing_whitespace', ' '), (2, 6, 'line_endings', '\r\n'),
+                    (3, 2, 'invisible', '\u200B'), (3, 3, 'trailing_whitespace', '\t')]
+        if issues != expected:
+            print(f"❌ Unexpected issues: {issues}")
+            return False
+
+        rng = random.Random(0)
+        alphabet = ['a', ' ', '\t', '\n', '\r', '\u201C', '\u2014', '\u200B', '\u00A0', '\u00E9']
+        for _ in range(2000):
+            text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 10)))
+            for transliterate in (False, True):
+                found = next(find_issues(text.encode('utf-8'), transliterate), None) is not None
+                if found != (clean_text(text, transliterate) != text):
+                    print(f"❌ find_issues disagrees with clean_text on {text!r}")
+                    return False
+        print("✅ find_issues works correctly!")
+        return True
+    except Exception as e:
+        print(f"❌ Error testing find_issues: {e}")
+        return False
+
+def test_git_changed_files():
+    """Test listing changed files and reading staged contents from git."""
+    print("\nTesting git changed files...")
+
+    try:
+        import os
+        import shutil
+        import subprocess
+        import tempfile
+        from bin.cleanup_git import BlobReader, changed_files
+
+        if shutil.which('git') is None:
+            print("✅ Skipped (git is not installed)")
+            return True
+
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as repo:
+            os.chdir(repo)
+            try:
+                def git(*args):
+                    subprocess.run(['git', '-c', 'user.name=t', '-c', 'user.email=t@t', *args],
+                                   check=True, capture_output=True)
+
+                def write(path, data):
+                    with open(path, 'wb') as f:
+                        f.write(data)
+
+                git('init', '-q')
+                for name in ('a.txt', 'b.txt', 'c.bin'):
+                    write(name, b'old\n')
+                git('add', '.')
+                git('commit', '-q', '-m', 'init')
+                write('a.txt', '\u201Cstaged\u201D\n'.encode('utf-8'))
+                write('c.bin', b'\0binary')
+                git('add', 'a.txt', 'c.bin')
+                write('a.txt', b'edited after staging\n')
+                write('d.txt', b'untracked\n')
+
+                staged = changed_files(staged=True)
+                changed = changed_files('HEAD')
+                with BlobReader() as reader:
+                    contents = list(reader.read([':./a.txt', ':./missing.txt']))
+            finally:
+                os.chdir(cwd)
+
+        if staged != (['a.txt'], {'a.txt'}) or changed != (['a.txt', 'd.txt'], set()):
+            print(f"❌ Unexpected file lists: {staged} {changed}")
+            return False
+        if contents != ['\u201Cstaged\u201D\n'.encode('utf-8'), None]:
+            print(f"❌ Unexpected staged contents: {contents}")
+            return False
+        print("✅ Git changed files are listed and read correctly!")
+        return True
+    except Exception as e:
+        print(f"❌ Error testing git changed files: {e}")
+        return False
+
+def test_clean_texts_with_stats():
+    """Test that batch cleaning matches cleaning each text on its own."""
+    print("\nTesting clean_texts_with_stats...")
+
+    try:
+        from bin.cleanup_text_module import clean_text_with_stats, clean_texts_with_stats
+
+        texts = ['plain', '\u201Cq\u201D \r\n', '', 'a\u2014b\t\n', 'caf\u00E9']
+        if clean_texts_with_stats(texts) != [clean_text_with_stats(text) for text in texts]:
+            print("❌ Batch results differ from single-text results")
+            return False
+        print("✅ clean_texts_with_stats matches clean_text_with_stats!")
+        return True
+    except Exception as e:
+        print(f"❌ Error testing clean_texts_with_stats: {e}")
+        return False
+
+def test_clean_bytes():
+    """Test that the bytes engine matches clean_text on UTF-8 input."""
+    print("\nTesting clean_bytes...")
+
+    try:
+        import io
+        from bin.cleanup_text_module import clean_bytes, clean_mapped, clean_text
+
+        test_text = '\u2018a\u2019 \u201Cb\u201D\u2013c\u2014d\u2026\u00A0e\u200B\uFEFF\u00AD \t\r\nf\r\u200B\ng\u00E9 \n' * 10
+        expected = clean_text(test_text).encode('utf-8')
+        if clean_bytes(test_text.encode('utf-8')) != expected:
+            print("❌ clean_bytes differs from clean_text")
+            return False
+        for size in (1, 3, 64):
+            output = io.BytesIO()
+            clean_mapped(test_text.encode('utf-8'), output, size)
+            if output.getvalue() != expected:
+                print(f"❌ clean_mapped differs with chunk size {size}")
+                return False
+        print("✅ clean_bytes matches clean_text!")
+        return True
+    except Exception as e:
+        print(f"❌ Error testing clean_bytes: {e}")
+        return False
+
+def test_clean_byte_stream():
+    """Test that byte-stream cleaning matches clean_text_with_stats."""
+    print("\nTesting clean_byte_stream...")
+
+    try:
+        import io
+        from bin.cleanup_text_module import clean_byte_stream, clean_text_with_stats
+
+        test_text = '\u201Cq\u201D \u2013\u2026\u00A0\u200B \r\nx\ry\u00E9 ' * 20
+        expected, expected_stats = clean_text_with_stats(test_text)
+        for size in (1, 2, 5, 64):
+            output = io.BytesIO()
+            stats = clean_byte_stream(io.BytesIO(test_text.encode('utf-8')), output, size)
+            if output.getvalue().decode('utf-8') != expected or stats != expected_stats:
+                print(f"❌ Streamed bytes differ with chunk size {size}")
+                return False
+        print("✅ clean_byte_stream matches clean_text_with_stats!")
+        return True
+    except Exception as e:
+        print(f"❌ Error testing clean_byte_stream: {e}")
+        return False
+
+def test_detect_encoding():
+    """Test encoding detection and cleaning of non-UTF-8 byte streams."""
+    print("\nTesting detect_encoding...")
+
+    try:
+        import io
+        from bin.cleanup_text_module import clean_byte_stream, clean_text, detect_encoding
+
+        test_text = '\u201CCaf\u00E9\u201D \u2014 na\u00EFve\u2026 \r\nline two\n'
+        expected = clean_text(test_text).encode('utf-8')
+        cases = {'utf-8': 'utf-8', 'utf-16': 'utf-16', 'utf-16-le': 'utf-16-le',
+                 'utf-16-be': 'utf-16-be', 'utf-32': 'utf-32', 'utf-32-le': 'utf-32-le',
+                 'cp1252': 'cp1252'}
+        for encoding, detected in cases.items():
+            data = test_text.encode(encoding)
+            if detect_encoding(data) != detected:
+                print(f"❌ {encoding} detected as {detect_encoding(data)}")
+                return False
+            output = io.BytesIO()
+            clean_byte_stream(io.BytesIO(data), output)
+            if output.getvalue() != expected:
+                print(f"❌ {encoding} input cleaned to {output.getvalue()!r}")
+                return False
+        if detect_encoding('Gr\u00FC\u00DFe \u0081'.encode('latin-1')) != 'latin-1':
+            print("❌ Bytes undefined in cp1252 not detected as latin-1")
+            return False
+        print("✅ detect_encoding works correctly!")
+        return True
+    except Exception as e:
+        print(f"❌ Error testing detect_encoding: {e}")
+        return False
+
+def test_line_buffered_stream():
+    """Test that line-buffered streaming flushes each block as it arrives."""
+    print("\nTesting line-buffered clean_byte_stream...")
+
+    try:
+        import io
+        from bin.cleanup_text_module import clean_byte_stream
+
+        class Pieces(io.RawIOBase):
+            """A live pipe: each read returns the next piece that arrived."""
+            def __init__(self, pieces):
+                self.pieces = list(pieces)
+            def readable(self):
+                return True
+            def readinto(self, buffer):
+                piece = self.pieces.pop(0) if self.pieces else b''
+                buffer[:len(piece)] = piece
+                return len(piece)
+
+        class Flushes(io.BytesIO):
+            """Records the output seen at every flush."""
+            def __init__(self):
+                super().__init__()
+                self.seen = []
+            def flush(self):
+                self.seen.append(self.getvalue())
+
+        pieces = [b'one\r', b'\ntwo \xe2\x80', b'\x94 \r', b'\nthree\n']
+        output = Flushes()
+        clean_byte_stream(io.BufferedReader(Pieces(pieces)), output, 1024, line_buffered=True)
+        expected = [b'one', b'one\ntwo', b'one\ntwo -', b'one\ntwo -\nthree\n']
+        if output.seen != expected:
+            print(f"❌ Unexpected flushes: {output.seen}")
+            return False
+        print("✅ Line-buffered streaming flushes promptly!")
+        return True
+    except Exception as e:
+        print(f"❌ Error testing line-buffered streaming: {e}")
+        return False
+
+def run_cleanup_text(args, cwd, stdin=b''):
+    """Run bin/cleanup-text.py in a subprocess, bypassing any daemon: (status, stdout, stderr)."""
+    import os
+    import subprocess
+    import sys
+
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bin', 'cleanup-text.py')
+    result = subprocess.run([sys.executable, script, '--no-daemon', *args], cwd=cwd,
+                            input=stdin, capture_output=True)
+    return (result.returncode, result.stdout.decode('utf-8'),
+            result.stderr.decode('utf-8'))
+
+def test_parallel_jobs():
+    """Test that --jobs gives the same output and report order as a serial run."""
+    print("\nTesting parallel --jobs runs...")
+
+    try:
+        import os
+        import tempfile
+
+        names = []
+        with tempfile.TemporaryDirectory() as directory:
+            for index in range(40):
+                name = f'f{index:02d}.txt'
+                text = f'“{index}”  \r\n' if index % 3 else f'plain {index}\n'
+                with open(os.path.join(directory, name), 'w', encoding='utf-8',
+                          newline='') as f:
+                    # Over MIN_BATCH_BYTES in total, so that --jobs 4 does use a pool
+                    f.write(text * (index + 1) * 300)
+                names.append(name)
+            # A file that cannot be read fails on its own, in its place
+            os.mkdir(os.path.join(directory, 'broken.txt'))
+            names.insert(17, 'broken.txt')
+
+            reports, outputs = [], []
+            for jobs in ('1', '4'):
+                status, stdout, _ = run_cleanup_text(['--jobs', jobs, *names], directory)
+                if status != 0:
+                    print(f"❌ --jobs {jobs} exited with {status}")
+                    return False
+                reports.append(stdout.splitlines()[:-1])  # the summary has timings
+                contents = {}
+                for name in names:
+                    path = os.path.join(directory, name[:-4] + '.clean.txt')
+                    if os.path.isfile(path):
+                        with open(path, 'rb') as f:
+                            contents[name] = f.read()
+                        os.remove(path)
+                outputs.append(contents)
+
+        if reports[0] != reports[1] or outputs[0] != outputs[1]:
+            print("❌ --jobs 4 differs from a serial run")
+            return False
+        if len(reports[0]) != len(names) or not reports[0][17].startswith('[✗] Failed'):
+            print(f"❌ Unexpected report: {reports[0]}")
+            return False
+        if sum(line.startswith('[✓]') for line in reports[0]) != 26 or len(outputs[0]) != 40:
+            print(f"❌ Files around the failure were not all cleaned: {reports[0]}")
+            return False
+        print("✅ --jobs output matches a serial run!")
+        return True
+    except Exception as e:
+        print(f"❌ Error testing parallel jobs: {e}")
+        return False
+
+def test_small_jobs_stay_serial():
+    """Test that --jobs cleans small inputs without starting a process pool."""
+    print("\nTesting --jobs on small inputs...")
+
+    try:
+        import concurrent.futures
+        import importlib.util
+        import os
+        import sys
+        import tempfile
+
+        bin_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bin')
+        if bin_dir not in sys.path:
+            sys.path.insert(0, bin_dir)
+        spec = importlib.util.spec_from_file_location('cleanup_text_cli',
+                                                      os.path.join(bin_dir, 'cleanup-text.py'))
+        cli = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(cli)
+
+        class NoPool:
+            def __init__(self, *args, **kwargs):
+                raise AssertionError("a process pool was started")
+
+        with tempfile.TemporaryDirectory() as directory:
+            paths = []
+            for index in range(4):
+                paths.append(os.path.join(directory, f'f{index}.txt'))
+                with open(paths[-1], 'w', encoding='utf-8') as f:
+                    f.write(f'“{index}”\n')
+
+            if len(cli.make_batches(paths, 8)) != 1:
+                print(f"❌ Small inputs split into batches: {cli.make_batches(paths, 8)}")
+                return False
+            pool = concurrent.futures.ProcessPoolExecutor
+            concurrent.futures.ProcessPoolExecutor = NoPool
+            try:
+                results = list(cli.clean_files(paths, jobs=8))
+            finally:
+                concurrent.futures.ProcessPoolExecutor = pool
+
+        if [status for status, *_ in results] != [cli.CLEANED] * 4:
+            print(f"❌ Unexpected results: {results}")
+            return False
+        print("✅ Small inputs are cleaned serially!")
+        return True
+    except Exception as e:
+        print(f"❌ Error testing --jobs on small inputs: {e}")
+        return False
+
+def test_recursive_manifest():
+    """Test that --recursive skips unchanged files and re-cleans modified ones."""
+    print("\nTesting the --recursive manifest...")
+
+    try:
+        import json
+        import os
+        import tempfile
+
+        def counts(stdout):
+            summary = stdout.splitlines()[-1]
+            return [int(summary.split(f' {word}')[0].split()[-1])
+                    for word in ('cleaned', 'unchanged')]
+
+        with tempfile.TemporaryDirectory() as directory:
+            a = os.path.join(directory, 'a.txt')
+            with open(a, 'w', encoding='utf-8') as f:
+                f.write('“a”\n')
+            with open(os.path.join(directory, 'b.txt'), 'w', encoding='utf-8') as f:
+                f.write('—b—\n')
+
+            runs = [counts(run_cleanup_text(['-r', '.'], directory)[1])]
+            runs.append(counts(run_cleanup_text(['-r', '.'], directory)[1]))
+
+            # Only the mtime moves: the hash matches, and the record is refreshed
+            os.utime(a, ns=(1, 1_000_000_000))
+            runs.append(counts(run_cleanup_text(['-r', '.'], directory)[1]))
+            with open(os.path.join(directory, '.unicodefix-manifest.json')) as f:
+                refreshed = json.load(f)['files']['a.txt']['mtime_ns'] == 1_000_000_000
+
+            with open(a, 'w', encoding='utf-8') as f:
+                f.write('“a” changed\n')
+            runs.append(counts(run_cleanup_text(['-r', '.'], directory)[1]))
+            with open(os.path.join(directory, 'a.clean.txt'), encoding='utf-8') as f:
+                output = f.read()
+
+            runs.append(counts(run_cleanup_text(['-r', '.', '--transliterate'], directory)[1]))
+
+        if runs != [[2, 0], [0, 2], [0, 2], [1, 1], [2, 0]]:
+            print(f"❌ Unexpected cleaned/unchanged counts: {runs}")
+            return False
+        if not refreshed or output != '"a" changed\n':
+            print(f"❌ Manifest not refreshed or output stale: {refreshed} {output!r}")
+            return False
+        print("✅ The manifest skips unchanged files and re-cleans modified ones!")
+        return True
+    except Exception as e:
+        print(f"❌ Error testing the --recursive manifest: {e}")
+        return False
+
+def test_noop_manifest():
+    """Test that a --no-op skip run does not make a later run skip writing outputs."""
+    print("\nTesting --no-op with the --recursive manifest...")
+
+    try:
+        import os
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, 'b.txt'), 'w') as f:
+                f.write('already clean\n')
+            run_cleanup_text(['-r', '.', '--no-op', 'skip'], directory)
+            skipped = os.path.exists(os.path.join(directory, 'b.clean.txt'))
+            _, stdout, _ = run_cleanup_text(['-r', '.'], directory)
+            written = os.path.exists(os.path.join(directory, 'b.clean.txt'))
+
+        if skipped or not written or '0 unchanged' not in stdout:
+            print(f"❌ Output not written after a --no-op skip run: {stdout}")
+            return False
+        print("✅ Changing --no-op invalidates the manifest!")
+        return True
+    except Exception as e:
+        print(f"❌ Error testing --no-op with the manifest: {e}")
+        return False
+
+def test_benchmark_corpora():
+    """Test that benchmark corpora are reproducible and have the requested mix."""
+    print("\nTesting benchmark corpora...")
+
+    try:
+        from benchmark import CORPORA, generate_corpus
+        from bin.cleanup_text_module import clean_text
+
+        for kind in CORPORA:
+            text = generate_corpus(kind, 5000, seed=1)
+            if len(text) != 5000 or text != generate_corpus(kind, 5000, seed=1):
+                print(f"❌ Corpus {kind} is not reproducible")
+                return False
+            cleaned = clean_text(text, transliterate=kind == 'international')
+            if kind == 'ascii' and not text.isascii() or kind != 'ascii' and cleaned == text:
+                print(f"❌ Corpus {kind} has the wrong mix")
+                return False
+        print("✅ Benchmark corpora are reproducible!")
+        return True
+    except Exception as e:
+        print(f"❌ Error testing benchmark corpora: {e}")
+        return False
+
 def test_web_imports():
     """Test if we can import web dependencies."""
     print("\nTesting web dependencies...")
@@ -49,6 +631,721 @@ def test_basic_web_app():
         print(f"❌ Error testing web app: {e}")
         return False
 
+def test_cleaning_pool():
+    """Test inline versus pooled cleaning and the 503 when the pool is saturated."""
+    print("\nTesting CleaningPool...")
+
+    try:
+        import asyncio
+        import threading
+        import web_app
+        from fastapi.testclient import TestClient
+        from web_app import CleaningPool, ServerBusyError
+
+        pool = CleaningPool(kind="thread", workers=1, inline_limit=10, max_pending=1)
+        release = threading.Event()
+
+        def blocked():
+            release.wait(5)
+            return threading.current_thread().name
+
+        async def scenario():
+            inline = await pool.run(5, lambda: threading.current_thread().name)
+            job = asyncio.ensure_future(pool.run(100, blocked))
+            await asyncio.sleep(0.05)
+            try:
+                await pool.run(100, blocked)
+                busy = False
+            except ServerBusyError:
+                busy = True
+            release.set()
+            return inline, await job, busy
+
+        try:
+            inline, pooled, busy = asyncio.run(scenario())
+        finally:
+            release.set()
+            pool.shutdown()
+        if inline != threading.current_thread().name or not pooled.startswith(
+                "unicodefix-clean") or not busy:
+            print(f"❌ Unexpected dispatch: {inline} {pooled} busy={busy}")
+            return False
+
+        saved = web_app.cleaning_pool
+        web_app.cleaning_pool = CleaningPool(kind="thread", workers=1, inline_limit=10,
+                                             max_pending=0)
+        try:
+            client = TestClient(web_app.app)
+            small = client.post("/api/clean-text", json={"text": "“q”"})
+            large = client.post("/api/clean-text", json={"text": "“q”" * 100})
+        finally:
+            web_app.cleaning_pool.shutdown()
+            web_app.cleaning_pool = saved
+        if small.status_code != 200 or large.status_code != 503 or (
+                large.headers.get("retry-after") != "1"):
+            print(f"❌ Unexpected responses: {small.status_code} {large.status_code} "
+                  f"{dict(large.headers)}")
+            return False
+        print("✅ CleaningPool dispatches and sheds load correctly!")
+        return True
+    except Exception as e:
+        print(f"❌ Error testing CleaningPool: {e}")
+        return False
+
+def test_result_cache():
+    """Test the byte-bounded LRU result cache."""
+    print("\nTesting ResultCache...")
+
+    try:
+        import asyncio
+        import tempfile
+        import threading
+        from bin.cleanup_text_module import clean_text_with_stats
+        from web_app import ResultCache
+
+        cache = ResultCache(max_bytes=8 * 1024)
+        texts = [f'\u201Cdoc {i}\u201D ' + 'x' * 200 for i in range(40)]
+        for text in texts:
+            cache.put(cache.key(text), clean_text_with_stats(text))
+        stats = cache.stats()
+        if cache.bytes > cache.max_bytes or not stats['evictions']:
+            print(f"❌ Cache not bounded: {stats}")
+            return False
+        if cache.get(cache.key(texts[-1])) != clean_text_with_stats(texts[-1]):
+            print("❌ Recent entry not cached")
+            return False
+        if cache.get(cache.key(texts[0])) is not None:
+            print("❌ Least recently used entry not evicted")
+            return False
+
+        with tempfile.TemporaryDirectory() as tmp:
+            key = cache.key(texts[0])
+            result = clean_text_with_stats(texts[0])
+            writer = ResultCache(directory=tmp)
+            asyncio.run(writer.put_many([(key, result)]))
+            writer.close()
+            cache = ResultCache(directory=tmp)
+            threads = []
+            disk_get = cache._disk.get
+            cache._disk.get = lambda key: threads.append(threading.current_thread()) or disk_get(key)
+            found = asyncio.run(cache.get_many([key, None, cache.key("missing")]))
+            if found != [result, None, None] or (cache.disk_hits, cache.misses) != (1, 1):
+                print(f"❌ Disk store lookup failed: {found} {cache.stats()}")
+                return False
+            if threads != [threads[0]] * 2 or threads[0] is threading.main_thread():
+                print("❌ Disk store read on the event loop's thread")
+                return False
+
+            db = cache._disk._db
+            db.execute("UPDATE results SET used = 0")
+            cache._disk.get(key)
+            touched = db.execute("SELECT used FROM results").fetchone()[0]
+            cache._disk.get(key)
+            if not touched or db.execute("SELECT used FROM results").fetchone()[0] != touched:
+                print("❌ Disk store uses not recorded, or recorded on every hit")
+                return False
+            cache.close()
+        print("✅ ResultCache works correctly!")
+        return True
+    except Exception as e:
+        print(f"❌ Error testing ResultCache: {e}")
+        return False
+
+def test_metrics():
+    """Test the Prometheus metrics rendering."""
+    print("\nTesting Metrics...")
+
+    try:
+        import os
+        import subprocess
+        import sys
+        import tempfile
+        from web_app import CleaningPool, Metrics, ResultCache
+
+        metrics = Metrics()
+        metrics.observe_request("POST", "/api/clean-text", 200, 0.003, 40, 200)
+        metrics.observe_request("POST", "/api/clean-text", 200, 0.2, 40, 200)
+        metrics.record_cleaning({'quotes': 2, 'dashes': 1}, documents=2)
+        text = metrics.render(CleaningPool(), ResultCache())
+        expected = [
+            'unicodefix_http_requests_total{method="POST",path="/api/clean-text",status="200"} 2',
+            'unicodefix_http_request_duration_seconds_bucket{path="/api/clean-text",le="0.005"} 1',
+            'unicodefix_http_request_duration_seconds_bucket{path="/api/clean-text",le="+Inf"} 2',
+            'unicodefix_documents_cleaned_total 2',
+            'unicodefix_replacements_total{rule="quotes"} 2',
+            'unicodefix_pool_pending 0',
+        ]
+        missing = [line for line in expected if line not in text.splitlines()]
+        if missing:
+            print(f"❌ Missing metrics: {missing}")
+            return False
+
+        # Totals over the workers sharing a directory, including one that has exited
+        exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+        exited.wait()
+        with tempfile.TemporaryDirectory() as tmp:
+            other = Metrics()
+            other.observe_request("POST", "/api/clean-text", 200, 0.003, 40, 200)
+            other.record_cleaning({'quotes': 1})
+            other.share(tmp)
+            snapshot = other.snapshot(CleaningPool(max_pending=5), ResultCache())
+            other.save({**snapshot, "pid": exited.pid})
+            os.rename(os.path.join(tmp, f"worker-{os.getpid()}.json"),
+                      os.path.join(tmp, f"worker-{exited.pid}.json"))
+            metrics.share(tmp)
+            lines = metrics.render(CleaningPool(), ResultCache()).splitlines()
+        expected = [
+            'unicodefix_http_requests_total{method="POST",path="/api/clean-text",status="200"} 3',
+            'unicodefix_http_request_duration_seconds_bucket{path="/api/clean-text",le="0.005"} 2',
+            'unicodefix_documents_cleaned_total 3',
+            'unicodefix_replacements_total{rule="quotes"} 3',
+            'unicodefix_pool_max_pending 16',
+        ]
+        missing = [line for line in expected if line not in lines]
+        if missing:
+            print(f"❌ Missing aggregated metrics: {missing}")
+            return False
+        print("✅ Metrics render correctly!")
+        return True
+    except Exception as e:
+        print(f"❌ Error testing Metrics: {e}")
+        return False
+
+def test_compression():
+    """Test request decompression limits and response compression helpers."""
+    print("\nTesting compression...")
+
+    try:
+        import gzip
+        import io
+        from fastapi import HTTPException
+        from web_app import (Compressor, Decompressor, DecompressingReader, choose_encoding,
+                             load_zstd)
+
+        data = ('\u201Cline\u201D \u2014 text\n' * 5000).encode('utf-8')
+        compressor = Compressor('gzip')
+        compressed = compressor.compress(data[:1000]) + compressor.compress(data[1000:], final=True)
+        decompressor = Decompressor('gzip', len(data))
+        result = decompressor.decompress(compressed[:500]) + decompressor.decompress(compressed[500:])
+        decompressor.finish()
+        if result != data:
+            print("❌ gzip round trip failed")
+            return False
+
+        reader = DecompressingReader(io.BytesIO(gzip.compress(data) * 2), 'gzip', 2 * len(data))
+        if reader.read(10) != data[:10] or reader.seek(0) != 0 or reader.read() != data * 2:
+            print("❌ DecompressingReader returned wrong data")
+            return False
+
+        for body, status in ((gzip.compress(data), 413), (gzip.compress(data)[:-8], 400)):
+            try:
+                decompressor = Decompressor('gzip', len(data) - 1 if status == 413 else len(data))
+                decompressor.decompress(body)
+                decompressor.finish()
+                print(f"❌ Expected HTTP {status}")
+                return False
+            except HTTPException as e:
+                if e.status_code != status:
+                    print(f"❌ Expected HTTP {status}, got {e.status_code}")
+                    return False
+
+        zstd = 'zstd' if load_zstd() is not None else 'gzip'
+        cases = {'gzip, deflate': 'gzip', 'identity': None, 'gzip;q=0': None,
+                 '*': zstd, 'zstd;q=0.5, gzip': 'gzip', 'gzip, zstd': zstd}
+        for header, expected in cases.items():
+            if choose_encoding(header) != expected:
+                print(f"❌ Accept-Encoding {header!r} chose {choose_encoding(header)}")
+                return False
+        print("✅ Compression works correctly!")
+        return True
+    except Exception as e:
+        print(f"❌ Error testing compression: {e}")
+        return False
+
+def test_stream_endpoint():
+    """Test that /api/clean-file/stream returns the cleaned file under any upload name."""
+    print("\nTesting streaming file cleaning...")
+
+    try:
+        import gzip
+        from fastapi.testclient import TestClient
+        from web_app import app
+
+        client = TestClient(app)
+        text = "“quoted” — dash  \n"
+        for name, body in (("文件.txt", text.encode("utf-8")),
+                           ('a "b"\r\nX-Injected: 1.txt.gz', gzip.compress(text.encode("utf-8")))):
+            response = client.post("/api/clean-file/stream",
+                                   files={"file": (name, body, "text/plain")})
+            if response.status_code != 200 or response.content != b'"quoted" - dash\n':
+                print(f"❌ Streaming {name!r} failed: {response.status_code} {response.content!r}")
+                return False
+            if "x-injected" in response.headers or response.headers["x-unicodefix-changes-made"] == "0":
+                print(f"❌ Wrong headers for {name!r}: {dict(response.headers)}")
+                return False
+        disposition = client.post("/api/clean-file/stream", files={
+            "file": ("文件.txt", b"x\n", "text/plain")}).headers["content-disposition"]
+        if disposition != "attachment; filename=\"__.clean.txt\"; filename*=UTF-8''%E6%96%87%E4%BB%B6.clean.txt":
+            print(f"❌ Wrong Content-Disposition: {disposition}")
+            return False
+        print("✅ Streaming file cleaning works correctly!")
+        return True
+    except Exception as e:
+        print(f"❌ Error testing streaming file cleaning: {e}")
+        return False
+
+def test_clean_batch():
+    """Test /api/clean-batch with gzip NDJSON bodies, intact and corrupt."""
+    print("\nTesting batch cleaning...")
+
+    try:
+        import gzip
+        import json
+        from fastapi.testclient import TestClient
+        from web_app import app
+
+        client = TestClient(app)
+        headers = {"Content-Type": "application/x-ndjson", "Content-Encoding": "gzip"}
+        lines = [json.dumps({"id": i, "text": f"“doc {i}”"}) for i in range(2000)]
+        body = gzip.compress("\n".join(lines).encode("utf-8"))
+
+        response = client.post("/api/clean-batch", content=body, headers=headers)
+        results = [json.loads(line) for line in response.text.splitlines()]
+        if (response.status_code != 200 or results[0]["cleaned_text"] != '"doc 0"'
+                or results[-1] != {"summary": results[-1]["summary"]}
+                or results[-1]["summary"]["documents"] != 2000):
+            print(f"❌ Unexpected batch response: {response.status_code} {response.text[-200:]}")
+            return False
+
+        # Truncated and corrupted in the middle: both only fail once streaming has begun
+        for broken in (body[:-8], body[:len(body) // 2] + b"\xff" * 64 + body[len(body) // 2:]):
+            response = client.post("/api/clean-batch", content=broken, headers=headers)
+            results = [json.loads(line) for line in response.text.splitlines()]
+            if (response.status_code != 200 or results[-1].get("success") is not False
+                    or not results[-1].get("error")
+                    or any("summary" in result for result in results)):
+                print(f"❌ Corrupt body not reported in the stream: {response.status_code} "
+                      f"{response.text[-200:]}")
+                return False
+
+        print("✅ Batch cleaning works correctly!")
+        return True
+    except Exception as e:
+        print(f"❌ Error testing batch cleaning: {e}")
+        return False
+
+def test_live_document():
+    """Test that live edits re-clean to the same result as cleaning the whole text."""
+    print("\nTesting LiveDocument...")
+
+    try:
+        import asyncio
+        import random
+        from bin.cleanup_text_module import clean_text_with_stats
+        from web_app import LINE_RE, LiveDocument
+
+        pieces = ['a', ' ', '\t', '\n', '\r', '\r\n', '\u201C', '\u2014', '\u200B', '\u00A0', '\u00E9']
+        rng = random.Random(3)
+
+        async def edit_randomly():
+            document = LiveDocument()
+            text = ''
+            cleaned = []
+            for _ in range(500):
+                lines = LINE_RE.findall(text)
+                start = rng.randint(0, len(lines))
+                end = rng.randint(start, len(lines))
+                insert = ''.join(rng.choice(pieces) for _ in range(rng.randint(0, 6)))
+                first, last, new_lines = document.region(start, end, insert)
+                await document.replace(first, last, new_lines)
+                cleaned[first:last] = document.cleaned[first:first + len(new_lines)]
+                text = ''.join(lines[:start]) + insert + ''.join(lines[end:])
+                expected, stats = clean_text_with_stats(text)
+                if ''.join(cleaned) != expected or document.changes() != stats:
+                    return f"{text!r} cleaned to {''.join(cleaned)!r}"
+            return None
+
+        error = asyncio.run(edit_randomly())
+        if error:
+            print(f"❌ Live edits differ: {error}")
+            return False
+        print("✅ LiveDocument edits match full cleaning!")
+        return True
+    except Exception as e:
+        print(f"❌ Error testing LiveDocument: {e}")
+        return False
+
+def test_archive_cleaning():
+    """Test that archives are cleaned member by member, binary members untouched."""
+    print("\nTesting archive cleaning...")
+
+    try:
+        import io
+        import tarfile
+        import zipfile
+        from bin.cleanup_archive import (ALREADY_CLEAN, BINARY, CLEANED, ArchiveError,
+                                         clean_archive)
+        from fastapi.testclient import TestClient
+        from web_app import app
+
+        members = {
+            "docs/a.txt": "\u201cquoted\u201d \u2014 dash  \r\n".encode("utf-8"),
+            "docs/b.txt": "caf\xe9 \u201cq\u201d\n".encode("cp1252"),
+            "docs/c.txt": b"plain\n",
+            "logo.png": b"\x89PNG\r\n\x1a\n\x00\x00\xe2\x80\x9c",
+        }
+        expected = {
+            "docs/a.txt": (CLEANED, b'"quoted" - dash\n'),
+            "docs/b.txt": (CLEANED, 'caf\xe9 "q"\n'.encode("utf-8")),
+            "docs/c.txt": (ALREADY_CLEAN, b"plain\n"),
+            "logo.png": (BINARY, members["logo.png"]),
+        }
+
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as z:
+            for name, data in members.items():
+                z.writestr(name, data)
+        zipped = archive.getvalue()
+        for jobs in (1, 2):
+            output = io.BytesIO()
+            results = clean_archive(io.BytesIO(archive.getvalue()), output, ".zip", jobs)
+            statuses = {r["name"]: r["status"] for r in results}
+            with zipfile.ZipFile(output) as z:
+                contents = {name: z.read(name) for name in z.namelist()}
+            if list(contents) != list(members) or any(
+                    (statuses[name], contents[name]) != expected[name] for name in members):
+                print(f"❌ Zip cleaned wrongly (jobs={jobs}): {statuses} {contents}")
+                return False
+
+        archive = io.BytesIO()
+        with tarfile.open(fileobj=archive, mode="w:gz") as t:
+            for name, data in members.items():
+                info = tarfile.TarInfo(name)
+                info.size, info.mode, info.mtime = len(data), 0o600, 1234567890
+                t.addfile(info, io.BytesIO(data))
+        response = TestClient(app).post("/api/clean-archive",
+                                        files={"file": ("bundle.tar.gz", archive.getvalue())})
+        if (response.status_code != 200
+                or response.headers["x-unicodefix-members-cleaned"] != "2"
+                or 'filename="bundle.clean.tar.gz"' not in response.headers["content-disposition"]):
+            print(f"❌ Unexpected archive response: {response.status_code} {response.headers}")
+            return False
+        with tarfile.open(fileobj=io.BytesIO(response.content)) as t:
+            for info in t:
+                if (t.extractfile(info).read() != expected[info.name][1]
+                        or (info.mode, info.mtime) != (0o600, 1234567890)):
+                    print(f"❌ Tar member {info.name} cleaned wrongly")
+                    return False
+
+        response = TestClient(app).post("/api/clean-archive",
+                                        files={"file": ("bundle.zip", b"not a zip")})
+        if response.status_code != 400:
+            print(f"❌ Broken archive gave {response.status_code}, expected 400")
+            return False
+
+        response = TestClient(app).post("/api/clean-archive",
+                                        files={"file": ("文件.zip", zipped)})
+        if (response.status_code != 200 or "filename*=UTF-8''%E6%96%87%E4%BB%B6.clean.zip"
+                not in response.headers["content-disposition"]):
+            print(f"❌ Non-ASCII archive name gave {response.status_code} {response.headers}")
+            return False
+
+        class FailingWriter(io.BytesIO):
+            failed = False
+
+            def write(self, data):
+                if not self.failed:
+                    self.failed = True
+                    raise OSError(28, "No space left on device")
+                return super().write(data)
+
+        try:
+            clean_archive(io.BytesIO(zipped), FailingWriter(), ".zip")
+            print("❌ Writing to a full disk succeeded")
+            return False
+        except ArchiveError:
+            print("❌ A write error was reported as a broken archive")
+            return False
+        except OSError:
+            pass
+
+        print("✅ Archive cleaning works correctly!")
+        return True
+    except Exception as e:
+        print(f"❌ Error testing archive cleaning: {e}")
+        return False
+
+def test_edit_report():
+    """Test that edits are recorded with their positions and rebuild the output."""
+    print("\nTesting edit reports...")
+
+    try:
+        import io
+        import json
+        import os
+        import tempfile
+        from bin.cleanup_text_module import (EditLog, clean_stream_with_edits, clean_text,
+                                             clean_text_with_edits)
+        from fastapi.testclient import TestClient
+        from web_app import app
+
+        text = "a\u201cb\u201d \r\nx\u200by\u00a0\n\u2014\u2014 \t\rend"
+        cleaned, stats, edits = clean_text_with_edits(text)
+        if cleaned != clean_text(text) or stats["quotes"] != 2:
+            print(f"❌ Unexpected result: {cleaned!r} {stats}")
+            return False
+        if list(edits)[:2] != [(1, 1, 2, "quotes", "\u201c", '"'),
+                               (3, 1, 4, "quotes", "\u201d", '"')]:
+            print(f"❌ Unexpected edits: {list(edits)}")
+            return False
+
+        # Applying the edits to the input gives the output
+        pieces, position = [], 0
+        for offset, _, _, _, original, replacement in edits:
+            pieces += (text[position:offset], replacement)
+            position = offset + len(original)
+        if "".join(pieces) + text[position:] != cleaned:
+            print(f"❌ Edits do not rebuild the output: {list(edits)}")
+            return False
+
+        data = edits.to_dict()
+        if list(EditLog.from_dict(data)) != list(edits) or data["count"] != len(edits):
+            print(f"❌ Edit log does not round-trip: {data}")
+            return False
+
+        output = io.StringIO()
+        streamed = EditLog()
+        for _ in clean_stream_with_edits(io.StringIO(text), output, 4, False, streamed):
+            pass
+        if output.getvalue() != cleaned or list(streamed) != list(edits):
+            print(f"❌ Streamed edits differ: {list(streamed)}")
+            return False
+
+        response = TestClient(app).post("/api/clean-text", json={"text": text, "report": True})
+        if response.status_code != 200 or response.json()["edits"] != data:
+            print(f"❌ Unexpected API response: {response.status_code} {response.text}")
+            return False
+
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "notes.txt"), "wb") as f:
+                f.write(text.encode("utf-8"))
+            status, stdout, _ = run_cleanup_text(
+                ["--check", "--report", "--report-format", "jsonl", "notes.txt"], tmp)
+            records = [json.loads(line) for line in stdout.splitlines()]
+            if status != 1 or [record["edits"] for record in records] != [data]:
+                print(f"❌ Unexpected --report-format jsonl output: {status} {stdout!r}")
+                return False
+            status, stdout, _ = run_cleanup_text(["--check", "--report", "notes.txt"], tmp)
+            if status != 1 or not stdout.startswith("notes.txt:1:2: quotes: U+201C"):
+                print(f"❌ Unexpected --report output: {status} {stdout!r}")
+                return False
+            if run_cleanup_text(["--report-format", "jsonl", "notes.txt"], tmp)[0] != 2:
+                print("❌ --report-format accepted without --report")
+                return False
+
+        print("✅ Edit reports work correctly!")
+        return True
+    except Exception as e:
+        print(f"❌ Error testing edit reports: {e}")
+        return False
+
+def test_production_server():
+    """Test the production server's settings, preloading and fork-safe cache."""
+    print("\nTesting production server setup...")
+
+    try:
+        import os
+        import tempfile
+        from bin import cleanup_text_module
+        import web_server
+        from web_app import DiskResultStore
+
+        saved = {name: os.environ.get(name) for name in ("UNICODEFIX_PORT", "UNICODEFIX_BACKLOG")}
+        os.environ.update(UNICODEFIX_PORT="8123", UNICODEFIX_BACKLOG="512")
+        try:
+            args = web_server.build_parser(workers=1).parse_args(["--keep-alive", "75"])
+        finally:
+            for name, value in saved.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+        if (args.port, args.backlog, args.workers, args.keep_alive) != (8123, 512, 1, 75):
+            print(f"❌ Unexpected settings: {args}")
+            return False
+
+        web_server.preload()
+        if cleanup_text_module._transliteration_table is None:
+            print("❌ Transliteration table not built by preload()")
+            return False
+
+        if hasattr(os, "fork"):
+            with tempfile.TemporaryDirectory() as directory:
+                store = DiskResultStore(directory, 1024 * 1024)
+                store.put(b"key", ("cleaned", {"quotes": 1}))
+                pid = os.fork()
+                if pid == 0:
+                    # A forked worker must get its own connection
+                    own = store._db is not store._inherited[0]
+                    os._exit(0 if own and store.get(b"key") == ("cleaned", {"quotes": 1}) else 1)
+                _, status = os.waitpid(pid, 0)
+                store.close()
+                if status != 0:
+                    print("❌ Cache connection not reopened after fork")
+                    return False
+
+        print("✅ Production server setup works correctly!")
+        return True
+    except Exception as e:
+        print(f"❌ Error testing production server: {e}")
+        return False
+
+def test_cleanup_daemon():
+    """Test forwarding an invocation to the cleanup daemon over a socket pair."""
+    print("\nTesting cleanup daemon forwarding...")
+
+    try:
+        import io
+        import socket
+        import sys
+        import threading
+        from bin import cleanup_daemon
+
+        if not hasattr(socket, 'AF_UNIX'):
+            print("✅ Skipped (no Unix sockets on this platform)")
+            return True
+
+        def fake_main():
+            data = sys.stdin.buffer.read()
+            print(' '.join(sys.argv[1:]))
+            sys.stdout.buffer.write(data.upper())
+            sys.exit(3)
+
+        def handle(channel):
+            status = cleanup_daemon._run_request(channel, fake_main)
+            channel.send(cleanup_daemon.EXIT, str(status).encode('ascii'))
+
+        server, client = socket.socketpair()
+        connect = cleanup_daemon._connect
+        streams = (sys.stdin, sys.stdout)
+        stdin = io.TextIOWrapper(io.BytesIO(b'piped input'))
+        stdout = io.TextIOWrapper(io.BytesIO())
+        cleanup_daemon._connect = lambda: cleanup_daemon.SocketChannel(client)
+        sys.stdin, sys.stdout = stdin, stdout
+        thread = threading.Thread(target=handle, args=(cleanup_daemon.SocketChannel(server),))
+        thread.start()
+        try:
+            status = cleanup_daemon.forward(['-p', 'file.txt'])
+        finally:
+            thread.join()
+            server.close()
+            cleanup_daemon._connect = connect
+            sys.stdin, sys.stdout = streams
+
+        output = stdout.buffer.getvalue()
+        if status != 3 or output != b'-p file.txt\nPIPED INPUT':
+            print(f"❌ Unexpected result: {status} {output!r}")
+            return False
+        print("✅ Daemon forwards arguments, input, output and exit status!")
+        return True
+    except Exception as e:
+        print(f"❌ Error testing cleanup daemon: {e}")
+        return False
+
+def test_daemon_server():
+    """Test that the daemon serves clients concurrently and stops cleanly on SIGTERM."""
+    print("\nTesting cleanup daemon server...")
+
+    try:
+        import os
+        import signal
+        import socket
+        import subprocess
+        import sys
+        import tempfile
+        import time
+
+        if not hasattr(socket, 'AF_UNIX') or not hasattr(os, 'fork'):
+            print("✅ Skipped (no Unix sockets or fork() on this platform)")
+            return True
+
+        bin_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bin')
+        # A main() that holds "slow" invocations until a release file appears
+        daemon_script = (
+            "import os, sys, time\n"
+            f"sys.path.insert(0, {bin_dir!r})\n"
+            "import cleanup_daemon\n"
+            "def main():\n"
+            "    if sys.argv[1] == 'slow':\n"
+            "        open('started', 'w').close()\n"
+            "        while not os.path.exists('release'):\n"
+            "            time.sleep(0.01)\n"
+            "    print(sys.argv[1])\n"
+            "cleanup_daemon.serve(main, lambda argv: argv != ['stdin'])\n"
+        )
+        client_script = (
+            "import sys\n"
+            f"sys.path.insert(0, {bin_dir!r})\n"
+            "import cleanup_daemon\n"
+            "status = cleanup_daemon.forward(sys.argv[1:])\n"
+            "print('local' if status is None else status)\n"
+        )
+
+        def wait_for(condition):
+            deadline = time.monotonic() + 10
+            while not condition():
+                if time.monotonic() > deadline:
+                    raise TimeoutError("timed out")
+                time.sleep(0.02)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            address = os.path.join(tmp, 'daemon.sock')
+            env = dict(os.environ, UNICODEFIX_DAEMON_ADDRESS=address)
+
+            def client(*args):
+                return subprocess.Popen([sys.executable, '-c', client_script, *args], cwd=tmp,
+                                        env=env, stdout=subprocess.PIPE, text=True)
+
+            daemon = subprocess.Popen([sys.executable, '-c', daemon_script], cwd=tmp, env=env,
+                                      stdout=subprocess.PIPE, text=True)
+            try:
+                wait_for(lambda: os.path.exists(address))
+                slow = client('slow')
+                wait_for(lambda: os.path.exists(os.path.join(tmp, 'started')))
+                fast_output = client('fast').communicate(timeout=10)[0]
+                local_output = client('stdin').communicate(timeout=10)[0]
+                if fast_output != 'fast\n0\n' or slow.poll() is not None:
+                    print(f"❌ A second client waited for the first: {fast_output!r}")
+                    return False
+                if local_output != 'local\n':
+                    print(f"❌ Turned-down invocation not sent back: {local_output!r}")
+                    return False
+
+                daemon.send_signal(signal.SIGTERM)
+                wait_for(lambda: not os.path.exists(address))
+                if daemon.poll() is not None or slow.poll() is not None:
+                    print("❌ SIGTERM did not let the running invocation finish")
+                    return False
+                open(os.path.join(tmp, 'release'), 'w').close()
+                slow_output = slow.communicate(timeout=10)[0]
+                daemon_output = daemon.communicate(timeout=10)[0]
+                if (slow_output != 'slow\n0\n' or daemon.returncode != 0
+                        or not daemon_output.endswith('[i] Cleanup daemon stopped\n')):
+                    print(f"❌ Unclean shutdown: {slow_output!r} {daemon.returncode} "
+                          f"{daemon_output!r}")
+                    return False
+            finally:
+                open(os.path.join(tmp, 'release'), 'w').close()
+                if daemon.poll() is None:
+                    daemon.kill()
+                    daemon.wait()
+
+        print("✅ Daemon serves clients concurrently and shuts down cleanly!")
+        return True
+    except Exception as e:
+        print(f"❌ Error testing cleanup daemon server: {e}")
+        return False
+
 def main():
     """Run all tests."""
     print("🧪 UnicodeFix Web Interface Test")
@@ -56,8 +1353,38 @@ def main():
     
     tests = [
         test_cleanup_module,
+        test_clean_text_rules,
+        test_stream_cleaner,
+        test_needs_cleaning,
+        test_unicode_info,
+        test_clean_text_with_stats,
+        test_transliterate,
+        test_find_issues,
+        test_git_changed_files,
+        test_clean_texts_with_stats,
+        test_clean_bytes,
+        test_clean_byte_stream,
+        test_detect_encoding,
+        test_line_buffered_stream,
+        test_parallel_jobs,
+        test_small_jobs_stay_serial,
+        test_recursive_manifest,
+        test_noop_manifest,
+        test_benchmark_corpora,
         test_web_imports,
-        test_basic_web_app
+        test_basic_web_app,
+        test_cleaning_pool,
+        test_result_cache,
+        test_metrics,
+        test_compression,
+        test_stream_endpoint,
+        test_clean_batch,
+        test_live_document,
+        test_archive_cleaning,
+        test_edit_report,
+        test_production_server,
+        test_cleanup_daemon,
+        test_daemon_server
     ]
     
     passed = 0
@@ -10,19 +10,43 @@ Run with: python web_app.py
 Access at: http://localhost:8000
 """
 
+import asyncio
+import bisect
+import hashlib
+import io
+import json
 import os
+import re
+import sqlite3
+import sys
 import tempfile
+import threading
+import time
+import urllib.parse
+import zlib
+from collections import Counter, OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
-import uvicorn
-from fastapi import FastAPI, File, Form, HTTPException, UploadFile
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import (FastAPI, File, Form, HTTPException, Request, UploadFile, WebSocket,
+                     WebSocketDisconnect)
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from fastapi.routing import APIRoute
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import ClientDisconnect
 
 # Import our existing cleanup functionality
-from bin.cleanup_text_module import clean_text
+from bin.cleanup_text_module import (CHANGE_RULES, ENCODING_SAMPLE_SIZE, EditLog,
+                                     clean_byte_stream, clean_text_with_edits,
+                                     clean_text_with_stats, clean_texts_with_stats,
+                                     detect_encoding, needs_cleaning)
+from bin.cleanup_text_module import preload as preload_engine
+from bin.cleanup_archive import (BINARY, CLEANED, ArchiveError, ArchiveTooLarge, archive_suffix,
+                                 clean_archive)
 
 app = FastAPI(
     title="UnicodeFix Web Interface",
@@ -36,10 +60,80 @@ static_dir.mkdir(exist_ok=True)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 
+# File types accepted by the upload endpoints
+SUPPORTED_EXTENSIONS = ('.txt', '.md', '.text', '.log', '.csv', '.json', '.xml', '.html',
+                        '.css', '.js', '.py', '.php', '.java', '.cpp', '.c', '.h')
+
+# Bytes read per step by the streaming endpoint, and how much cleaned output
+# is kept in memory before it spills to a temporary file
+STREAM_CHUNK_SIZE = 1024 * 1024
+STREAM_SPOOL_SIZE = 8 * 1024 * 1024
+
+# Content types of the cleaned archives returned by /api/clean-archive
+ARCHIVE_MEDIA_TYPES = {
+    ".zip": "application/zip", ".tar": "application/x-tar", ".tar.gz": "application/gzip",
+    ".tgz": "application/gzip", ".tar.bz2": "application/x-bzip2",
+    ".tbz2": "application/x-bzip2", ".tar.xz": "application/x-xz", ".txz": "application/x-xz",
+}
+
+# Batch documents are cleaned in groups of up to this many documents or
+# characters, so results stream out while the rest of the batch is read
+BATCH_GROUP_DOCUMENTS = 1000
+BATCH_GROUP_CHARS = 1024 * 1024
+
+# Bumped whenever cleaning output changes, so stale shared cache files are not reused
+CACHE_VERSION = 2
+CACHE_DB_NAME = "unicodefix-cache.sqlite3"
+
+# A disk cache hit records its use only if the last one is older than this
+# (seconds), so that hits do not each take the database's write lock
+CACHE_TOUCH_SECONDS = 60
+
+# Approximate memory used by a cache entry besides the cleaned text itself
+CACHE_ENTRY_OVERHEAD = 512
+
+# How often (seconds) a worker saves its metrics for the others to report
+METRICS_SAVE_SECONDS = 1.0
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Compression levels for responses: fast settings that still shrink text 4-8x
+GZIP_LEVEL = 5
+ZSTD_LEVEL = 3
+
+# Compressed request bytes decompressed per step, which bounds how far one
+# step can expand before the size cap is checked
+DECOMPRESS_SLICE = 1024
+
+# Response bodies at least this big are compressed on a thread instead of
+# on the event loop
+COMPRESS_THREAD_BYTES = 1024 * 1024
+
+# Response content types worth compressing
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/x-ndjson", "application/javascript",
+                      "application/xml")
+
+# A line up to and including its "\n", or the rest of a text after its last
+# "\n". A "\r" stays inside a line: clean_text() joins it with a "\n" that
+# follows, even with invisible characters removed from between them
+LINE_RE = re.compile(r"[^\n]*\n|[^\n]+")
+
+# WebSocket close codes used by the live-cleaning endpoint
+WS_POLICY_VIOLATION = 1008
+WS_TRY_AGAIN_LATER = 1013
+
+# Content types that select NDJSON input for /api/clean-batch
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl",
+                      "application/x-jsonlines")
+
+
 class TextCleanRequest(BaseModel):
     """Request model for text cleaning."""
     text: str
     preserve_formatting: bool = True
+    transliterate: bool = False
+    report: bool = False
 
 
 class CleanResponse(BaseModel):
@@ -49,23 +143,1016 @@ class CleanResponse(BaseModel):
     original_size: int
     cleaned_size: int
     changes_made: int
+    changes: Optional[Dict[str, int]] = None
+    encoding: Optional[str] = None
+    edits: Optional[dict] = None
     error: Optional[str] = None
 
 
-def count_unicode_changes(original: str, cleaned: str) -> int:
-    """Count the number of Unicode characters that were changed."""
-    changes = 0
-    min_len = min(len(original), len(cleaned))
-    
-    # Count character differences
-    for i in range(min_len):
-        if original[i] != cleaned[i]:
-            changes += 1
-    
-    # Add length difference (removed characters)
-    changes += abs(len(original) - len(cleaned))
-    
-    return changes
+def no_changes() -> Dict[str, int]:
+    """Per-rule change counts for text that was left unchanged."""
+    return dict.fromkeys(CHANGE_RULES, 0)
+
+
+def is_gzip_file(filename: Optional[str]) -> bool:
+    """Whether an uploaded file name marks a gzip-compressed upload."""
+    return bool(filename) and filename.lower().endswith(".gz")
+
+
+def is_supported_file(filename: Optional[str]) -> bool:
+    """Check an uploaded file name, less any ".gz", against SUPPORTED_EXTENSIONS."""
+    if is_gzip_file(filename):
+        filename = filename[:-3]
+    return bool(filename) and filename.lower().endswith(SUPPORTED_EXTENSIONS)
+
+
+def env_int(name: str, default: int, minimum: int = 1) -> int:
+    """Read an integer setting of at least minimum from the environment."""
+    try:
+        value = int(os.environ.get(name, default))
+    except ValueError:
+        return default
+    return value if value >= minimum else default
+
+
+def process_alive(pid: int) -> bool:
+    """Whether the process with this id is still running (Unix)."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:  # running, under another user
+        pass
+    return True
+
+
+class ServerBusyError(Exception):
+    """Raised when the cleaning pool already has its maximum of queued jobs."""
+
+
+class CleaningPool:
+    """
+    Runs CPU-bound cleaning off the event loop on a bounded worker pool.
+
+    Payloads up to inline_limit characters are cleaned inline, where the
+    pool hand-off would cost more than the work. Larger ones go to a thread
+    or process pool so that other requests (including /health) are served
+    meanwhile. At most max_pending jobs may be running or queued; beyond
+    that ServerBusyError is raised and the client gets a 503.
+
+    Configured with the environment variables UNICODEFIX_POOL ("thread" or
+    "process"), UNICODEFIX_POOL_WORKERS, UNICODEFIX_INLINE_LIMIT and
+    UNICODEFIX_MAX_PENDING.
+    """
+
+    def __init__(self, kind: str = "thread", workers: int = 4,
+                 inline_limit: int = 64 * 1024, max_pending: int = 16):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown pool kind: {kind}")
+        self.kind = kind
+        self.workers = workers
+        self.inline_limit = inline_limit
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor: Optional[Executor] = None
+
+    @classmethod
+    def from_env(cls) -> "CleaningPool":
+        """Create a pool configured from UNICODEFIX_* environment variables."""
+        workers = env_int("UNICODEFIX_POOL_WORKERS", os.cpu_count() or 1)
+        return cls(
+            kind=os.environ.get("UNICODEFIX_POOL", "thread"),
+            workers=workers,
+            inline_limit=env_int("UNICODEFIX_INLINE_LIMIT", 64 * 1024),
+            max_pending=env_int("UNICODEFIX_MAX_PENDING", workers * 4),
+        )
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix="unicodefix-clean")
+        return self._executor
+
+    async def run(self, size: int, func, *args):
+        """
+        Run func(*args), inline or on the pool depending on the payload size.
+
+        Args:
+            size (int): Payload size in characters or bytes
+            func: Picklable top-level function doing the CPU-bound work
+            *args: Arguments for func
+
+        Returns:
+            The result of func(*args)
+
+        Raises:
+            ServerBusyError: If max_pending jobs are already queued
+        """
+        if size <= self.inline_limit:
+            return func(*args)
+        if self.pending >= self.max_pending:
+            raise ServerBusyError("Server busy, please retry shortly")
+
+        # Only the event loop thread touches the counter, so no lock is needed
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self.pending -= 1
+
+    async def run_blocking(self, func, *args):
+        """
+        Run blocking file-based work on a thread, within the pending limit.
+
+        File objects cannot be sent to a process pool, so this always uses
+        threads: the pool's own threads, or the event loop's default
+        executor when the pool runs processes.
+
+        Raises:
+            ServerBusyError: If max_pending jobs are already queued
+        """
+        if self.pending >= self.max_pending:
+            raise ServerBusyError("Server busy, please retry shortly")
+
+        self.pending += 1
+        try:
+            executor = self._get_executor() if self.kind == "thread" else None
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, func, *args)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        """Stop the worker pool, if it was started."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+class DiskResultStore:
+    """
+    Cleaning results kept in a SQLite database that processes can share.
+
+    Bounded by the total size of the stored results; when it grows past
+    max_bytes the least recently used results are deleted until it is back
+    under 90% of the limit. Uses are recorded at most every
+    CACHE_TOUCH_SECONDS, so that order is approximate.
+
+    Calls block on the database and may come from several threads at once;
+    the web app makes them off the event loop. A SQLite connection must not
+    be used across fork(), so a worker forked by web_server.py opens its own
+    on first use.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, CACHE_DB_NAME)
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._inherited = []  # connections of the parent process, never used or closed
+        self._connection = self._connect()
+        self._lock = threading.Lock()  # one transaction at a time on the connection
+        self._pid = os.getpid()
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        if self._pid != os.getpid():
+            self._inherited.append(self._connection)
+            self._connection = self._connect()
+            self._lock = threading.Lock()
+            self._pid = os.getpid()
+        return self._connection
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=1, isolation_level=None,
+                             check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("CREATE TABLE IF NOT EXISTS results (key BLOB PRIMARY KEY, "
+                   "value TEXT NOT NULL, size INTEGER NOT NULL, used REAL NOT NULL)")
+        db.execute("CREATE INDEX IF NOT EXISTS results_used ON results (used)")
+        db.execute("CREATE TABLE IF NOT EXISTS meta "
+                   "(id INTEGER PRIMARY KEY CHECK (id = 0), total INTEGER NOT NULL)")
+        db.execute("INSERT OR IGNORE INTO meta VALUES (0, 0)")
+        return db
+
+    def get(self, key: bytes) -> Optional[tuple]:
+        """Return the stored (cleaned text, changes) for key, or None."""
+        db = self._db
+        with self._lock:
+            row = db.execute("SELECT value, used FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if now - row[1] > CACHE_TOUCH_SECONDS:
+                db.execute("UPDATE results SET used = ? WHERE key = ?", (now, key))
+        cleaned_text, changes = json.loads(row[0])
+        return cleaned_text, changes
+
+    def put(self, key: bytes, result: tuple) -> None:
+        """Store a (cleaned text, changes) result, evicting old ones if needed."""
+        value = json.dumps(result, ensure_ascii=False)
+        size = len(value)
+        db = self._db
+        with self._lock:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                inserted = db.execute("INSERT OR IGNORE INTO results VALUES (?, ?, ?, ?)",
+                                      (key, value, size, time.time())).rowcount
+                if inserted:
+                    db.execute("UPDATE meta SET total = total + ?", (size,))
+                    total = db.execute("SELECT total FROM meta").fetchone()[0]
+                    if total > self.max_bytes:
+                        self._evict(total - self.max_bytes * 9 // 10)
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+
+    def _evict(self, needed: int) -> None:
+        freed = 0
+        victims = []
+        for key, size in self._db.execute("SELECT key, size FROM results ORDER BY used"):
+            victims.append((key,))
+            freed += size
+            if freed >= needed:
+                break
+        self._db.executemany("DELETE FROM results WHERE key = ?", victims)
+        self._db.execute("UPDATE meta SET total = total - ?", (freed,))
+        self.evictions += len(victims)
+
+    def close(self) -> None:
+        if self._pid == os.getpid():
+            with self._lock:
+                self._connection.close()
+
+
+class ResultCache:
+    """
+    Content-addressed LRU cache of cleaning results.
+
+    Results are keyed by a BLAKE2 hash of the input text and the cleaning
+    options, and the cache is bounded by the memory its results take rather
+    than by their number; the least recently used are evicted first. Texts
+    longer than an eighth of the budget are not cached.
+
+    With a directory, results are also kept in a DiskResultStore there, so
+    several server processes reuse each other's work: memory is checked
+    first, then disk. get() and put() block on the disk store; the web app
+    uses get_many() and put_many(), which reach it on a worker thread.
+    Configured with the environment variables
+    UNICODEFIX_CACHE_BYTES (0 disables the cache), UNICODEFIX_CACHE_DIR and
+    UNICODEFIX_CACHE_DISK_BYTES.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, directory: Optional[str] = None,
+                 disk_bytes: int = 1024 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_bytes // 8
+        self.bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._disk = DiskResultStore(directory, disk_bytes) if directory and max_bytes else None
+
+    @classmethod
+    def from_env(cls) -> "ResultCache":
+        """Create a cache configured from UNICODEFIX_CACHE_* environment variables."""
+        return cls(
+            max_bytes=env_int("UNICODEFIX_CACHE_BYTES", 64 * 1024 * 1024, minimum=0),
+            directory=os.environ.get("UNICODEFIX_CACHE_DIR") or None,
+            disk_bytes=env_int("UNICODEFIX_CACHE_DISK_BYTES", 1024 * 1024 * 1024),
+        )
+
+    def key(self, text: str, options: tuple = ()) -> Optional[bytes]:
+        """Return the cache key for text and options, or None if it is not cached."""
+        if not self.max_bytes or len(text) > self.max_entry_bytes:
+            return None
+        digest = hashlib.blake2b(repr((CACHE_VERSION, options)).encode(), digest_size=16)
+        digest.update(text.encode("utf-8", "surrogatepass"))
+        return digest.digest()
+
+    def get(self, key: Optional[bytes]) -> Optional[tuple]:
+        """Return a cached (cleaned text, changes) result, or None on a miss."""
+        if key is None:
+            return None
+        result = self._in_memory(key)
+        if result is None:
+            result = self._found([key], self._read_disk([key]))[0]
+        return result
+
+    def put(self, key: Optional[bytes], result: tuple) -> None:
+        """Cache a (cleaned text, changes) result under key."""
+        if key is not None:
+            self._remember(key, result)
+            self._to_disk([(key, result)])
+
+    async def get_many(self, keys: List[Optional[bytes]]) -> List[Optional[tuple]]:
+        """Like get() for each key, reading the disk store on a worker thread."""
+        results = [None if key is None else self._in_memory(key) for key in keys]
+        missed = [index for index, key in enumerate(keys)
+                  if key is not None and results[index] is None]
+        if missed:
+            missed_keys = [keys[index] for index in missed]
+            found = [None] * len(missed)
+            if self._disk is not None:
+                found = await run_in_threadpool(self._read_disk, missed_keys)
+            for index, result in zip(missed, self._found(missed_keys, found)):
+                results[index] = result
+        return results
+
+    async def put_many(self, items: List[Tuple[Optional[bytes], tuple]]) -> None:
+        """Like put() for each (key, result), writing the disk store on a worker thread."""
+        items = [(key, result) for key, result in items if key is not None]
+        for key, result in items:
+            self._remember(key, result)
+        if items and self._disk is not None:
+            await run_in_threadpool(self._to_disk, items)
+
+    def _in_memory(self, key: bytes) -> Optional[tuple]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0], dict(entry[1])
+
+    def _read_disk(self, keys: List[bytes]) -> List[Optional[tuple]]:
+        # Only touches the disk store, so it can run on another thread
+        results = []
+        for key in keys:
+            result = None
+            if self._disk is not None:
+                try:
+                    result = self._disk.get(key)
+                except sqlite3.Error:
+                    pass
+            results.append(result)
+        return results
+
+    def _found(self, keys: List[bytes], results: List[Optional[tuple]]) -> List[Optional[tuple]]:
+        """Count the outcome of looking keys that missed memory up on disk."""
+        for key, result in zip(keys, results):
+            if result is not None:
+                self.disk_hits += 1
+                self._remember(key, result)
+            else:
+                self.misses += 1
+        return results
+
+    def _to_disk(self, items: List[Tuple[bytes, tuple]]) -> None:
+        # Only touches the disk store, so it can run on another thread
+        if self._disk is not None:
+            for key, result in items:
+                try:
+                    self._disk.put(key, result)
+                except sqlite3.Error:
+                    pass
+
+    def _remember(self, key: bytes, result: tuple) -> None:
+        cleaned_text, changes = result
+        size = sys.getsizeof(cleaned_text) + CACHE_ENTRY_OVERHEAD
+        if size > self.max_entry_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.bytes -= old[2]
+        self._entries[key] = (cleaned_text, dict(changes), size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        """Counters and sizes for monitoring."""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "enabled": self.max_bytes > 0,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "disk_evictions": self._disk.evictions if self._disk is not None else 0,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        """Close the disk store, if any."""
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+
+
+class Metrics:
+    """
+    Request and cleaning counters of this server process, for /metrics.
+
+    Everything is updated from the event loop thread only, so recording is a
+    few dictionary increments with no locking; the Prometheus text is built
+    only when /metrics is scraped.
+
+    Worker processes forked by web_server.py share a directory (see share())
+    where each saves a snapshot of its counters, so that whichever worker
+    answers a scrape reports the totals of all of them.
+    """
+
+    def __init__(self):
+        self.requests: Counter = Counter()  # (method, path, status) -> count
+        self.latency: Dict[str, list] = {}  # path -> per-bucket counts, then +Inf
+        self.latency_sum: Counter = Counter()
+        self.bytes_in: Counter = Counter()
+        self.bytes_out: Counter = Counter()
+        self.documents = 0
+        self.replacements = dict.fromkeys(CHANGE_RULES, 0)
+        self.directory: Optional[str] = None
+
+    def observe_request(self, method: str, path: str, status: int, seconds: float,
+                        bytes_in: int, bytes_out: int) -> None:
+        """Record one finished HTTP request."""
+        self.requests[method, path, status] += 1
+        buckets = self.latency.get(path)
+        if buckets is None:
+            buckets = self.latency[path] = [0] * (len(LATENCY_BUCKETS) + 1)
+        buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.latency_sum[path] += seconds
+        self.bytes_in[path] += bytes_in
+        self.bytes_out[path] += bytes_out
+
+    def record_cleaning(self, changes: Optional[Dict[str, int]] = None,
+                        documents: int = 1) -> None:
+        """Record cleaned documents and the per-rule changes made to them."""
+        self.documents += documents
+        if changes:
+            for rule, count in changes.items():
+                self.replacements[rule] += count
+
+    def share(self, directory: str) -> None:
+        """
+        Report totals over every process saving its snapshot in directory.
+
+        Processes that have exited still count, so counters never go down
+        when a worker is replaced; gauges only count the running ones. The
+        directory should start out empty.
+        """
+        self.directory = directory
+
+    def snapshot(self, pool: "CleaningPool", cache: ResultCache) -> dict:
+        """This process's counters and gauges, as JSON-serializable data."""
+        stats = cache.stats()
+        return {
+            "pid": os.getpid(),
+            "requests": [[*key, count] for key, count in self.requests.items()],
+            "latency": {path: list(buckets) for path, buckets in self.latency.items()},
+            "latency_sum": dict(self.latency_sum),
+            "bytes_in": dict(self.bytes_in),
+            "bytes_out": dict(self.bytes_out),
+            "documents": self.documents,
+            "replacements": dict(self.replacements),
+            "cache": {name: stats[name] for name in
+                      ("hits", "disk_hits", "misses", "evictions", "disk_evictions")},
+            "gauges": {"pool_pending": pool.pending, "pool_max_pending": pool.max_pending,
+                       "cache_bytes": stats["bytes"]},
+        }
+
+    def save(self, snapshot: dict) -> None:
+        """Write this process's snapshot to the shared directory (blocking)."""
+        path = os.path.join(self.directory, f"worker-{os.getpid()}.json")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+        # Replaced in one step, so readers never see a partial snapshot
+        os.replace(path + ".tmp", path)
+
+    def gather(self, snapshot: dict) -> list:
+        """Save snapshot, then return it with every other process's (blocking)."""
+        if self.directory is None:
+            return [snapshot]
+        self.save(snapshot)
+        snapshots = [snapshot]
+        own = f"worker-{os.getpid()}.json"
+        for name in os.listdir(self.directory):
+            if name.startswith("worker-") and name.endswith(".json") and name != own:
+                try:
+                    with open(os.path.join(self.directory, name), encoding="utf-8") as f:
+                        snapshots.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+        return snapshots
+
+    def render(self, pool: "CleaningPool", cache: ResultCache,
+               snapshots: Optional[list] = None) -> str:
+        """
+        Format all metrics in the Prometheus text exposition format.
+
+        Args:
+            pool (CleaningPool): This process's cleaning pool
+            cache (ResultCache): This process's result cache
+            snapshots (list): Snapshots to add up, as from gather() (default:
+                gathered here)
+        """
+        if snapshots is None:
+            snapshots = self.gather(self.snapshot(pool, cache))
+        requests, latency_sum, bytes_in, bytes_out = Counter(), Counter(), Counter(), Counter()
+        latency: Dict[str, list] = {}
+        replacements = Counter(dict.fromkeys(CHANGE_RULES, 0))
+        cache_counts, gauges = Counter(), Counter()
+        documents = 0
+        for index, snapshot in enumerate(snapshots):
+            for method, path, status, count in snapshot["requests"]:
+                requests[method, path, status] += count
+            for path, buckets in snapshot["latency"].items():
+                total = latency.setdefault(path, [0] * len(buckets))
+                for bucket, count in enumerate(buckets):
+                    total[bucket] += count
+            latency_sum.update(snapshot["latency_sum"])
+            bytes_in.update(snapshot["bytes_in"])
+            bytes_out.update(snapshot["bytes_out"])
+            documents += snapshot["documents"]
+            replacements.update(snapshot["replacements"])
+            cache_counts.update(snapshot["cache"])
+            if index == 0 or process_alive(snapshot["pid"]):
+                gauges.update(snapshot["gauges"])
+
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP unicodefix_{name} {help_text}")
+            lines.append(f"# TYPE unicodefix_{name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{val}"' for key, val in labels)
+                lines.append(f"unicodefix_{name}{{{label_text}}} {value}" if label_text
+                             else f"unicodefix_{name} {value}")
+
+        metric("http_requests_total", "counter", "HTTP requests handled.",
+               [((("method", method), ("path", path), ("status", status)), count)
+                for (method, path, status), count in sorted(requests.items())])
+
+        lines.append("# HELP unicodefix_http_request_duration_seconds HTTP request latency.")
+        lines.append("# TYPE unicodefix_http_request_duration_seconds histogram")
+        for path, buckets in sorted(latency.items()):
+            total = 0
+            for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), buckets):
+                total += count
+                lines.append(f'unicodefix_http_request_duration_seconds_bucket'
+                             f'{{path="{path}",le="{bound}"}} {total}')
+            lines.append(f'unicodefix_http_request_duration_seconds_sum{{path="{path}"}} '
+                         f'{latency_sum[path]:.6f}')
+            lines.append(f'unicodefix_http_request_duration_seconds_count{{path="{path}"}} '
+                         f'{total}')
+
+        metric("http_request_bytes_total", "counter", "Request body bytes received.",
+               [((("path", path),), count) for path, count in sorted(bytes_in.items())])
+        metric("http_response_bytes_total", "counter", "Response body bytes sent.",
+               [((("path", path),), count) for path, count in sorted(bytes_out.items())])
+        metric("documents_cleaned_total", "counter", "Texts, files and batch documents cleaned.",
+               [((), documents)])
+        metric("replacements_total", "counter", "Changes made, by cleaning rule.",
+               [((("rule", rule),), count) for rule, count in replacements.items()])
+
+        metric("pool_pending", "gauge", "Jobs running or queued on the cleaning pools.",
+               [((), gauges["pool_pending"])])
+        metric("pool_max_pending", "gauge", "Pending jobs allowed before requests get 503.",
+               [((), gauges["pool_max_pending"])])
+
+        lookups = cache_counts["hits"] + cache_counts["disk_hits"] + cache_counts["misses"]
+        hit_rate = (cache_counts["hits"] + cache_counts["disk_hits"]) / lookups if lookups else 0.0
+        metric("cache_hits_total", "counter", "Result cache hits, by tier.",
+               [((("tier", "memory"),), cache_counts["hits"]),
+                ((("tier", "disk"),), cache_counts["disk_hits"])])
+        metric("cache_misses_total", "counter", "Result cache misses.",
+               [((), cache_counts["misses"])])
+        metric("cache_evictions_total", "counter", "Results evicted from the cache, by tier.",
+               [((("tier", "memory"),), cache_counts["evictions"]),
+                ((("tier", "disk"),), cache_counts["disk_evictions"])])
+        metric("cache_bytes", "gauge", "Memory used by cached results.",
+               [((), gauges["cache_bytes"])])
+        metric("cache_hit_ratio", "gauge", "Share of cache lookups that were hits.",
+               [((), f"{hit_rate:.6f}")])
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware that times every HTTP request and counts its body bytes.
+
+    Requests are labelled with their route path; anything that matches no
+    route (static files, 404s) is counted as "other" so that the number of
+    label values stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.paths = None
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+        bytes_in = bytes_out = 0
+
+        async def counting_receive():
+            nonlocal bytes_in
+            message = await receive()
+            bytes_in += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message):
+            nonlocal status, bytes_out
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            else:
+                bytes_out += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            if self.paths is None:
+                self.paths = {route.path for route in app.routes if isinstance(route, APIRoute)}
+            path = scope["path"] if scope["path"] in self.paths else "other"
+            metrics.observe_request(scope["method"], path, status,
+                                    time.perf_counter() - start, bytes_in, bytes_out)
+
+
+_zstd = None
+
+
+def load_zstd():
+    """
+    Import the zstandard package on first use, or return None if it is not installed.
+
+    zstd support is optional; without the package only gzip is accepted and offered.
+    """
+    global _zstd
+    if _zstd is None:
+        try:
+            import zstandard
+        except ImportError:
+            zstandard = False
+        _zstd = zstandard
+    return _zstd or None
+
+
+class Decompressor:
+    """
+    Incremental gzip or zstd decompression with a cap on the total output.
+
+    Input is decompressed DECOMPRESS_SLICE bytes at a time, so a small,
+    highly compressed body cannot expand far past the cap before it is
+    noticed. Concatenated gzip members and zstd frames are all decompressed.
+
+    Raises:
+        HTTPException: 415 for an unsupported encoding, 413 once the output
+            exceeds max_size, 400 for corrupt or truncated data
+    """
+
+    def __init__(self, encoding: str, max_size: int):
+        if encoding in ("gzip", "x-gzip"):
+            self._new = lambda: zlib.decompressobj(zlib.MAX_WBITS | 16)
+            self._errors = (zlib.error,)
+        elif encoding == "zstd" and load_zstd() is not None:
+            zstd = load_zstd()
+            self._new = zstd.ZstdDecompressor().decompressobj
+            self._errors = (zstd.ZstdError,)
+        else:
+            raise HTTPException(status_code=415, detail=f"Unsupported Content-Encoding: {encoding}")
+        self.max_size = max_size
+        self.size = 0
+        self._obj = self._new()
+        self._started = False
+
+    def decompress(self, data: bytes) -> bytes:
+        """Decompress the next piece of input."""
+        output = []
+        try:
+            for start in range(0, len(data), DECOMPRESS_SLICE):
+                piece = data[start:start + DECOMPRESS_SLICE]
+                while piece:
+                    self._started = True
+                    block = self._obj.decompress(piece)
+                    self.size += len(block)
+                    if self.size > self.max_size:
+                        raise HTTPException(status_code=413,
+                                            detail=f"Decompressed body exceeds {self.max_size} bytes")
+                    output.append(block)
+                    # The rest of the piece belongs to the next gzip member or zstd frame
+                    piece = self._obj.unused_data if self._obj.eof else b""
+                    if self._obj.eof:
+                        self._obj = self._new()
+                        self._started = False
+        except self._errors as e:
+            raise HTTPException(status_code=400, detail=f"Could not decompress body: {e}")
+        return b"".join(output)
+
+    def finish(self) -> None:
+        """Check that the input did not stop in the middle of compressed data."""
+        if self._started:
+            raise HTTPException(status_code=400, detail="Compressed body is truncated")
+
+
+class DecompressingReader(io.RawIOBase):
+    """
+    Readable stream of a compressed file's decompressed contents.
+
+    Used for .gz uploads, which are decompressed as they are cleaned. Only
+    rewinding to the start is supported, which starts decompressing anew.
+    """
+
+    def __init__(self, raw, encoding: str, max_size: int):
+        super().__init__()
+        self._raw = raw
+        self._encoding = encoding
+        self._max_size = max_size
+        self.seek(0)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if offset or whence != io.SEEK_SET:
+            raise io.UnsupportedOperation("can only rewind to the start")
+        self._raw.seek(0)
+        self._decompressor = Decompressor(self._encoding, self._max_size)
+        self._buffer = memoryview(b"")
+        self._position = 0
+        self._done = False
+        return 0
+
+    def tell(self) -> int:
+        return self._position
+
+    def readinto(self, buffer) -> int:
+        while not self._buffer and not self._done:
+            data = self._raw.read(STREAM_CHUNK_SIZE // 16)
+            if data:
+                self._buffer = memoryview(self._decompressor.decompress(data))
+            else:
+                self._decompressor.finish()
+                self._done = True
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        self._position += size
+        return size
+
+
+class Compressor:
+    """Incremental gzip or zstd compression, flushed after every chunk."""
+
+    def __init__(self, encoding: str):
+        if encoding == "zstd":
+            zstd = load_zstd()
+            self._obj = zstd.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+            self._flush_mode = zstd.COMPRESSOBJ_FLUSH_BLOCK
+        else:
+            self._obj = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+            self._flush_mode = zlib.Z_SYNC_FLUSH
+
+    def compress(self, data: bytes, final: bool = False) -> bytes:
+        """Compress a chunk; everything given so far can be decompressed from the output."""
+        output = self._obj.compress(data)
+        return output + (self._obj.flush() if final else self._obj.flush(self._flush_mode))
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick the response Content-Encoding from an Accept-Encoding header.
+
+    Returns zstd (when the zstandard package is installed) or gzip, whichever
+    the client weights higher, preferring zstd on a tie, or None when the
+    client accepts neither.
+    """
+    weights = {}
+    for item in accept_encoding.lower().split(","):
+        name, *params = item.split(";")
+        weight = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        if name.strip():
+            weights[name.strip()] = weight
+
+    offered = ["zstd", "gzip"] if load_zstd() is not None else ["gzip"]
+    best = max(offered, key=lambda name: weights.get(name, weights.get("*", 0.0)))
+    return best if weights.get(best, weights.get("*", 0.0)) > 0 else None
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware for compressed request and response bodies.
+
+    Request bodies sent with Content-Encoding: gzip (or zstd, with the
+    zstandard package) are decompressed as they arrive, and rejected with
+    413 once they expand past max_decompressed bytes. Text responses are
+    compressed with the encoding the client's Accept-Encoding prefers,
+    unless they are smaller than minimum_size. Streamed responses are
+    flushed after every chunk, so NDJSON results still arrive as they are
+    produced.
+
+    Configured with the environment variables UNICODEFIX_COMPRESS_MIN_BYTES
+    and UNICODEFIX_MAX_DECOMPRESSED_BYTES.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, max_decompressed: int = 256 * 1024 * 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.max_decompressed = max_decompressed
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        content_encoding = headers.get("content-encoding", "identity").strip().lower()
+        if content_encoding != "identity":
+            try:
+                decompressor = Decompressor(content_encoding, self.max_decompressed)
+            except HTTPException as e:
+                response = JSONResponse(status_code=e.status_code, content={"detail": e.detail})
+                await response(scope, receive, send)
+                return
+            scope = dict(scope)
+            scope["headers"] = [(name, value) for name, value in scope["headers"]
+                                if name not in (b"content-encoding", b"content-length")]
+            receive = self._decompressing(receive, decompressor)
+
+        encoding = choose_encoding(headers.get("accept-encoding", ""))
+        if encoding is not None:
+            send = self._compressing(send, encoding)
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    def _decompressing(receive, decompressor: Decompressor):
+        """Wrap receive() to decompress request body messages."""
+        async def decompressing_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                body = decompressor.decompress(message.get("body", b""))
+                if not message.get("more_body", False):
+                    decompressor.finish()
+                message = {**message, "body": body}
+            return message
+        return decompressing_receive
+
+    def _compressing(self, send, encoding: str):
+        """Wrap send() to compress the response body when it is worth it."""
+        start = None
+        compressor = None
+
+        async def compress(data: bytes, final: bool) -> bytes:
+            if len(data) < COMPRESS_THREAD_BYTES:
+                return compressor.compress(data, final)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, compressor.compress, data, final)
+
+        async def compressing_send(message):
+            nonlocal start, compressor
+            if message["type"] == "http.response.start":
+                start = message  # held back until the first body chunk decides
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None:
+                response_headers = MutableHeaders(raw=list(start["headers"]))
+                content_type = response_headers.get("content-type", "")
+                if (start["status"] not in (204, 304)
+                        and "content-encoding" not in response_headers
+                        and content_type.startswith(COMPRESSIBLE_TYPES)
+                        and (more_body or len(body) >= self.minimum_size)):
+                    compressor = Compressor(encoding)
+                    body = await compress(body, not more_body)
+                    response_headers["Content-Encoding"] = encoding
+                    if more_body:
+                        del response_headers["Content-Length"]
+                    else:
+                        response_headers["Content-Length"] = str(len(body))
+                    response_headers.add_vary_header("Accept-Encoding")
+                    message = {**message, "body": body}
+                await send({**start, "headers": response_headers.raw})
+                start = None
+            elif compressor is not None:
+                message = {**message, "body": await compress(body, not more_body)}
+            await send(message)
+
+        return compressing_send
+
+
+cleaning_pool = CleaningPool.from_env()
+result_cache = ResultCache.from_env()
+metrics = Metrics()
+MAX_DECOMPRESSED_BYTES = env_int("UNICODEFIX_MAX_DECOMPRESSED_BYTES", 256 * 1024 * 1024)
+app.add_middleware(CompressionMiddleware,
+                   minimum_size=env_int("UNICODEFIX_COMPRESS_MIN_BYTES", 1024, minimum=0),
+                   max_decompressed=MAX_DECOMPRESSED_BYTES)
+app.add_middleware(MetricsMiddleware)
+
+
+def cache_options(transliterate: bool) -> tuple:
+    """Cleaning options as part of a ResultCache key."""
+    return ("transliterate",) if transliterate else ()
+
+
+async def clean_cached(text: str, transliterate: bool = False) -> Tuple[str, Dict[str, int]]:
+    """Clean text with statistics, reusing a cached result when there is one."""
+    key = result_cache.key(text, cache_options(transliterate))
+    result, = await result_cache.get_many([key])
+    if result is None:
+        result = await cleaning_pool.run(len(text), clean_text_with_stats, text, transliterate)
+        await result_cache.put_many([(key, result)])
+    return result
+
+
+def clean_reporting_edits(text: str, transliterate: bool = False) -> tuple:
+    """Clean text and list its edits, in a pool worker: (cleaned, changes, EditLog.to_dict())."""
+    cleaned, changes, edits = clean_text_with_edits(text, transliterate)
+    return cleaned, changes, edits.to_dict()
+
+
+async def clean_maybe_reporting(text: str, transliterate: bool = False,
+                                report: bool = False) -> tuple:
+    """Clean text as clean_cached() does; with report, also return its edits (else None)."""
+    if not report:
+        return (*await clean_cached(text, transliterate), None)
+    # Edit lists are not cached: they are as big as the text and rarely asked for twice
+    return await cleaning_pool.run(len(text), clean_reporting_edits, text, transliterate)
+
+
+@app.exception_handler(ServerBusyError)
+async def server_busy_handler(request, exc: ServerBusyError):
+    """Tell clients to back off when the cleaning pool is saturated."""
+    return JSONResponse(status_code=503, content={"detail": str(exc)},
+                        headers={"Retry-After": "1"})
+
+
+def preload() -> None:
+    """
+    Load what is otherwise loaded on first use: the engine's tables, NumPy and zstandard.
+
+    web_server.py calls this before forking its workers, which then share it all.
+    """
+    preload_engine()
+    load_zstd()
+
+
+async def save_metrics_periodically() -> None:
+    """Save this worker's metrics snapshot every METRICS_SAVE_SECONDS."""
+    while True:
+        await asyncio.sleep(METRICS_SAVE_SECONDS)
+        snapshot = metrics.snapshot(cleaning_pool, result_cache)
+        try:
+            await run_in_threadpool(metrics.save, snapshot)
+        except OSError:
+            pass
+
+
+@app.on_event("startup")
+async def start_saving_metrics():
+    """Start saving metrics for the other workers, when web_server.py shares them."""
+    if metrics.directory is not None:
+        app.state.metrics_saver = asyncio.create_task(save_metrics_periodically())
+
+
+@app.on_event("shutdown")
+async def save_final_metrics():
+    """Save this worker's last metrics, which keep counting after it exits."""
+    saver = getattr(app.state, "metrics_saver", None)
+    if saver is not None:
+        saver.cancel()
+        try:
+            metrics.save(metrics.snapshot(cleaning_pool, result_cache))
+        except OSError:
+            pass
+
+
+@app.on_event("shutdown")
+def shutdown_cleaning_pool():
+    """Release pool workers and the cache database when the server stops."""
+    cleaning_pool.shutdown()
+    result_cache.close()
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -169,12 +1256,20 @@ async def get_index():
                             TXT, MD, or other text files
                         </p>
                     </div>
-                    <input type="file" id="fileInput" class="hidden" accept=".txt,.md,.text,.log,.csv,.json,.xml,.html,.css,.js,.py,.php,.java,.cpp,.c,.h" />
+                    <input type="file" id="fileInput" class="hidden" accept=".txt,.md,.text,.log,.csv,.json,.xml,.html,.css,.js,.py,.php,.java,.cpp,.c,.h,.gz" />
                 </div>
             </div>
 
             <!-- Clean Button -->
-            <div class="text-center">
+            <div class="text-center space-y-4">
+                <label for="transliterateToggle" class="flex items-center justify-center space-x-2 text-sm text-gray-700 dark:text-gray-300 cursor-pointer">
+                    <input type="checkbox" id="transliterateToggle" class="rounded border-gray-300 dark:border-gray-600 text-apple-blue focus:ring-apple-blue" />
+                    <span>Transliterate everything to ASCII (Café → Cafe, 北京 → Bei Jing)</span>
+                </label>
+                <label for="liveToggle" class="flex items-center justify-center space-x-2 text-sm text-gray-700 dark:text-gray-300 cursor-pointer">
+                    <input type="checkbox" id="liveToggle" class="rounded border-gray-300 dark:border-gray-600 text-apple-blue focus:ring-apple-blue" />
+                    <span>Clean as I type (live)</span>
+                </label>
                 <button id="cleanBtn" class="bg-apple-blue hover:bg-blue-600 text-white font-medium py-3 px-8 rounded-lg shadow-lg hover:shadow-xl transition-all duration-200 transform hover:scale-105 disabled:opacity-50 disabled:cursor-not-allowed disabled:transform-none">
                     <span id="cleanBtnText">Clean Text</span>
                     <svg id="cleanBtnSpinner" class="hidden animate-spin -mr-1 ml-3 h-5 w-5 text-white inline" xmlns="http://www.w3.org/2000/svg" fill="none" viewBox="0 0 24 24">
@@ -252,18 +1347,36 @@ async def clean_text_endpoint(request: TextCleanRequest):
             raise HTTPException(status_code=400, detail="No text provided")
         
         original_text = request.text
-        cleaned_text = clean_text(original_text)
-        
-        changes_made = count_unicode_changes(original_text, cleaned_text)
+
+        # Fast path: nothing to clean, return the input unchanged
+        if not needs_cleaning(original_text):
+            metrics.record_cleaning()
+            return CleanResponse(
+                success=True,
+                cleaned_text=original_text,
+                original_size=len(original_text),
+                cleaned_size=len(original_text),
+                changes_made=0,
+                changes=no_changes(),
+                edits=EditLog().to_dict() if request.report else None
+            )
+
+        cleaned_text, changes, edits = await clean_maybe_reporting(
+            original_text, request.transliterate, request.report)
+        metrics.record_cleaning(changes)
         
         return CleanResponse(
             success=True,
             cleaned_text=cleaned_text,
             original_size=len(original_text),
             cleaned_size=len(cleaned_text),
-            changes_made=changes_made
+            changes_made=sum(changes.values()),
+            changes=changes,
+            edits=edits
         )
     
+    except ServerBusyError:
+        raise
     except Exception as e:
         return CleanResponse(
             success=False,
@@ -275,43 +1388,61 @@ async def clean_text_endpoint(request: TextCleanRequest):
 
 
 @app.post("/api/clean-file", response_model=CleanResponse)
-async def clean_file_endpoint(file: UploadFile = File(...)):
-    """Clean Unicode artifacts from uploaded file."""
+async def clean_file_endpoint(file: UploadFile = File(...), transliterate: bool = Form(False),
+                              report: bool = Form(False)):
+    """Clean Unicode artifacts from uploaded file; with report, also list every edit."""
     try:
         # Validate file type
-        if not file.filename or not any(file.filename.lower().endswith(ext) 
-                                       for ext in ['.txt', '.md', '.text', '.log', '.csv', 
-                                                 '.json', '.xml', '.html', '.css', '.js', 
-                                                 '.py', '.php', '.java', '.cpp', '.c', '.h']):
+        if not is_supported_file(file.filename):
             raise HTTPException(status_code=400, detail="Unsupported file type")
         
-        # Read file content
-        content = await file.read()
+        # Read file content, decompressing .gz uploads within the size cap
+        if is_gzip_file(file.filename):
+            reader = DecompressingReader(file.file, "gzip", MAX_DECOMPRESSED_BYTES)
+            content = await cleaning_pool.run_blocking(reader.read)
+        else:
+            content = await file.read()
+        encoding = detect_encoding(content)
+
+        # Fast path: plain ASCII with nothing to clean is returned unchanged
+        if encoding == 'utf-8' and not needs_cleaning(content):
+            original_text = content.decode('ascii')
+            if not original_text.strip():
+                raise HTTPException(status_code=400, detail="File appears to be empty")
+            metrics.record_cleaning()
+            return CleanResponse(
+                success=True,
+                cleaned_text=original_text,
+                original_size=len(original_text),
+                cleaned_size=len(original_text),
+                changes_made=0,
+                changes=no_changes(),
+                encoding=encoding,
+                edits=EditLog().to_dict() if report else None
+            )
         
-        # Decode with error handling
-        try:
-            original_text = content.decode('utf-8')
-        except UnicodeDecodeError:
-            try:
-                original_text = content.decode('utf-8', errors='replace')
-            except Exception:
-                raise HTTPException(status_code=400, detail="Could not decode file as text")
+        # One decode in the detected encoding; stray undecodable bytes become U+FFFD
+        original_text = content.decode(encoding, errors='replace')
         
         if not original_text.strip():
             raise HTTPException(status_code=400, detail="File appears to be empty")
         
-        cleaned_text = clean_text(original_text)
-        changes_made = count_unicode_changes(original_text, cleaned_text)
+        cleaned_text, changes, edits = await clean_maybe_reporting(
+            original_text, transliterate, report)
+        metrics.record_cleaning(changes)
         
         return CleanResponse(
             success=True,
             cleaned_text=cleaned_text,
             original_size=len(original_text),
             cleaned_size=len(cleaned_text),
-            changes_made=changes_made
+            changes_made=sum(changes.values()),
+            changes=changes,
+            encoding=encoding,
+            edits=edits
         )
     
-    except HTTPException:
+    except (HTTPException, ServerBusyError):
         raise
     except Exception as e:
         return CleanResponse(
@@ -323,6 +1454,506 @@ async def clean_file_endpoint(file: UploadFile = File(...)):
         )
 
 
+def clean_upload(infile, outfile, transliterate: bool = False) -> tuple:
+    """
+    Detect an uploaded file's encoding and clean it into a UTF-8 file.
+
+    Returns:
+        tuple: (detected encoding, per-rule change counts)
+    """
+    encoding = detect_encoding(infile.read(ENCODING_SAMPLE_SIZE))
+    infile.seek(0)
+    return encoding, clean_byte_stream(infile, outfile, STREAM_CHUNK_SIZE, encoding, transliterate)
+
+
+def attachment_disposition(filename: str) -> str:
+    """
+    Build a Content-Disposition header offering a download named filename.
+
+    Header values must be Latin-1 and a quote or line break would end the
+    parameter, so filename= gets an ASCII stand-in and clients that support
+    it read the real name from filename*= (RFC 5987).
+    """
+    fallback = "".join(char if " " <= char < "\x7f" and char not in '"\\' else "_"
+                       for char in filename)
+    quoted = urllib.parse.quote(filename, safe="")
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quoted}"
+
+
+def iter_spooled(output, chunk_size: int = STREAM_CHUNK_SIZE):
+    """Yield a spooled temporary file's contents in chunks, then close it."""
+    try:
+        while True:
+            chunk = output.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        output.close()
+
+
+@app.post("/api/clean-file/stream")
+async def clean_file_stream_endpoint(file: UploadFile = File(...),
+                                     transliterate: bool = Form(False)):
+    """
+    Clean an uploaded file and stream the cleaned file back.
+
+    The upload is decompressed (.gz files), decoded from its detected
+    encoding and cleaned chunk by chunk into a spooled temporary UTF-8 file,
+    so memory use per request stays flat for any file size. Summary
+    statistics and the encoding are sent in X-UnicodeFix-* response headers.
+    """
+    if not is_supported_file(file.filename):
+        raise HTTPException(status_code=400, detail="Unsupported file type")
+
+    filename = file.filename
+    infile = file.file
+    if is_gzip_file(filename):
+        filename = filename[:-3]
+        infile = DecompressingReader(file.file, "gzip", MAX_DECOMPRESSED_BYTES)
+    base, _ = os.path.splitext(os.path.basename(filename))
+    disposition = attachment_disposition(f"{base}.clean.txt")
+
+    output = tempfile.SpooledTemporaryFile(max_size=STREAM_SPOOL_SIZE)
+    try:
+        encoding, changes = await cleaning_pool.run_blocking(
+            clean_upload, infile, output, transliterate)
+        original_bytes = infile.tell()
+        cleaned_bytes = output.tell()
+        output.seek(0)
+    except BaseException:
+        output.close()
+        raise
+    metrics.record_cleaning(changes)
+
+    headers = {
+        "Content-Disposition": disposition,
+        "Content-Length": str(cleaned_bytes),
+        "X-UnicodeFix-Original-Bytes": str(original_bytes),
+        "X-UnicodeFix-Cleaned-Bytes": str(cleaned_bytes),
+        "X-UnicodeFix-Changes-Made": str(sum(changes.values())),
+        "X-UnicodeFix-Changes": json.dumps(changes, separators=(",", ":")),
+        "X-UnicodeFix-Encoding": encoding,
+    }
+    return StreamingResponse(iter_spooled(output), media_type="text/plain; charset=utf-8",
+                             headers=headers)
+
+
+@app.post("/api/clean-archive")
+async def clean_archive_endpoint(file: UploadFile = File(...), transliterate: bool = Form(False),
+                                 report: bool = Form(False)):
+    """
+    Clean the text members of an uploaded zip or tar archive.
+
+    Members are streamed from the upload into a spooled archive of the same
+    format without being extracted; binary members are copied unchanged and
+    the members' total size is capped like decompressed request bodies. The
+    cleaned archive comes back with summary X-UnicodeFix-* headers, or with
+    report set, per-member statistics come back as JSON instead.
+    """
+    suffix = archive_suffix(file.filename or "")
+    if suffix is None:
+        raise HTTPException(status_code=400, detail="Unsupported archive type")
+    name = os.path.basename(file.filename)
+    disposition = attachment_disposition(f"{name[:-len(suffix)]}.clean{suffix}")
+
+    output = tempfile.SpooledTemporaryFile(max_size=STREAM_SPOOL_SIZE)
+    try:
+        members = await cleaning_pool.run_blocking(
+            clean_archive, file.file, output, suffix, 1, STREAM_CHUNK_SIZE, transliterate,
+            None, MAX_DECOMPRESSED_BYTES)
+        original_bytes = file.file.seek(0, io.SEEK_END)
+        cleaned_bytes = output.tell()
+        output.seek(0)
+    except ArchiveTooLarge as e:
+        output.close()
+        raise HTTPException(status_code=413, detail=str(e))
+    except ArchiveError as e:
+        output.close()
+        raise HTTPException(status_code=400, detail=str(e))
+    except BaseException:
+        output.close()
+        raise
+
+    changes = Counter(no_changes())
+    for member in members:
+        changes.update(member["changes"] or {})
+    changes = dict(changes)
+    metrics.record_cleaning(changes, documents=len(members))
+    summary = {
+        "members": len(members),
+        "members_cleaned": sum(member["status"] == CLEANED for member in members),
+        "members_binary": sum(member["status"] == BINARY for member in members),
+        "original_size": original_bytes,
+        "cleaned_size": cleaned_bytes,
+        "changes_made": sum(changes.values()),
+        "changes": changes,
+    }
+    if report:
+        output.close()
+        return JSONResponse({"success": True, **summary, "member_stats": members})
+
+    headers = {
+        "Content-Disposition": disposition,
+        "Content-Length": str(cleaned_bytes),
+        "X-UnicodeFix-Original-Bytes": str(original_bytes),
+        "X-UnicodeFix-Cleaned-Bytes": str(cleaned_bytes),
+        "X-UnicodeFix-Members": str(summary["members"]),
+        "X-UnicodeFix-Members-Cleaned": str(summary["members_cleaned"]),
+        "X-UnicodeFix-Members-Binary": str(summary["members_binary"]),
+        "X-UnicodeFix-Changes-Made": str(summary["changes_made"]),
+        "X-UnicodeFix-Changes": json.dumps(changes, separators=(",", ":")),
+    }
+    return StreamingResponse(iter_spooled(output), media_type=ARCHIVE_MEDIA_TYPES[suffix],
+                             headers=headers)
+
+
+# A batch entry: (document id, text to clean or None, error message or None)
+BatchEntry = Tuple[object, Optional[str], Optional[str]]
+
+
+def parse_batch_document(doc, index: int) -> BatchEntry:
+    """
+    Turn one batch document into a BatchEntry.
+
+    A document is either {"id": ..., "text": "..."} or a bare string; a
+    missing id defaults to the document's position in the batch.
+    """
+    if isinstance(doc, str):
+        return index, doc, None
+    if not isinstance(doc, dict):
+        return index, None, "Document must be an object or a string"
+    doc_id = doc.get("id", index)
+    text = doc.get("text")
+    if not isinstance(text, str):
+        return doc_id, None, "Document has no text"
+    return doc_id, text, None
+
+
+async def iter_json_array(documents: list) -> AsyncIterator[BatchEntry]:
+    """Yield BatchEntries for an already parsed JSON array."""
+    for index, doc in enumerate(documents):
+        yield parse_batch_document(doc, index)
+
+
+async def iter_request_lines(request: Request) -> AsyncIterator[bytes]:
+    """Yield the request body line by line as it arrives."""
+    partial: List[bytes] = []
+    async for chunk in request.stream():
+        if b"\n" not in chunk:
+            partial.append(chunk)
+            continue
+        lines = chunk.split(b"\n")
+        partial.append(lines[0])
+        yield b"".join(partial)
+        for line in lines[1:-1]:
+            yield line
+        partial = [lines[-1]]
+    yield b"".join(partial)
+
+
+async def iter_ndjson(request: Request) -> AsyncIterator[BatchEntry]:
+    """Yield BatchEntries as NDJSON lines arrive in the request body."""
+    index = 0
+    async for line in iter_request_lines(request):
+        if not line.strip():
+            continue
+        try:
+            doc = json.loads(line)
+        except ValueError:
+            yield index, None, f"Invalid JSON on document {index}"
+        else:
+            yield parse_batch_document(doc, index)
+        index += 1
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body iterator may still be reading the request.
+
+    For older ASGI servers StreamingResponse watches receive() for a client
+    disconnect while it streams, which would take request body chunks away
+    from the body iterator. This streams the way Starlette does for ASGI 2.4
+    servers, where a disconnect surfaces as an error from send().
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+
+
+async def clean_batch_entries(entries: List[BatchEntry], summary: dict,
+                              transliterate: bool = False) -> str:
+    """Clean one group of batch entries and return their NDJSON result lines."""
+    texts = [text for _, text, error in entries if error is None]
+    options = cache_options(transliterate)
+    keys = [result_cache.key(text, options) for text in texts]
+    results = await result_cache.get_many(keys)
+    missed = [index for index, result in enumerate(results) if result is None]
+    if missed:
+        cleaned = await cleaning_pool.run(sum(len(texts[index]) for index in missed),
+                                          clean_texts_with_stats, [texts[index] for index in missed],
+                                          transliterate)
+        for index, result in zip(missed, cleaned):
+            results[index] = result
+        await result_cache.put_many([(keys[index], results[index]) for index in missed])
+    results = iter(results)
+
+    lines = []
+    group_changes = no_changes()
+    for doc_id, text, error in entries:
+        summary["documents"] += 1
+        if error is not None:
+            summary["errors"] += 1
+            lines.append(json.dumps({"id": doc_id, "success": False, "error": error}))
+            continue
+
+        cleaned_text, changes = next(results)
+        changes_made = sum(changes.values())
+        summary["original_size"] += len(text)
+        summary["cleaned_size"] += len(cleaned_text)
+        summary["changes_made"] += changes_made
+        if changes_made:
+            summary["changed_documents"] += 1
+            for rule, count in changes.items():
+                summary["changes"][rule] += count
+                group_changes[rule] += count
+        lines.append(json.dumps({"id": doc_id, "success": True, "cleaned_text": cleaned_text,
+                                 "changes_made": changes_made, "changes": changes},
+                                ensure_ascii=False))
+    metrics.record_cleaning(group_changes, documents=len(texts))
+    return "\n".join(lines) + "\n"
+
+
+async def stream_batch_results(entries: AsyncIterator[BatchEntry],
+                               transliterate: bool = False) -> AsyncIterator[str]:
+    """Clean batch entries in groups, yielding NDJSON results and a summary."""
+    summary = {"documents": 0, "changed_documents": 0, "errors": 0, "original_size": 0,
+               "cleaned_size": 0, "changes_made": 0, "changes": no_changes()}
+    group: List[BatchEntry] = []
+    group_chars = 0
+    try:
+        async for entry in entries:
+            group.append(entry)
+            group_chars += len(entry[1] or "")
+            if len(group) >= BATCH_GROUP_DOCUMENTS or group_chars >= BATCH_GROUP_CHARS:
+                yield await clean_batch_entries(group, summary, transliterate)
+                group, group_chars = [], 0
+        if group:
+            yield await clean_batch_entries(group, summary, transliterate)
+    except ServerBusyError as e:
+        error = str(e)
+    except HTTPException as e:
+        # Raised while reading the body, e.g. a corrupt or oversized compressed one
+        error = e.detail
+    else:
+        yield json.dumps({"summary": summary}) + "\n"
+        return
+    # Headers are already sent, so report it in the stream; the missing
+    # summary line tells the client the batch is incomplete
+    yield json.dumps({"success": False, "error": error}) + "\n"
+
+
+@app.post("/api/clean-batch")
+async def clean_batch_endpoint(request: Request, transliterate: bool = False):
+    """
+    Clean many small documents in one request.
+
+    The body is a JSON array, or NDJSON when sent with an NDJSON content type,
+    of {"id": ..., "text": "..."} objects (or bare strings). Results stream
+    back as NDJSON, one line per document in input order, followed by a
+    {"summary": {...}} line with aggregate statistics for the batch.
+    ?transliterate=true folds all non-ASCII text to ASCII.
+    """
+    if cleaning_pool.pending >= cleaning_pool.max_pending:
+        raise ServerBusyError("Server busy, please retry shortly")
+
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in NDJSON_MEDIA_TYPES:
+        entries = iter_ndjson(request)
+    else:
+        try:
+            documents = json.loads(await request.body())
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+        if not isinstance(documents, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+        entries = iter_json_array(documents)
+
+    return DuplexStreamingResponse(stream_batch_results(entries, transliterate),
+                                   media_type="application/x-ndjson")
+
+
+def clean_lines(lines: List[str], transliterate: bool = False) -> Tuple[List[str], Dict[str, int]]:
+    """
+    Clean lines split by LINE_RE into exactly one cleaned line each.
+
+    The lines are cleaned as one text, which is cut back into lines at its
+    "\n"s. That is exact unless cleaning created line endings of its own
+    (from a lone "\r" inside a line); those lines are cleaned one by one.
+
+    Returns:
+        tuple: (cleaned lines, {rule: count} for all of them)
+    """
+    cleaned, stats = clean_text_with_stats("".join(lines), transliterate)
+    pieces = cleaned.split("\n")
+    terminated = len(lines) - (bool(lines) and not lines[-1].endswith("\n"))
+    if len(pieces) - 1 != terminated:
+        return [line for line, _ in clean_texts_with_stats(lines, transliterate)], stats
+    cleaned_lines = [piece + "\n" for piece in pieces[:-1]]
+    if terminated < len(lines):
+        cleaned_lines.append(pieces[-1])
+    return cleaned_lines, stats
+
+
+class LiveDocument:
+    """
+    A document edited over the live-cleaning WebSocket, kept as lines.
+
+    Every cleaning rule is local to a character, or looks back from a "\n"
+    no further than the start of its line, so cleaned lines correspond one
+    to one to original lines and an edit only needs its own lines
+    re-cleaned, plus a neighbouring line where the edit joins onto it. The
+    work per edit depends on the size of the edit, not of the document.
+    """
+
+    def __init__(self, transliterate: bool = False):
+        self.transliterate = transliterate
+        self.lines: List[str] = []
+        self.cleaned: List[str] = []
+        self.totals = Counter()
+        self.original_size = 0
+        self.cleaned_size = 0
+
+    def region(self, start: int, end: int, text: str) -> Tuple[int, int, List[str]]:
+        """
+        Expand an edit that replaces lines [start, end) with text to the lines to re-clean.
+
+        Returns:
+            tuple: (first, last, new lines) to replace lines [first, last) with
+
+        Raises:
+            ValueError: If the line range is not within the document
+        """
+        if not 0 <= start <= end <= len(self.lines):
+            raise ValueError(f"Lines {start}-{end} are outside the document "
+                             f"({len(self.lines)} lines)")
+        first, last = start, end
+        # Only the last line can lack a "\n"; text inserted after it continues it
+        if first and not self.lines[first - 1].endswith("\n"):
+            first -= 1
+            text = self.lines[first] + text
+        # Text without a final "\n" continues into the following line
+        if text and not text.endswith("\n") and last < len(self.lines):
+            text += self.lines[last]
+            last += 1
+        return first, last, LINE_RE.findall(text)
+
+    async def replace(self, first: int, last: int, lines: List[str]) -> None:
+        """Replace lines [first, last) with lines, cleaning them on the cleaning pool."""
+        size = sum(map(len, lines))
+        cleaned, stats = await cleaning_pool.run(size, clean_lines, lines, self.transliterate)
+        if last > first:
+            # Re-cleaning the replaced lines is cheaper than keeping counts per line
+            old_text = "".join(self.lines[first:last])
+            _, old_stats = await cleaning_pool.run(len(old_text), clean_text_with_stats,
+                                                   old_text, self.transliterate)
+            self.totals.subtract(old_stats)
+        self.totals.update(stats)
+        self.original_size += size - sum(map(len, self.lines[first:last]))
+        self.cleaned_size += sum(map(len, cleaned)) - sum(map(len, self.cleaned[first:last]))
+        self.lines[first:last] = lines
+        self.cleaned[first:last] = cleaned
+
+    def changes(self) -> Dict[str, int]:
+        """Per-rule change counts for the whole document."""
+        return {rule: self.totals[rule] for rule in CHANGE_RULES}
+
+
+@app.websocket("/ws/clean")
+async def live_clean_endpoint(websocket: WebSocket):
+    """
+    Clean a document live while it is edited.
+
+    Messages are JSON. The client sends {"op": "open", "text": ...,
+    "transliterate": false} with the whole document, then {"op": "edit",
+    "from_line": a, "to_line": b, "text": ...} for each change, replacing
+    lines [a, b) (counted with their line endings) with text. Each message
+    is answered with {"op": "patch", "from_line": ..., "to_line": ...,
+    "lines": [...]} replacing cleaned lines [from_line, to_line) with the
+    given cleaned lines, plus "line_count", sizes and change counts for the
+    whole document. Invalid messages close the connection with 1008, a
+    saturated cleaning pool with 1013; the client then reopens with the
+    whole document.
+    """
+    await websocket.accept()
+    document = LiveDocument()
+    try:
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+                op = message["op"]
+                text = message["text"]
+                if not isinstance(text, str):
+                    raise ValueError("text must be a string")
+                if op == "open":
+                    document = LiveDocument(bool(message.get("transliterate", False)))
+                    first, last, lines = 0, 0, LINE_RE.findall(text)
+                elif op == "edit":
+                    first, last, lines = document.region(int(message["from_line"]),
+                                                         int(message["to_line"]), text)
+                else:
+                    raise ValueError(f"Unknown op: {op!r}")
+            except (ValueError, KeyError, TypeError) as e:
+                await websocket.close(code=WS_POLICY_VIOLATION, reason=str(e)[:120])
+                return
+
+            try:
+                await document.replace(first, last, lines)
+            except ServerBusyError as e:
+                await websocket.close(code=WS_TRY_AGAIN_LATER, reason=str(e))
+                return
+            if op == "open":
+                metrics.record_cleaning(document.changes())
+
+            changes = document.changes()
+            await websocket.send_json({
+                "op": "patch",
+                "from_line": first,
+                "to_line": last,
+                "lines": document.cleaned[first:first + len(lines)],
+                "line_count": len(document.lines),
+                "original_size": document.original_size,
+                "cleaned_size": document.cleaned_size,
+                "changes_made": sum(changes.values()),
+                "changes": changes,
+            })
+    except WebSocketDisconnect:
+        pass
+
+
+@app.get("/api/cache")
+async def cache_stats():
+    """Result cache counters: hits, misses, evictions and size."""
+    return result_cache.stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Serve request, cleaning, pool and cache metrics in Prometheus text format."""
+    snapshots = [metrics.snapshot(cleaning_pool, result_cache)]
+    if metrics.directory is not None:
+        # Totals over all workers, read from their saved snapshots
+        try:
+            snapshots = await run_in_threadpool(metrics.gather, snapshots[0])
+        except OSError:
+            pass
+    return PlainTextResponse(metrics.render(cleaning_pool, result_cache, snapshots),
+                             media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
@@ -330,14 +1961,6 @@ async def health_check():
 
 
 if __name__ == "__main__":
-    print("🚀 Starting UnicodeFix Web Interface...")
-    print("📱 Access the interface at: http://localhost:8000")
-    print("🔧 API docs available at: http://localhost:8000/docs")
-    
-    uvicorn.run(
-        "web_app:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        log_level="info"
-    ) 
\ No newline at end of file
+    # The options of web_server.py; use --reload to restart on code changes
+    from web_server import main
+    main()
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+
+"""
+UnicodeFix production web server
+
+Serves web_app with several worker processes sharing one listening socket:
+
+    python web_server.py --workers 8 --host 0.0.0.0 --port 8000
+
+Where fork() is available, this process imports web_app, loads the cleaning
+engine's lookup tables and binds the socket first, then forks the workers,
+which share that memory copy-on-write instead of each importing and building
+it again, and /metrics adds up the counters of all of them. It then only
+supervises them: a worker that dies is replaced, and
+SIGTERM or Ctrl+C makes every worker stop accepting connections and finish
+the requests in flight (up to --graceful-timeout) before exiting; a second
+Ctrl+C stops them at once. Elsewhere (Windows) uvicorn's own worker
+processes are used, which import everything separately.
+
+Every option can also be set with an environment variable, see --help.
+"""
+
+import argparse
+import gc
+import importlib.util
+import logging
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+
+import uvicorn
+
+from web_app import app, env_int, metrics, preload
+
+# Workers exiting sooner than this after being started are restarted only after a pause
+MIN_WORKER_SECONDS = 1.0
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def build_parser(workers: int = None) -> argparse.ArgumentParser:
+    """
+    Build the command-line parser, with defaults from UNICODEFIX_* environment variables.
+
+    Args:
+        workers (int): Default worker count when UNICODEFIX_SERVER_WORKERS is
+            not set (default: CPU count)
+    """
+    parser = argparse.ArgumentParser(description="Serve the UnicodeFix web interface and API.")
+    parser.add_argument("--host", default=os.environ.get("UNICODEFIX_HOST", "0.0.0.0"),
+                        help="Address to listen on (env UNICODEFIX_HOST, default: 0.0.0.0)")
+    parser.add_argument("--port", type=int, default=env_int("UNICODEFIX_PORT", 8000),
+                        help="Port to listen on (env UNICODEFIX_PORT, default: 8000)")
+    parser.add_argument("-w", "--workers", type=int, metavar="N",
+                        default=env_int("UNICODEFIX_SERVER_WORKERS",
+                                        workers or os.cpu_count() or 1),
+                        help="Worker processes (env UNICODEFIX_SERVER_WORKERS, "
+                             f"default: {'CPU count' if workers is None else workers})")
+    parser.add_argument("--backlog", type=int, default=env_int("UNICODEFIX_BACKLOG", 2048),
+                        help="Connections the kernel queues before they are accepted "
+                             "(env UNICODEFIX_BACKLOG, default: 2048)")
+    parser.add_argument("--keep-alive", type=int, metavar="SECONDS",
+                        default=env_int("UNICODEFIX_KEEP_ALIVE", 5),
+                        help="How long idle keep-alive connections stay open; set it above "
+                             "the idle timeout of a load balancer in front "
+                             "(env UNICODEFIX_KEEP_ALIVE, default: 5)")
+    parser.add_argument("--graceful-timeout", type=int, metavar="SECONDS",
+                        default=env_int("UNICODEFIX_GRACEFUL_TIMEOUT", 30),
+                        help="On shutdown, how long requests in flight may take to finish "
+                             "(env UNICODEFIX_GRACEFUL_TIMEOUT, default: 30)")
+    parser.add_argument("--loop", choices=("auto", "asyncio", "uvloop"),
+                        default=os.environ.get("UNICODEFIX_LOOP", "auto"),
+                        help="Event loop; auto uses uvloop when it is installed "
+                             "(env UNICODEFIX_LOOP, default: auto)")
+    parser.add_argument("--http", choices=("auto", "h11", "httptools"),
+                        default=os.environ.get("UNICODEFIX_HTTP", "auto"),
+                        help="HTTP parser; auto uses httptools when it is installed "
+                             "(env UNICODEFIX_HTTP, default: auto)")
+    parser.add_argument("--access-log", action="store_true",
+                        help="Log every request (costs throughput)")
+    parser.add_argument("--reload", action="store_true",
+                        help="For development: one process (whatever --workers says) that "
+                             "restarts on code changes")
+    return parser
+
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    """Create the listening socket the workers share."""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class WorkerServer(uvicorn.Server):
+    """A forked worker: stops on SIGTERM only, and when the supervisor has gone."""
+
+    def __init__(self, config: uvicorn.Config, supervisor: int):
+        super().__init__(config)
+        self.supervisor = supervisor
+
+    def handle_exit(self, sig, frame) -> None:
+        # Ctrl+C reaches the whole process group; the supervisor answers
+        # it with SIGTERM, so shutdown goes through one path
+        if sig != signal.SIGINT:
+            super().handle_exit(sig, frame)
+
+    async def on_tick(self, counter: int) -> bool:
+        if os.getppid() != self.supervisor:
+            self.should_exit = True
+        return await super().on_tick(counter)
+
+
+def _run_worker(config: uvicorn.Config, sock: socket.socket, supervisor: int) -> None:
+    """Serve in a freshly forked worker until shut down, then leave the process."""
+    status = 0
+    # Restored by uvicorn after its shutdown, so a SIGTERM then ends the process
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        server = WorkerServer(config, supervisor)
+        server.run(sockets=[sock])
+        if not server.started:
+            status = 3
+    except SystemExit as e:
+        status = e.code if isinstance(e.code, int) else 1
+    except BaseException:
+        logger.exception("Worker [%d] failed", os.getpid())
+        status = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        # Skip the parent's atexit handlers and finalizers inherited with fork()
+        os._exit(status)
+
+
+def serve_forked(config: uvicorn.Config, workers: int) -> None:
+    """
+    Serve with worker processes forked from this one, restarting any that die.
+
+    Args:
+        config (uvicorn.Config): Server settings, with the app already imported
+        workers (int): Number of worker processes
+    """
+    sock = bind_socket(config.host, config.port, config.backlog)
+    config.load()  # the app, its middleware and the HTTP protocol, before forking
+    # uvloop is imported once here rather than in every worker
+    if config.loop != "asyncio" and importlib.util.find_spec("uvloop") is not None:
+        importlib.import_module("uvloop")
+    preload()
+    # Workers save their metrics here, so that /metrics reports all of them
+    metrics_dir = tempfile.mkdtemp(prefix="unicodefix-metrics-")
+    metrics.share(metrics_dir)
+    # Objects alive now are never collected, so the collector does not copy their pages
+    gc.freeze()
+
+    supervisor = os.getpid()
+    children = {}  # pid -> start time
+    stopping = 0
+
+    def start_worker() -> None:
+        pid = os.fork()
+        if pid == 0:
+            _run_worker(config, sock, supervisor)
+        children[pid] = time.monotonic()
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping += 1
+        # The first signal shuts the workers down gracefully, the next one kills them
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM if stopping == 1 else signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    logger.info("Supervisor [%d] serving on http://%s:%d with %d workers",
+                supervisor, config.host, config.port, workers)
+    for _ in range(workers):
+        start_worker()
+
+    failed = False
+    try:
+        while children:
+            pid, status = os.wait()
+            started = children.pop(pid, None)
+            if started is None or stopping:
+                continue
+            if os.waitstatus_to_exitcode(status) == 3:
+                logger.error("Worker [%d] failed to start, stopping", pid)
+                failed = True
+                stop(signal.SIGTERM, None)
+                continue
+            logger.warning("Worker [%d] exited (status %d), starting another",
+                           pid, os.waitstatus_to_exitcode(status))
+            if time.monotonic() - started < MIN_WORKER_SECONDS:
+                time.sleep(MIN_WORKER_SECONDS)
+            start_worker()
+    finally:
+        sock.close()
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+    logger.info("Supervisor [%d] stopped", supervisor)
+    if failed:
+        sys.exit(1)
+
+
+def serve(host: str = "0.0.0.0", port: int = 8000, workers: int = 1, backlog: int = 2048,
+          keep_alive: int = 5, graceful_timeout: int = 30, loop: str = "auto",
+          http: str = "auto", access_log: bool = False, reload: bool = False) -> None:
+    """
+    Run the web server until it is stopped.
+
+    Args:
+        host (str): Address to listen on
+        port (int): Port to listen on
+        workers (int): Worker processes; more than one are forked from this
+            process after loading everything where fork() is available
+        backlog (int): Listen backlog of the socket
+        keep_alive (int): Seconds an idle keep-alive connection stays open
+        graceful_timeout (int): Seconds requests in flight get on shutdown
+        loop (str): "auto", "asyncio" or "uvloop"
+        http (str): "auto", "h11" or "httptools"
+        access_log (bool): Log every request
+        reload (bool): Restart on code changes, in a single process whatever
+            workers is (development)
+    """
+    options = dict(host=host, port=port, backlog=backlog, timeout_keep_alive=keep_alive,
+                   timeout_graceful_shutdown=graceful_timeout, loop=loop, http=http,
+                   access_log=access_log, log_level="info")
+    if reload:
+        uvicorn.run("web_app:app", reload=True, **options)
+    elif workers > 1 and hasattr(os, "fork"):
+        serve_forked(uvicorn.Config(app, **options), workers)
+    elif workers > 1:
+        uvicorn.run("web_app:app", workers=workers, **options)
+    else:
+        preload()
+        uvicorn.run(app, **options)
+
+
+def main(workers: int = None) -> None:
+    """Parse the command line and serve; workers is the default worker count."""
+    args = build_parser(workers).parse_args()
+    serve(args.host, args.port, args.workers, args.backlog, args.keep_alive,
+          args.graceful_timeout, args.loop, args.http, args.access_log, args.reload)
+
+
+if __name__ == "__main__":
+    main()